@@ -0,0 +1,989 @@
+"""
+benchmark.py — İsmayıl modelinin sürət ölçmələri
+=================================================
+Çəkilər sürətə təsir etmədiyi üçün ölçmələr təsadüfi başladılmış model üzərində aparılır.
+
+İstifadə:
+  python benchmark.py generasiya   # KV-kesh ilə və kesh-siz generasiya sürəti (simvol/san)
+  python benchmark.py diqqet       # Birləşdirilmiş qkv diqqəti vs köhnə ayrı başlıqlar (CPU, paket 1 və 32)
+  python benchmark.py planlayici   # Davamlı paketləmə: 1, 8, 64 paralel müştəridə simvol/san və p50/p99 gecikmə
+  python benchmark.py axin         # Axın (stream) rejimində ilk parçaya qədər vaxt (TTFT) vs tam cavab vaxtı
+  python benchmark.py cavabdehlik  # Uzun generasiyalar gedərkən "/" endpoint-inin cavab müddəti
+  python benchmark.py yenileme     # Chat yükü altında /admin/reload: gecikmə, xətalar, versiyalar, köhnə nüsxənin buraxılması
+  python benchmark.py yukleme      # /video/edit: fayl ölçüsünə görə pik yaddaş, sha256, 500 MB həddində erkən rədd
+  python benchmark.py sohbet       # Uzun söhbətdə hər növbənin gecikməsi: mütləq vs fırlanan mövqe + prefiks keşi
+  python benchmark.py cekiler      # N worker-də torch.load vs mmap (.safetensors): yükləmə vaxtı, RSS və PSS
+  python benchmark.py tokenizator  # Kodlaşdırma/dekodlaşdırma sürəti (MB/san): köhnə dövr vs cədvəl əsaslı
+  python benchmark.py bpe [metn]   # Simvol vs BPE tokenizator: simvol/token və generasiya sürəti (simvol/san)
+  python benchmark.py melumat      # Təlim addımında məlumat gözləmə payı: dövr + stack vs bir toplama + önyükləmə
+  python benchmark.py qarishiq     # CPU-da fp32 vs bf16 autocast (və qradiyent yığımı): itki əyrisi və token/san
+  python benchmark.py davam        # Nəzarət nöqtəsi yazılarkən təlim dövrünün dayanma müddəti (asinxron vs torch.save)
+  python benchmark.py paylanmish [1,2,4]  # DDP (gloo) təlimi: proses sayına görə token/san (CPU nüvələri bölünür)
+  python benchmark.py qiymetlendirme  # Köhnə 2x200 təsadüfi paket vs sabit pəncərələr: vaxt və nəticənin səpələnməsi
+  python benchmark.py telemetriya  # Addım ölçülərinin (JSONL) təlim addımına əlavə etdiyi vaxt (hədəf < 2%)
+  python benchmark.py spekulyativ [esas.pth qaralama.pth]  # Qaralama modeli ilə: qəbul olunan simvol/addım və sürətlənmə
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import torch
+from torch.nn import functional as F
+
+from model import IsmayilModeli, blok_olcusu, kohne_cekileri_uygunlashdir
+from generation import GenerasiyaIsteyi, SecimParametrleri
+from scheduler import ChatPlanlayici
+from tokenizer import BPETokenizator, CharTokenizator
+
+LUGET_OLCUSU = 70  # Standart CharTokenizator lüğətinə yaxın ölçü
+
+
+def _model_hazirla(luget_olcusu=LUGET_OLCUSU, movqe_novu='mutleq'):
+    torch.manual_seed(0)
+    model = IsmayilModeli(luget_olcusu, movqe_novu=movqe_novu)
+    model.eval()
+    return model
+
+
+@torch.no_grad()
+def generasiya_olc(simvol_sayi=200, tekrar=3):
+    """Köhnə (hər addımda tam kontekst) və yeni (KV-kesh) generasiyanı müqayisə edir."""
+    model = _model_hazirla()
+    bashlangic = torch.zeros((1, 1), dtype=torch.long)
+
+    neticeler = {}
+    for ad, kesh_istifade in [("kesh-siz", False), ("KV-kesh", True)]:
+        model.yeni_metn_yarat(bashlangic, 5, kesh_istifade=kesh_istifade)  # Isinma
+        vaxtlar = []
+        for _ in range(tekrar):
+            torch.manual_seed(1234)
+            t0 = time.perf_counter()
+            cixis = model.yeni_metn_yarat(bashlangic, simvol_sayi, kesh_istifade=kesh_istifade)
+            vaxtlar.append(time.perf_counter() - t0)
+        neticeler[ad] = cixis
+        print(f"{ad:>9}: {simvol_sayi / min(vaxtlar):8.1f} simvol/san")
+
+    eyni = torch.equal(neticeler["kesh-siz"], neticeler["KV-kesh"])
+    print(f"Eyni seed ilə nəticələr üst-üstə düşür: {'BƏLİ' if eyni else 'XEYR'}")
+
+
+def _kohne_diqqet(x, bashlar, proyeksiya):
+    """Köhnə DiqqetBashi/ChoxBashliDiqqet hesablamasının funksional surəti (müqayisə üçün)."""
+    B, T, C = x.shape
+    maska = torch.tril(torch.ones(T, T))
+    sonuclar = []
+    for q_w, k_w, v_w in bashlar:
+        q, k, v = x @ q_w.T, x @ k_w.T, x @ v_w.T
+        bali = q @ k.transpose(-2, -1) * C**-0.5
+        bali = F.softmax(bali.masked_fill(maska == 0, float('-inf')), dim=-1)
+        sonuclar.append(bali @ v)
+    return proyeksiya(torch.cat(sonuclar, dim=-1))
+
+
+def _vaxt_olc(funksiya, tekrar):
+    funksiya()  # Isinma
+    t0 = time.perf_counter()
+    for _ in range(tekrar):
+        funksiya()
+    return (time.perf_counter() - t0) / tekrar * 1000
+
+
+@torch.no_grad()
+def diqqet_olc(tekrar=50):
+    """Birləşdirilmiş diqqətin gecikməsini və köhnə checkpoint-lərlə uyğunluğunu yoxlayır."""
+    model = _model_hazirla()
+    diqqet = model.bloklar[0].diqqet
+    C = diqqet.proyeksiya.in_features
+
+    # Köhnə formatda (ayrı başlıqlar) təsadüfi çəkilər yaradıb adapterlə yükləyirik
+    bashlar = [tuple(torch.randn(diqqet.bash_olcusu, C) * 0.05 for _ in range(3)) for _ in range(diqqet.bash_sayi)]
+    kohne_ceki = {}
+    for i, (q_w, k_w, v_w) in enumerate(bashlar):
+        kohne_ceki[f"bloklar.0.diqqet.bashlar.{i}.sorgular.weight"] = q_w
+        kohne_ceki[f"bloklar.0.diqqet.bashlar.{i}.acharlar.weight"] = k_w
+        kohne_ceki[f"bloklar.0.diqqet.bashlar.{i}.deyerler.weight"] = v_w
+        kohne_ceki[f"bloklar.0.diqqet.bashlar.{i}.maska"] = torch.tril(torch.ones(blok_olcusu, blok_olcusu))
+    diqqet.qkv.weight.copy_(kohne_cekileri_uygunlashdir(kohne_ceki)["bloklar.0.diqqet.qkv.weight"])
+
+    for paket in [1, 32]:
+        x = torch.randn(paket, blok_olcusu, C)
+        ferq = (diqqet(x) - _kohne_diqqet(x, bashlar, diqqet.proyeksiya)).abs().max().item()
+        kohne_ms = _vaxt_olc(lambda: _kohne_diqqet(x, bashlar, diqqet.proyeksiya), tekrar)
+        yeni_ms = _vaxt_olc(lambda: diqqet(x), tekrar)
+        indeksler = torch.randint(LUGET_OLCUSU, (paket, blok_olcusu))
+        model_ms = _vaxt_olc(lambda: model(indeksler), tekrar)
+        print(f"Paket {paket:>2}: diqqət qatı köhnə {kohne_ms:7.3f} ms, birləşdirilmiş {yeni_ms:7.3f} ms "
+              f"(maks. fərq {ferq:.2e}); tam model forward {model_ms:7.3f} ms")
+
+
+def _planlayicini_olc(planlayici, musteri_sayi, sorgu_sayi, simvol_sayi):
+    """Hər müştəri ardıcıl sorgu_sayi sorğu göndərir; ümumi sürət və gecikmələri qaytarır."""
+    gecikmeler = []
+    kilid = threading.Lock()
+
+    def musteri(nomre):
+        for i in range(sorgu_sayi):
+            bitdi = threading.Event()
+            istek = GenerasiyaIsteyi(
+                [1, 2, 3], SecimParametrleri(toxum=nomre * 1000 + i), simvol_sayi, [],
+                lambda hadise, deyer: bitdi.set() if hadise in ("son", "xeta") else None,
+            )
+            t0 = time.perf_counter()
+            planlayici.gonder(istek)
+            bitdi.wait()
+            with kilid:
+                gecikmeler.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    threadler = [threading.Thread(target=musteri, args=(n,)) for n in range(musteri_sayi)]
+    for t in threadler:
+        t.start()
+    for t in threadler:
+        t.join()
+    muddet = time.perf_counter() - t0
+    gecikmeler.sort()
+    p99 = gecikmeler[min(len(gecikmeler) - 1, int(0.99 * len(gecikmeler)))]
+    return musteri_sayi * sorgu_sayi * simvol_sayi / muddet, statistics.median(gecikmeler), p99
+
+
+def planlayici_olc(simvol_sayi=100, sorgu_sayi=4):
+    """Paket ölçüsü 1 (hər sorğu ayrıca) ilə davamlı paketləməni müqayisə edir."""
+    tokenizator = CharTokenizator()
+    model = _model_hazirla(tokenizator.luget_olcusu)
+    for musteri_sayi in [1, 8, 64]:
+        for ad, maks_paket in [("paket=1", 1), ("davamlı", 64)]:
+            planlayici = ChatPlanlayici(model, tokenizator, maks_paket=maks_paket, maks_gozleme=0.005)
+            planlayici.bashlat()
+            suret, p50, p99 = _planlayicini_olc(planlayici, musteri_sayi, sorgu_sayi, simvol_sayi)
+            planlayici.dayandir()
+            print(f"{musteri_sayi:>2} müştəri, {ad:>8}: {suret:8.1f} simvol/san, "
+                  f"p50 {p50 * 1000:8.1f} ms, p99 {p99 * 1000:8.1f} ms")
+
+
+def axin_olc(simvol_sayi=100, tekrar=10):
+    """Planlayıcıdan ilk mətn parçasının nə vaxt gəldiyini (TTFT) və tam cavab vaxtını ölçür."""
+    tokenizator = CharTokenizator()
+    model = _model_hazirla(tokenizator.luget_olcusu)
+    planlayici = ChatPlanlayici(model, tokenizator, maks_paket=8, maks_gozleme=0.0)
+    planlayici.bashlat()
+    ilk_parcalar, tamlar = [], []
+    for i in range(tekrar):
+        ilk_parca, bitdi = threading.Event(), threading.Event()
+
+        def geri_cagiris(hadise, deyer):
+            if hadise == "hisse":
+                ilk_parca.set()
+            elif hadise in ("son", "xeta"):
+                bitdi.set()
+
+        t0 = time.perf_counter()
+        planlayici.gonder(GenerasiyaIsteyi([1, 2, 3], SecimParametrleri(toxum=i), simvol_sayi, [], geri_cagiris))
+        ilk_parca.wait()
+        ilk_parcalar.append(time.perf_counter() - t0)
+        bitdi.wait()
+        tamlar.append(time.perf_counter() - t0)
+    planlayici.dayandir()
+    print(f"İlk parçaya qədər (TTFT): median {statistics.median(ilk_parcalar) * 1000:7.2f} ms")
+    print(f"Tam cavab ({simvol_sayi} simvol): median {statistics.median(tamlar) * 1000:7.2f} ms")
+
+
+def cavabdehlik_olc(paralel_generasiya=8, simvol_sayi=1000):
+    """
+    Bir neçə uzun chat generasiyası gedərkən "/" sağlamlıq yoxlamasının nə qədər tez cavab verdiyini ölçür.
+    Server HTTP olmadan, httpx-in ASGI transportu ilə eyni prosesdə çağırılır.
+    """
+    import httpx
+    import main
+
+    tokenizator = CharTokenizator()
+    model = _model_hazirla(tokenizator.luget_olcusu)
+    planlayici = ChatPlanlayici(model, tokenizator, maks_paket=paralel_generasiya)
+    planlayici.bashlat()
+    main.model_reyestri.deyishdir(main.ModelNusxesi("olcme", tokenizator, model, planlayici))
+    main._hazirliq.set()  # Lifespan işə düşmədiyi üçün hazırlığı əl ilə qeyd edirik
+
+    async def olc():
+        transport = httpx.ASGITransport(app=main.ismayil_server)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as musteri:
+            istek = {"messages": [{"role": "user", "content": "salam"}], "max_tokens": simvol_sayi, "stop": []}
+            generasiyalar = [asyncio.create_task(musteri.post("/v1/chat/completions", json=istek))
+                             for _ in range(paralel_generasiya)]
+            await asyncio.sleep(0.2)  # Generasiyalar başlasın
+            gecikmeler = []
+            while not all(g.done() for g in generasiyalar) and len(gecikmeler) < 200:
+                t0 = time.perf_counter()
+                await musteri.get("/")
+                gecikmeler.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.01)
+            await asyncio.gather(*generasiyalar)
+        return gecikmeler
+
+    gecikmeler = sorted(asyncio.run(olc()))
+    main.model_reyestri.aktiv.kohnelt()
+    p99 = gecikmeler[min(len(gecikmeler) - 1, int(0.99 * len(gecikmeler)))]
+    print(f"{paralel_generasiya} generasiya zamanı '/' gecikməsi: median {statistics.median(gecikmeler) * 1000:.2f} ms, "
+          f"p99 {p99 * 1000:.2f} ms, maks {gecikmeler[-1] * 1000:.2f} ms ({len(gecikmeler)} ölçmə)")
+
+
+def yenileme_olc(paralel_musteri=4, simvol_sayi=100, muddet=3.0):
+    """
+    Chat sorğuları dayanmadan gedərkən yeni versiya dərc edilib /admin/reload çağırılır.
+    Yeniləmədən əvvəl, yeniləmə zamanı və sonra sorğu gecikməsi, xəta sayı, cavablardakı versiyalar
+    və köhnə nüsxənin son sorğusundan sonra bağlanıb-bağlanmadığı ölçülür.
+    """
+    import httpx
+    import main
+    from model import cekileri_saxla
+    from model_registry import versiyani_derc_et
+
+    muddet = float(muddet)
+    with tempfile.TemporaryDirectory() as qovluq:
+        tokenizator = CharTokenizator()
+        tokenizator_yolu = os.path.join(qovluq, "tokenizer.json")
+        tokenizator.yadda_saxla(tokenizator_yolu)
+        cekiler = {}
+        for toxum, versiya in enumerate(["v1", "v2"]):
+            os.makedirs(os.path.join(qovluq, versiya))
+            cekiler[versiya] = os.path.join(qovluq, versiya, "ismayil_model.pth")
+            torch.manual_seed(toxum)
+            cekileri_saxla(IsmayilModeli(tokenizator.luget_olcusu), cekiler[versiya])
+        main.MODEL_QOVLUGU = os.path.join(qovluq, "models")
+        main.ADMIN_TOKENI = "olcme"
+        versiyani_derc_et(cekiler["v1"], tokenizator_yolu, main.MODEL_QOVLUGU, "v1")
+        main.ai_ni_bashlat()
+        main._hazirliq.set()  # Lifespan işə düşmədiyi üçün hazırlığı əl ilə qeyd edirik
+        kohne = main.model_reyestri.aktiv
+
+        async def olc():
+            transport = httpx.ASGITransport(app=main.ismayil_server)
+            neticeler = []  # (başlanğıc, gecikmə, status, versiya)
+            dayan = asyncio.Event()
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as musteri:
+                async def trafik():
+                    # Seed-siz sorğular keşə düşmür — hər sorğu modelin özündən keçir
+                    istek = {"messages": [{"role": "user", "content": "salam"}], "max_tokens": simvol_sayi, "stop": []}
+                    while not dayan.is_set():
+                        t0 = time.perf_counter()
+                        cavab = await musteri.post("/v1/chat/completions", json=istek)
+                        versiya = cavab.json().get("model_version") if cavab.status_code == 200 else None
+                        neticeler.append((t0, time.perf_counter() - t0, cavab.status_code, versiya))
+
+                trafikler = [asyncio.create_task(trafik()) for _ in range(paralel_musteri)]
+                await asyncio.sleep(muddet)
+                await asyncio.to_thread(versiyani_derc_et, cekiler["v2"], tokenizator_yolu, main.MODEL_QOVLUGU, "v2")
+                yenileme_bashlangici = time.perf_counter()
+                cavab = await musteri.post("/admin/reload", headers={"X-Admin-Token": main.ADMIN_TOKENI})
+                yenileme_sonu = time.perf_counter()
+                await asyncio.sleep(muddet)
+                dayan.set()
+                await asyncio.gather(*trafikler)
+            return neticeler, cavab.json(), yenileme_bashlangici, yenileme_sonu
+
+        neticeler, yenileme, bashlangic, son = asyncio.run(olc())
+        print(f"/admin/reload: {yenileme} ({(son - bashlangic) * 1000:.0f} ms)")
+        for ad, secim in [("əvvəl", lambda t: t < bashlangic), ("yeniləmə zamanı", lambda t: bashlangic <= t < son),
+                          ("sonra", lambda t: t >= son)]:
+            hisse = [n for n in neticeler if secim(n[0])]
+            if not hisse:
+                print(f"{ad:>16}: sorğu yoxdur")
+                continue
+            gecikmeler = sorted(n[1] for n in hisse)
+            p99 = gecikmeler[min(len(gecikmeler) - 1, int(0.99 * len(gecikmeler)))]
+            versiyalar = {v: sum(1 for n in hisse if n[3] == v) for v in sorted({n[3] for n in hisse}, key=str)}
+            print(f"{ad:>16}: {len(hisse):4d} sorğu, median {statistics.median(gecikmeler) * 1000:7.1f} ms, "
+                  f"p99 {p99 * 1000:7.1f} ms, xəta {sum(1 for n in hisse if n[2] != 200)}, versiyalar {versiyalar}")
+        print(f"Köhnə nüsxə (v1) bağlanıb və yaddaşı buraxılıb: {'BƏLİ' if kohne.baglanib else 'XEYR'}")
+        main.model_reyestri.aktiv.kohnelt()
+
+
+def yukleme_olc(olculer_mb="16,64,256", limitden_boyuk_mb=None):
+    """
+    /video/edit yükləməsinin pik yaddaş artımı (VmHWM, Linux) fayl ölçüsündən asılı olmamalıdır.
+    Həmçinin yolda hesablanan sha256-nın düzgünlüyü və həddən (ISMAYIL_MAKS_VIDEO_MB) böyük faylın nə qədər
+    oxunduqdan sonra rədd edildiyi (Content-Length ilə və onsuz) ölçülür.
+    """
+    import hashlib
+    import httpx
+    import main
+
+    def rss(sahe):
+        with open("/proc/self/status") as f:
+            return next(int(setir.split()[1]) * 1024 for setir in f if setir.startswith(sahe + ":"))
+
+    # Kaggle-a real iş göndərilməsin — yalnız yükləmə ölçülür
+    main.is_gondər = lambda *args, **kwargs: None
+    sinir = "ismayilolcme"
+    parca_olcusu = 1 << 20
+    mb = 1024 * 1024
+    limitden_boyuk_mb = int(limitden_boyuk_mb or main.MAKS_VIDEO_OLCUSU // mb + 100)
+
+    def govde(olcu, oxunan):
+        async def axin():
+            yield (f'--{sinir}\r\nContent-Disposition: form-data; name="video"; filename="video.mp4"\r\n'
+                   f'Content-Type: video/mp4\r\n\r\n').encode()
+            blok = bytes(range(256)) * (parca_olcusu // 256)
+            qalan = olcu
+            while qalan > 0:
+                parca = blok[:qalan] if qalan < parca_olcusu else blok
+                oxunan[0] += len(parca)
+                yield parca
+                qalan -= len(parca)
+            yield (f'\r\n--{sinir}\r\nContent-Disposition: form-data; name="prompt"\r\n\r\n'
+                   f'oil painting style\r\n--{sinir}--\r\n').encode()
+        return axin()
+
+    def gozlenilen_hash(olcu):
+        hesh, blok = hashlib.sha256(), bytes(range(256)) * (parca_olcusu // 256)
+        for bashlangic in range(0, olcu, parca_olcusu):
+            hesh.update(blok[:olcu - bashlangic])
+        return hesh.hexdigest()
+
+    async def gonder(olcu, uzunluq_basligi=False):
+        oxunan = [0]
+        basliqlar = {"Content-Type": f"multipart/form-data; boundary={sinir}"}
+        if uzunluq_basligi:
+            basliqlar["Content-Length"] = str(olcu + 1024)
+        transport = httpx.ASGITransport(app=main.ismayil_server)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as musteri:
+            cavab = await musteri.post("/video/edit", content=govde(olcu, oxunan), headers=basliqlar)
+        return cavab, oxunan[0]
+
+    evvelki_qovluq = os.getcwd()
+    with tempfile.TemporaryDirectory() as qovluq:
+        os.chdir(qovluq)
+        try:
+            for olcu_mb in [int(m) for m in str(olculer_mb).split(",")]:
+                olcu = olcu_mb * mb
+                # Pik RSS-i (VmHWM) sıfırlayırıq — ölçmə yalnız bu yükləmənin pikini görsün
+                with open("/proc/self/clear_refs", "w") as f:
+                    f.write("5")
+                evvel = rss("VmRSS")
+                t0 = time.perf_counter()
+                cavab, _ = asyncio.run(gonder(olcu))
+                vaxt = time.perf_counter() - t0
+                pik = rss("VmHWM") - evvel
+                netice = cavab.json()
+                hash_duzgun = netice.get("sha256") == gozlenilen_hash(olcu)
+                print(f"{olcu_mb:>5} MB: status {cavab.status_code}, pik RSS artımı {pik / mb:6.2f} MB "
+                      f"({pik / olcu:6.2%} fayl ölçüsündən), {olcu_mb / vaxt:7.1f} MB/san, "
+                      f"sha256 düzgün: {'BƏLİ' if hash_duzgun else 'XEYR'}")
+            for uzunluq_basligi in (False, True):
+                cavab, oxunan = asyncio.run(gonder(limitden_boyuk_mb * mb, uzunluq_basligi))
+                ad = "Content-Length ilə" if uzunluq_basligi else "Content-Length-siz (chunked)"
+                print(f"{limitden_boyuk_mb} MB, {ad}: status {cavab.status_code}, "
+                      f"rədd edilənə qədər göndərilən {oxunan / mb:.0f} MB")
+            qalan = list(Path("video_jobs").iterdir()) if Path("video_jobs").exists() else []
+            print(f"İş qovluqları: {len(qalan)} (yalnız qəbul edilən {len(str(olculer_mb).split(','))} yükləmə qalmalıdır)")
+        finally:
+            os.chdir(evvelki_qovluq)
+
+
+def sohbet_olc(novbe_sayi=30, cavab_simvol=40):
+    """
+    Bir söhbəti növbə-növbə uzadır (hər növbədə bütün tarixçə ChatIsteyi.tarixce() ilə, /v1/chat/completions
+    kimi göndərilir) və hər növbənin gecikməsini ölçür.
+    Prefiks keşi ilə fırlanan mövqeli modeldə gecikmə söhbət uzandıqca sabit qalmalıdır.
+    """
+    from main import ChatIsteyi
+
+    novbe_sayi, cavab_simvol = int(novbe_sayi), int(cavab_simvol)
+    tokenizator = CharTokenizator()
+    sual = "Salam, bu gun hava necedir? Bir az danisaq."
+    varyantlar = [
+        ("mütləq", 'mutleq', 64),
+        ("fırlanan, keş-siz", 'firlanma', 0),
+        ("fırlanan + prefiks", 'firlanma', 64),
+    ]
+    for ad, movqe_novu, prefiks_keshi in varyantlar:
+        model = _model_hazirla(tokenizator.luget_olcusu, movqe_novu)
+        planlayici = ChatPlanlayici(model, tokenizator, maks_paket=4, maks_gozleme=0.0,
+                                    kontekst_budcesi=4096, prefiks_keshi_olcusu=prefiks_keshi)
+        planlayici.bashlat()
+        mesajlar, gecikmeler = [], []
+        for novbe in range(novbe_sayi):
+            mesajlar.append({"role": "user", "content": sual})
+            istek = ChatIsteyi(messages=mesajlar, max_tokens=cavab_simvol, seed=novbe)
+            tarixce = tokenizator.kodlasdir(istek.tarixce())
+            cavab, bitdi = [], threading.Event()
+
+            def geri_cagiris(hadise, deyer):
+                if hadise == "hisse":
+                    cavab.append(deyer)
+                elif hadise in ("son", "xeta"):
+                    bitdi.set()
+
+            t0 = time.perf_counter()
+            planlayici.gonder(GenerasiyaIsteyi(tarixce, istek.secim_parametrleri(), cavab_simvol,
+                                               istek.dayanmalar(), geri_cagiris))
+            bitdi.wait()
+            gecikmeler.append(time.perf_counter() - t0)
+            mesajlar.append({"role": "assistant", "content": "".join(cavab)})
+        planlayici.dayandir()
+        keshi = planlayici.prefiks_keshi
+        isabet = f", prefiks keşi isabəti {keshi.isabet}/{keshi.isabet + keshi.qacirma}" if keshi is not None else ""
+        secilmish = sorted({0, 4, 9, 19, novbe_sayi - 1})
+        print(f"{ad:>19}: " + ", ".join(f"növbə {i + 1}: {gecikmeler[i] * 1000:6.1f} ms" for i in secilmish if i < novbe_sayi)
+              + f" (son kontekst {len(tarixce)} simvol{isabet})")
+
+
+# Worker prosesi: torch-u import edir, çəkiləri yükləyir, bir forward edir (bütün səhifələrə toxunur),
+# sonra valideyn siqnal verənə qədər gözləyir ki, bütün worker-lər eyni anda yaddaşda olsun
+_WORKER_KODU = r'''
+import json, sys, time, torch
+
+def yaddash():
+    # RssAnon — prosesin şəxsi yaddaşı, Pss — paylaşılan səhifələr prosesləri arasında bölünmüş yaddaş
+    netice = {}
+    with open("/proc/self/status") as f:
+        for setir in f:
+            if setir.startswith(("VmRSS", "RssAnon", "RssFile")):
+                ad, deyer = setir.split(":")
+                netice[ad] = int(deyer.split()[0])
+    with open("/proc/self/smaps_rollup") as f:
+        for setir in f:
+            if setir.startswith("Pss:"):
+                netice["Pss"] = int(setir.split()[1])
+    return netice
+
+usul, yol, luget_olcusu = sys.argv[1], sys.argv[2], int(sys.argv[3])
+evvel = yaddash()
+t0 = time.perf_counter()
+if usul == "torch.load":
+    from model import IsmayilModeli
+    model = IsmayilModeli(luget_olcusu)
+    model.load_state_dict(torch.load(yol, map_location="cpu"))
+else:
+    from weight_format import modeli_yukle
+    model = modeli_yukle(yol, luget_olcusu)
+yuklenme = time.perf_counter() - t0
+with torch.no_grad():
+    model.eval()(torch.zeros((1, 8), dtype=torch.long))
+print("hazir", flush=True)
+sys.stdin.readline()
+sonra = yaddash()
+print(json.dumps({"yuklenme": yuklenme, **{a: sonra[a] - evvel.get(a, 0) for a in sonra}, "Pss_cem": sonra["Pss"]}), flush=True)
+'''
+
+
+def cekiler_olc(worker_sayi=4):
+    """
+    worker_sayi proses eyni çəkiləri torch.load və mmap ilə yükləyir. Hər worker üçün yükləmə vaxtı,
+    şəxsi (RssAnon), fayl (RssFile) və proporsional (Pss) yaddaş artımı ölçülür.
+    """
+    from weight_format import pth_den_cevir
+
+    tokenizator = CharTokenizator()
+    with tempfile.TemporaryDirectory() as qovluq:
+        pth_yolu = os.path.join(qovluq, "model.pth")
+        st_yolu = os.path.join(qovluq, "model.safetensors")
+        torch.save(_model_hazirla(tokenizator.luget_olcusu).state_dict(), pth_yolu)
+        pth_den_cevir(pth_yolu, st_yolu)
+        kok = os.path.dirname(os.path.abspath(__file__))
+        for usul, yol in [("torch.load", pth_yolu), ("mmap", st_yolu)]:
+            prosesler = [subprocess.Popen([sys.executable, "-c", _WORKER_KODU, usul, yol, str(tokenizator.luget_olcusu)],
+                                          cwd=kok, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                         for _ in range(worker_sayi)]
+            for p in prosesler:
+                p.stdout.readline() # "hazir"
+            for p in prosesler:
+                p.stdin.write("\n")
+                p.stdin.flush()
+            neticeler = [json.loads(p.stdout.readline()) for p in prosesler]
+            for p in prosesler:
+                p.wait()
+            orta = lambda a: statistics.mean(n[a] for n in neticeler)
+            print(f"{usul:>10} ({worker_sayi} worker): yükləmə {orta('yuklenme') * 1000:7.2f} ms, "
+                  f"worker başına RssAnon +{orta('RssAnon') / 1024:6.2f} MB, RssFile +{orta('RssFile') / 1024:6.2f} MB, "
+                  f"Pss +{orta('Pss') / 1024:6.2f} MB (cəmi Pss {sum(n['Pss_cem'] for n in neticeler) / 1024:.0f} MB)")
+
+
+def tokenizator_olc(mb=32, tekrar=3):
+    """Köhnə (hər simvol üçün lüğət axtarışı) və yeni (toplu cədvəl) kodlaşdırmanın sürətini ölçür."""
+    tokenizator = CharTokenizator()
+    numune = "Salam dünya! The quick brown fox jumps over the lazy dog 0123456789.\n"
+    metn = (numune * (mb * 1024 * 1024 // len(numune) + 1))[:mb * 1024 * 1024]
+    ascii_metn = metn.encode('ascii', 'ignore').decode('ascii')
+    metnler = [metn[i:i + 4096] for i in range(0, len(metn), 4096)]
+    idler = tokenizator.kodlasdir_massiv(metn)
+    id_siyahilari = tokenizator.kodlasdir_paket(metnler)
+
+    def olc(ad, funksiya, olcu):
+        vaxtlar = []
+        for _ in range(tekrar):
+            t0 = time.perf_counter()
+            funksiya()
+            vaxtlar.append(time.perf_counter() - t0)
+        vaxt = min(vaxtlar)
+        print(f"{ad:>32}: {olcu / 1024 / 1024 / vaxt:8.1f} MB/san")
+
+    luget = tokenizator.simvoldan_reqeme
+    olc("köhnə kodlasdir (dövr)", lambda: [luget[c] for c in metn if c in luget], len(metn))
+    olc("kodlasdir (siyahı)", lambda: tokenizator.kodlasdir(metn), len(metn))
+    olc("str.translate (numpy-suz yol)", lambda: list(memoryview(metn.translate(tokenizator._tercume)
+                                                                .encode('utf-32-le')).cast('I')), len(metn))
+    olc("kodlasdir_massiv (UTF-32)", lambda: tokenizator.kodlasdir_massiv(metn), len(metn))
+    olc("kodlasdir_massiv (ASCII)", lambda: tokenizator.kodlasdir_massiv(ascii_metn), len(ascii_metn))
+    olc("kodlasdir_paket (4 KB mətnlər)", lambda: tokenizator.kodlasdir_paket(metnler), len(metn))
+    olc("köhnə de_kodlasdir (dövr)", lambda: ''.join([tokenizator.reqemden_simvola[i] for i in idler.tolist()]), len(idler))
+    olc("de_kodlasdir (massiv)", lambda: tokenizator.de_kodlasdir(idler), len(idler))
+    olc("de_kodlasdir_paket", lambda: tokenizator.de_kodlasdir_paket(id_siyahilari), len(idler))
+
+
+_AZERBAYCAN_NUMUNESI = (
+    "Azərbaycan Respublikası Cənubi Qafqazda yerləşən dövlətdir. Paytaxtı Bakı şəhəridir. "
+    "Ölkənin şimalında Böyük Qafqaz dağları, şərqində isə Xəzər dənizi yerləşir. "
+    "Azərbaycan dili türk dilləri ailəsinin oğuz qrupuna daxildir və latın əlifbası ilə yazılır. "
+    "Salam, necəsən? Mən yaxşıyam, çox sağ ol. Bu gün hava çox gözəldir, şəhərdə gəzməyə çıxaq.\n"
+)
+
+
+@torch.no_grad()
+def bpe_olc(yol=None, luget_olcusu=512, simvol_sayi=200):
+    """
+    Simvol və BPE tokenizatorlarını müqayisə edir: bir tokenin orta neçə simvol olduğu və
+    eyni ölçülü modeldə saniyədə neçə simvol generasya edildiyi (hər token bir forward ötürməsidir).
+    Mətn verilməyibsə, daxili Azərbaycan nümunəsindən istifadə olunur.
+    """
+    if yol:
+        with open(yol, 'r', encoding='utf-8') as f:
+            metn = f.read()
+    else:
+        metn = _AZERBAYCAN_NUMUNESI * 50
+    bolme = int(0.9 * len(metn))
+    oyretme, yoxlama = metn[:bolme], metn[bolme:] or metn
+    tokenizatorlar = [
+        ("standart simvol", CharTokenizator()),
+        ("korpus simvolu", CharTokenizator(oyretme)),
+        (f"BPE ({luget_olcusu})", BPETokenizator(oyretme, luget_olcusu=luget_olcusu)),
+    ]
+    for ad, tokenizator in tokenizatorlar:
+        idler = tokenizator.kodlasdir(yoxlama)
+        itki = 1 - len(tokenizator.de_kodlasdir(idler)) / len(yoxlama) # Atılmış (lüğətdən kənar) simvollar
+        simvol_per_token = len(tokenizator.de_kodlasdir(idler)) / max(1, len(idler))
+        model = _model_hazirla(tokenizator.luget_olcusu)
+        bashlangic = torch.zeros((1, 1), dtype=torch.long)
+        model.yeni_metn_yarat(bashlangic, 8)  # Isinma
+        t0 = time.perf_counter()
+        model.yeni_metn_yarat(bashlangic, simvol_sayi)
+        token_suret = simvol_sayi / (time.perf_counter() - t0)
+        print(f"{ad:>16}: lüğət {tokenizator.luget_olcusu:5d}, {simvol_per_token:5.2f} simvol/token, "
+              f"atılan simvollar {itki * 100:5.1f}%, {token_suret:8.1f} token/san = "
+              f"{token_suret * simvol_per_token:8.1f} simvol/san")
+
+
+def melumat_olc(addim_sayi=100, paket_olcusu=32, derinlik=4):
+    """
+    Təlim addımının neçə faizinin paket hazırlığını gözləməklə keçdiyini ölçür:
+    əvvəlki paket_getir (hər pəncərə üçün dilim + np.stack, sinxron), bir indeks toplaması (sinxron)
+    və bir toplama + arxa thread-də önyükləmə. Korpus müvəqqəti .bin parçalarına yazılır.
+    """
+    import numpy as np
+    from prepare_data import OncedenYukleyici, ParcaliMelumat, melumati_hazirla
+
+    addim_sayi, paket_olcusu, derinlik = int(addim_sayi), int(paket_olcusu), int(derinlik)
+    with tempfile.TemporaryDirectory() as qovluq:
+        yol = os.path.join(qovluq, 'korpus.txt')
+        with open(yol, 'w', encoding='utf-8') as f:
+            f.write(_AZERBAYCAN_NUMUNESI * 20000)
+        melumat = ParcaliMelumat(melumati_hazirla([yol], qovluq, parca_olcusu=1 << 20))
+        hedd = melumat.simvol_sayi('train') - blok_olcusu
+
+        def dovr_ile(nomre):
+            bashlangiclar = torch.randint(hedd, (paket_olcusu,))
+            return torch.from_numpy(np.stack([melumat.pencere('train', int(i), blok_olcusu + 1) for i in bashlangiclar]))
+
+        def toplama_ile(nomre):
+            bashlangiclar = np.random.default_rng((0, nomre)).integers(0, hedd, paket_olcusu)
+            return torch.from_numpy(melumat.paket('train', bashlangiclar, blok_olcusu + 1))
+
+        for ad, hazirla, d in [("dövr + stack, sinxron", dovr_ile, 0), ("bir toplama, sinxron", toplama_ile, 0),
+                               (f"bir toplama + önyükləmə ({derinlik})", toplama_ile, derinlik)]:
+            model = _model_hazirla(melumat.luget_olcusu).train()
+            optimallashdirici = torch.optim.AdamW(model.parameters(), lr=1e-3)
+            yukleyici = OncedenYukleyici(hazirla, derinlik=d)
+            gozleme = cem = 0.0
+            for addim in range(addim_sayi + 5):
+                t0 = time.perf_counter()
+                pencereler = next(yukleyici)
+                t1 = time.perf_counter()
+                _, itki = model(pencereler[:, :-1], pencereler[:, 1:])
+                optimallashdirici.zero_grad(set_to_none=True)
+                itki.backward()
+                optimallashdirici.step()
+                if addim >= 5: # İlk addımlar isinmadır
+                    gozleme += t1 - t0
+                    cem += time.perf_counter() - t0
+            yukleyici.bagla()
+            print(f"{ad:>32}: addım {cem / addim_sayi * 1000:7.2f} ms, "
+                  f"məlumat gözləmə {gozleme / addim_sayi * 1000:6.3f} ms ({gozleme / cem:5.1%})")
+
+
+def qarishiq_olc(addim_sayi=300, paket_olcusu=32, kompilyasiya=0):
+    """
+    train.py-nin sürətli rejimini CPU-da yoxlayır: eyni toxum və eyni paketlərlə fp32, bf16 autocast
+    və bf16 + qradiyent yığımı (yarım paket x 2) öyrədilir. Yığılma fp32-dəkinə yaxın olmalıdır.
+    """
+    import contextlib
+    import numpy as np
+    from prepare_data import ParcaliMelumat, melumati_hazirla
+
+    addim_sayi, paket_olcusu, kompilyasiya = int(addim_sayi), int(paket_olcusu), bool(int(kompilyasiya))
+    with tempfile.TemporaryDirectory() as qovluq:
+        yol = os.path.join(qovluq, 'korpus.txt')
+        with open(yol, 'w', encoding='utf-8') as f:
+            f.write(_AZERBAYCAN_NUMUNESI * 2000)
+        melumat = ParcaliMelumat(melumati_hazirla([yol], qovluq))
+
+        def paket(bolme, nomre, olcu):
+            rng = np.random.default_rng((0, nomre))
+            bashlangiclar = rng.integers(0, melumat.simvol_sayi(bolme) - blok_olcusu, olcu)
+            pencereler = torch.from_numpy(melumat.paket(bolme, bashlangiclar, blok_olcusu + 1))
+            return pencereler[:, :-1], pencereler[:, 1:]
+
+        yoxlama = [paket('val', 10**6 + i, 64) for i in range(8)]
+        rejimler = [("fp32", contextlib.nullcontext, 1), ("bf16", None, 1), ("bf16 + yığım x2", None, 2)]
+        for ad, avtomatik_tip, yigim in rejimler:
+            if avtomatik_tip is None:
+                avtomatik_tip = lambda: torch.autocast(device_type='cpu', dtype=torch.bfloat16)
+            model = _model_hazirla(melumat.luget_olcusu).train()
+            ishci = torch.compile(model) if kompilyasiya else model
+            optimallashdirici = torch.optim.AdamW(model.parameters(), lr=1e-3)
+            mikro = paket_olcusu // yigim
+            egri, vaxt = [], 0.0
+            for addim in range(addim_sayi):
+                t0 = time.perf_counter()
+                optimallashdirici.zero_grad(set_to_none=True)
+                # Eyni paket yığımda hissələrə bölünür — bütün rejimlər eyni məlumatı görür
+                x, y = paket('train', addim, paket_olcusu)
+                for j in range(yigim):
+                    with avtomatik_tip():
+                        _, itki = ishci(x[j * mikro:(j + 1) * mikro], y[j * mikro:(j + 1) * mikro])
+                    (itki / yigim).backward()
+                optimallashdirici.step()
+                vaxt += time.perf_counter() - t0
+                if (addim + 1) % (addim_sayi // 5) == 0:
+                    model.eval()
+                    with torch.no_grad():
+                        egri.append(statistics.mean(model(xv, yv)[1].item() for xv, yv in yoxlama))
+                    model.train()
+            print(f"{ad:>16}: yoxlama itkisi {' -> '.join(f'{i:.3f}' for i in egri)}, "
+                  f"{addim_sayi * paket_olcusu * blok_olcusu / vaxt:8.0f} token/san")
+
+
+def davam_olc(addim_sayi=40, paket_olcusu=16):
+    """
+    Nəzarət nöqtəsi yazılarkən təlim dövrünün dayanmasını ölçür: CPU surəti + növbəyə qoyma (asinxron yazıcı)
+    vs sinxron torch.save. Davamın bit-bit eyniliyi tests/test_checkpoint.py-də yoxlanılır.
+    """
+    import numpy as np
+    from checkpoint import NezaretNoqtesiYazici, veziyyeti_gotur
+    from prepare_data import ParcaliMelumat, melumati_hazirla
+
+    addim_sayi, paket_olcusu = int(addim_sayi), int(paket_olcusu)
+    with tempfile.TemporaryDirectory() as qovluq:
+        yol = os.path.join(qovluq, 'korpus.txt')
+        with open(yol, 'w', encoding='utf-8') as f:
+            f.write(_AZERBAYCAN_NUMUNESI * 500)
+        melumat = ParcaliMelumat(melumati_hazirla([yol], qovluq))
+
+        def paket(nomre):
+            bashlangiclar = np.random.default_rng((0, nomre)).integers(0, melumat.simvol_sayi('train') - blok_olcusu,
+                                                                       paket_olcusu)
+            pencereler = torch.from_numpy(melumat.paket('train', bashlangiclar, blok_olcusu + 1))
+            return pencereler[:, :-1], pencereler[:, 1:]
+
+        def qur(toxum):
+            torch.manual_seed(toxum)
+            model = IsmayilModeli(melumat.luget_olcusu).train() # Dropout aktivdir — RNG də bərpa olunmalıdır
+            return model, torch.optim.AdamW(model.parameters(), lr=1e-3)
+
+        def oyret(model, optimallashdirici, bashlangic, son):
+            for addim in range(bashlangic, son):
+                _, itki = model(*paket(addim))
+                optimallashdirici.zero_grad(set_to_none=True)
+                itki.backward()
+                optimallashdirici.step()
+
+        nezaret_qovlugu = os.path.join(qovluq, 'checkpoints')
+        model, optimallashdirici = qur(0)
+        oyret(model, optimallashdirici, 0, addim_sayi)
+        yazici = NezaretNoqtesiYazici(nezaret_qovlugu, saxla=2)
+        t0 = time.perf_counter()
+        yazici.yaz(veziyyeti_gotur(model, optimallashdirici, addim_sayi, addim_sayi))
+        asinxron = time.perf_counter() - t0
+        yazici.bagla()
+        t0 = time.perf_counter()
+        torch.save({'model': model.state_dict(), 'optimallashdirici': optimallashdirici.state_dict()},
+                   os.path.join(qovluq, 'sinxron.pt'))
+        sinxron = time.perf_counter() - t0
+        print(f"Təlim dövrünün dayanması: CPU surəti + növbə {asinxron * 1000:.2f} ms, "
+              f"sinxron torch.save {sinxron * 1000:.2f} ms")
+
+
+def _paylanmish_ishci(proses_nomresi, proses_sayi, unvan, indeks_yolu, addim_sayi, paket_olcusu, netice_novbesi):
+    import numpy as np
+    import torch.distributed as dist
+    from torch.nn.parallel import DistributedDataParallel
+    from prepare_data import ParcaliMelumat
+
+    # Nüvələr proseslər arasında bölünür — eyni maşında ümumi thread sayı dəyişmir
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // proses_sayi))
+    dist.init_process_group('gloo', init_method=unvan, rank=proses_nomresi, world_size=proses_sayi)
+    melumat = ParcaliMelumat(indeks_yolu)
+    model = DistributedDataParallel(_model_hazirla(melumat.luget_olcusu).train())
+    optimallashdirici = torch.optim.AdamW(model.parameters(), lr=1e-3)
+    hedd = melumat.simvol_sayi('train') - blok_olcusu
+    isinma = 5
+    for addim in range(addim_sayi + isinma):
+        if addim == isinma:
+            dist.barrier()
+            t0 = time.perf_counter()
+        bashlangiclar = np.random.default_rng((0, addim * proses_sayi + proses_nomresi)).integers(0, hedd, paket_olcusu)
+        pencereler = torch.from_numpy(melumat.paket('train', bashlangiclar, blok_olcusu + 1))
+        _, itki = model(pencereler[:, :-1], pencereler[:, 1:])
+        optimallashdirici.zero_grad(set_to_none=True)
+        itki.backward()
+        optimallashdirici.step()
+    itki = itki.detach()
+    dist.all_reduce(itki)
+    vaxt = time.perf_counter() - t0
+    if proses_nomresi == 0:
+        netice_novbesi.put((addim_sayi * paket_olcusu * blok_olcusu * proses_sayi / vaxt, itki.item() / proses_sayi))
+    dist.destroy_process_group()
+
+
+def paylanmish_olc(proses_saylari="1,2,4", addim_sayi=50, paket_olcusu=32):
+    """
+    DistributedDataParallel (gloo) ilə təlimin miqyaslanması: hər proses sayı üçün token/san.
+    Proseslər bir maşında CPU nüvələrini bölüşür; paket ölçüsü proses başınadır (qlobal paket artır).
+    """
+    import socket
+    import torch.multiprocessing as mp
+    from prepare_data import melumati_hazirla
+
+    addim_sayi, paket_olcusu = int(addim_sayi), int(paket_olcusu)
+    with tempfile.TemporaryDirectory() as qovluq:
+        yol = os.path.join(qovluq, 'korpus.txt')
+        with open(yol, 'w', encoding='utf-8') as f:
+            f.write(_AZERBAYCAN_NUMUNESI * 2000)
+        indeks_yolu = melumati_hazirla([yol], qovluq)
+        kontekst = mp.get_context('spawn')
+        netice_novbesi = kontekst.SimpleQueue()
+        esas = None
+        for proses_sayi in (int(n) for n in proses_saylari.split(',')):
+            with socket.socket() as s:
+                s.bind(('127.0.0.1', 0))
+                port = s.getsockname()[1]
+            mp.spawn(_paylanmish_ishci, nprocs=proses_sayi,
+                     args=(proses_sayi, f'tcp://127.0.0.1:{port}', indeks_yolu, addim_sayi, paket_olcusu, netice_novbesi))
+            suret, itki = netice_novbesi.get()
+            esas = esas or suret
+            print(f"{proses_sayi:3d} proses: {suret:10.0f} token/san ({suret / esas:4.2f}x), "
+                  f"thread/proses {max(1, (os.cpu_count() or 1) // proses_sayi)}, son itki {itki:.3f}")
+
+
+@torch.no_grad()
+def qiymetlendirme_olc(tekrar=3, pencere_sayi=512, paket_olcusu=128):
+    """
+    Əvvəlki itkini_təxmin_et (train və val üçün 200-ər təsadüfi 32-lik paket) ilə sabit yoxlama
+    pəncərələrinin böyük paketlərlə qiymətləndirilməsini müqayisə edir: vaxt və təkrarlar arası səpələnmə.
+    """
+    from evaluate import pencereleri_qiymetlendir
+    from prepare_data import ParcaliMelumat, melumati_hazirla
+
+    tekrar, pencere_sayi, paket_olcusu = int(tekrar), int(pencere_sayi), int(paket_olcusu)
+    with tempfile.TemporaryDirectory() as qovluq:
+        yol = os.path.join(qovluq, 'korpus.txt')
+        with open(yol, 'w', encoding='utf-8') as f:
+            f.write(_AZERBAYCAN_NUMUNESI * 2000)
+        melumat = ParcaliMelumat(melumati_hazirla([yol], qovluq))
+        model = _model_hazirla(melumat.luget_olcusu).eval()
+
+        def kohne():
+            itkiler = []
+            for bolme in ('train', 'val'):
+                for _ in range(200):
+                    bashlangiclar = torch.randint(melumat.simvol_sayi(bolme) - blok_olcusu, (32,)).numpy()
+                    pencereler = torch.from_numpy(melumat.paket(bolme, bashlangiclar, blok_olcusu + 1))
+                    itkiler.append(model(pencereler[:, :-1], pencereler[:, 1:])[1].item())
+            return statistics.mean(itkiler[200:])
+
+        sabit = torch.from_numpy(melumat.ardicil_pencereler('val', pencere_sayi, blok_olcusu + 1))
+        for ad, funksiya in [("köhnə (2 x 200 x 32)", kohne),
+                             (f"sabit ({len(sabit)} pəncərə, paket {paket_olcusu})",
+                              lambda: pencereleri_qiymetlendir(model, sabit, paket_olcusu))]:
+            vaxtlar, neticeler = [], []
+            for _ in range(tekrar):
+                t0 = time.perf_counter()
+                neticeler.append(funksiya())
+                vaxtlar.append(time.perf_counter() - t0)
+            print(f"{ad:>36}: {statistics.mean(vaxtlar) * 1000:8.1f} ms, yoxlama itkisi "
+                  f"{statistics.mean(neticeler):.4f} ± {statistics.pstdev(neticeler):.4f}")
+
+
+def telemetriya_olc(addim_sayi=200, paket_olcusu=32, tekrar=3):
+    """
+    Addım ölçülərinin dəyəri: eyni təlim dövrü ölçüsüz və train.py-dəki kimi ölçülərlə
+    (mərhələ nişanları, qradiyent normu, pik RSS, JSONL sətri) işlədilir, orta addım vaxtları müqayisə olunur.
+    """
+    from telemetry import MerheleSaygaci, MetrikYazici, pik_rss_mb
+
+    addim_sayi, paket_olcusu, tekrar = int(addim_sayi), int(paket_olcusu), int(tekrar)
+    luget = LUGET_OLCUSU
+    paketler = [torch.randint(luget, (paket_olcusu, blok_olcusu + 1)) for _ in range(16)]
+
+    def dovr(olcu_ile, yol):
+        model = _model_hazirla(luget).train()
+        optimallashdirici = torch.optim.AdamW(model.parameters(), lr=1e-3)
+        yazici = MetrikYazici(yol) if olcu_ile else None
+        saygac = MerheleSaygaci() if olcu_ile else None
+        t0 = time.perf_counter()
+        for addim in range(addim_sayi):
+            bashlama = time.perf_counter()
+            paket = paketler[addim % len(paketler)]
+            optimallashdirici.zero_grad(set_to_none=True)
+            if saygac:
+                saygac.nisan()
+            _, itki = model(paket[:, :-1], paket[:, 1:])
+            if saygac:
+                saygac.nisan('forward_ms')
+            itki.backward()
+            if saygac:
+                saygac.nisan('backward_ms')
+                norm = torch.nn.utils.get_total_norm([p.grad for p in model.parameters() if p.grad is not None])
+            optimallashdirici.step()
+            if saygac:
+                saygac.nisan('optimizer_ms')
+                muddet = time.perf_counter() - bashlama
+                yazici.yaz({"step": addim, "step_ms": muddet * 1000, "tokens_per_sec": paket.numel() / muddet,
+                            "data_wait_ms": 0.0, **saygac.muddetler(), "loss": itki.item(), "grad_norm": norm.item(),
+                            "lr": optimallashdirici.param_groups[0]['lr'], "peak_rss_mb": pik_rss_mb()})
+        vaxt = time.perf_counter() - t0
+        if yazici:
+            yazici.bagla()
+        return vaxt / addim_sayi
+
+    with tempfile.TemporaryDirectory() as qovluq:
+        yol = os.path.join(qovluq, 'metrics.jsonl')
+        dovr(True, yol) # Isinma
+        olcusuz, olcu_ile = [], []
+        for _ in range(tekrar): # Növbə ilə — maşının yükündəki dəyişmə hər ikisinə eyni təsir etsin
+            olcusuz.append(dovr(False, yol))
+            olcu_ile.append(dovr(True, yol))
+        a, b = min(olcusuz), min(olcu_ile)
+        print(f"ölçüsüz: {a * 1000:.3f} ms/addım, ölçülərlə: {b * 1000:.3f} ms/addım, əlavə vaxt {(b - a) / a:+.2%}")
+
+
+@torch.no_grad()
+def _spekulyativ_vaxt(model, bashlangic, simvol_sayi, parametrler, qaralama=None, teklif_sayi=4, tekrar=3):
+    """Ən yaxşı vaxt, son nəticə və (qaralama ilə) son generasiyanın statistikası."""
+    from sampler import PaketSecici
+    from speculative import spekulyativ_addimlar
+
+    vaxtlar = []
+    for _ in range(tekrar):
+        statistika = {}
+        secici = PaketSecici([parametrler], model.konfiq.luget_olcusu)
+        netice = torch.empty((1, bashlangic.shape[1] + simvol_sayi), dtype=torch.long)
+        netice[:, :bashlangic.shape[1]] = bashlangic
+        t0 = time.perf_counter()
+        if qaralama is None:
+            addimlar = model._addimlar(netice, bashlangic.shape[1], simvol_sayi, True, secici)
+        else:
+            addimlar = spekulyativ_addimlar(model, qaralama, netice, bashlangic.shape[1], simvol_sayi, teklif_sayi,
+                                            secici, statistika)
+        for _ in addimlar:
+            pass
+        vaxtlar.append(time.perf_counter() - t0)
+    return min(vaxtlar), netice, statistika
+
+
+def spekulyativ_olc(esas_yol=None, qaralama_yol=None, teklif_saylari="2,4,6", simvol_sayi=200, budce=60):
+    """
+    Spekulyativ generasiyanı CPU-da ölçür: hər təklif sayı (k) üçün bir yoxlama addımında orta neçə
+    təklifin qəbul olunduğu və adi KV-kesh generasiyasına nisbətən sürətlənmə (greedy və temperatur 1).
+    Çəkilər verilməyibsə, əsas model daxili nümunədə `budce` saniyə öyrədilir, qaralama (1 lay, 64 ölçü)
+    ondan distillə edilir — təsadüfi çəkilərdə qəbul nisbətinin mənası yoxdur.
+    Greedy rejimdə nəticə adi generasiya ilə eyni olmalıdır (kontekst limiti daxilində yoxlanılır).
+    """
+    from distill import distillashdir
+    from model import ModelKonfiqurasiyasi, modeli_yukle_pth
+    from prepare_data import ParcaliMelumat, melumati_hazirla
+    from sweep import budce_ile_oyret
+
+    simvol_sayi, budce = int(simvol_sayi), float(budce)
+    torch.set_num_threads(min(4, torch.get_num_threads()))
+    if esas_yol:
+        model = modeli_yukle_pth(esas_yol)
+        qaralama = modeli_yukle_pth(qaralama_yol) if qaralama_yol else None
+        if qaralama is None:
+            print("Səhv: qaralama modelinin çəkiləri verilməyib (python distill.py)")
+            return
+    else:
+        with tempfile.TemporaryDirectory() as qovluq:
+            yol = os.path.join(qovluq, 'korpus.txt')
+            with open(yol, 'w', encoding='utf-8') as f:
+                f.write(_AZERBAYCAN_NUMUNESI * 2000)
+            melumat = ParcaliMelumat(melumati_hazirla([yol], qovluq))
+            torch.manual_seed(0)
+            model = IsmayilModeli(ModelKonfiqurasiyasi(luget_olcusu=melumat.luget_olcusu))
+            addim = budce_ile_oyret(model, melumat, budce, 32, 0)
+            model.eval()
+            konfiq = ModelKonfiqurasiyasi(luget_olcusu=melumat.luget_olcusu, yerlesdirme_olcusu=64, lay_sayi=1)
+            qaralama = distillashdir(model, melumat, konfiq, 10**9, budce=budce / 2)
+            print(f"Əsas model {addim} addım öyrədildi, qaralama {budce / 2:.0f} san distillə edildi")
+    parametr = lambda m: sum(p.numel() for p in m.parameters())
+    print(f"Əsas model {parametr(model) / 1e6:.2f}M, qaralama {parametr(qaralama) / 1e6:.2f}M parametr")
+
+    bashlangic = torch.zeros((1, 1), dtype=torch.long)
+    for ad, parametrler in [("greedy", SecimParametrleri(temperatur=0)), ("temperatur 1.0", SecimParametrleri(toxum=0))]:
+        adi_vaxt, adi_netice, _ = _spekulyativ_vaxt(model, bashlangic, simvol_sayi, parametrler)
+        print(f"{ad}: adi generasiya {simvol_sayi / adi_vaxt:8.1f} simvol/san")
+        for k in [int(k) for k in str(teklif_saylari).split(",")]:
+            vaxt, netice, statistika = _spekulyativ_vaxt(model, bashlangic, simvol_sayi, parametrler, qaralama, k)
+            qebul = statistika['qebul'] / statistika['addim']
+            setir = (f"  k={k}: {qebul:4.2f} qəbul/addım ({statistika['qebul'] / max(1, statistika['teklif']):5.1%}), "
+                     f"{simvol_sayi / statistika['addim']:5.2f} simvol/əsas ötürmə, "
+                     f"{simvol_sayi / vaxt:8.1f} simvol/san, sürətlənmə {adi_vaxt / vaxt:5.2f}x")
+            if parametrler.temperatur == 0:
+                limit = model.kontekst_limiti or netice.shape[1]
+                eyni = torch.equal(netice[:, :limit], adi_netice[:, :limit])
+                setir += f", adi generasiya ilə eyni: {'BƏLİ' if eyni else 'XEYR'}"
+            print(setir)
+
+
+OLCMELER = {
+    "generasiya": generasiya_olc,
+    "diqqet": diqqet_olc,
+    "planlayici": planlayici_olc,
+    "axin": axin_olc,
+    "cavabdehlik": cavabdehlik_olc,
+    "yenileme": yenileme_olc,
+    "yukleme": yukleme_olc,
+    "sohbet": sohbet_olc,
+    "cekiler": cekiler_olc,
+    "tokenizator": tokenizator_olc,
+    "bpe": bpe_olc,
+    "melumat": melumat_olc,
+    "qarishiq": qarishiq_olc,
+    "davam": davam_olc,
+    "paylanmish": paylanmish_olc,
+    "qiymetlendirme": qiymetlendirme_olc,
+    "telemetriya": telemetriya_olc,
+    "spekulyativ": spekulyativ_olc,
+}
+
+if __name__ == "__main__":
+    ad = sys.argv[1] if len(sys.argv) > 1 else "generasiya"
+    if ad not in OLCMELER:
+        print(f"Naməlum ölçmə: {ad}. Mövcud olanlar: {', '.join(OLCMELER)}")
+        sys.exit(1)
+    OLCMELER[ad](*sys.argv[2:])
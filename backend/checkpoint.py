@@ -0,0 +1,128 @@
+"""
+checkpoint.py — Təlim üçün dövri nəzarət nöqtələri (checkpoint) və dəqiq davam etmə
+===================================================================================
+Nəzarət nöqtəsi təlimi bit-bit eyni davam etdirmək üçün lazım olan hər şeyi saxlayır: model və
+AdamW vəziyyəti, GradScaler, addım nömrəsi, torch RNG-ləri (dropout) və məlumat mövqeyi (növbəti
+paketin nömrəsi — paketlər nömrəyə görə toxumlandığı üçün bu kifayətdir).
+
+Təlim dövrü yalnız CPU-ya surəti çıxarır (snapshot); diskə yazma arxa thread-də gedir, köhnə
+fayllar silinir və yalnız son `saxla` nəzarət nöqtəsi qalır.
+"""
+
+import glob
+import os
+import queue
+import threading
+
+import torch
+
+_FAYL_SABLONU = "ckpt_{:07d}.pt"
+
+
+def _cpu_sureti(obyekt):
+    """Tenzorları (iç-içə dict/list daxilində) CPU-ya klonlayır — sonrakı addımlar surəti dəyişmir."""
+    if isinstance(obyekt, torch.Tensor):
+        return obyekt.detach().to("cpu", copy=True)
+    if isinstance(obyekt, dict):
+        return {a: _cpu_sureti(d) for a, d in obyekt.items()}
+    if isinstance(obyekt, (list, tuple)):
+        return type(obyekt)(_cpu_sureti(d) for d in obyekt)
+    return obyekt
+
+
+def rng_veziyyeti():
+    veziyyet = {"torch": torch.get_rng_state()}
+    if torch.cuda.is_available():
+        veziyyet["cuda"] = torch.cuda.get_rng_state_all()
+    return veziyyet
+
+
+def rng_veziyyetini_berpa_et(veziyyet):
+    torch.set_rng_state(veziyyet["torch"])
+    if "cuda" in veziyyet and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(veziyyet["cuda"])
+
+
+def veziyyeti_gotur(model, optimallashdirici, addim, melumat_movqeyi, miqyaslayici=None, parametrler=None,
+                    proses_rng_veziyyetleri=None):
+    """
+    Davam etmək üçün lazım olan bütün vəziyyətin CPU surəti.
+    addim: növbəti icra olunacaq addım; melumat_movqeyi: növbəti paketin nömrəsi.
+    parametrler: davam edərkən uyğunluğu yoxlanılan təlim parametrləri (toxum, paket ölçüsü və s.)
+    proses_rng_veziyyetleri: paylanmış təlimdə hər prosesin RNG vəziyyəti (proses nömrəsinə görə)
+    """
+    return {
+        "model": _cpu_sureti(model.state_dict()),
+        "optimallashdirici": _cpu_sureti(optimallashdirici.state_dict()),
+        "miqyaslayici": miqyaslayici.state_dict() if miqyaslayici is not None else None,
+        "addim": addim,
+        "melumat_movqeyi": melumat_movqeyi,
+        "rng": _cpu_sureti(rng_veziyyeti()),
+        "proses_rng": _cpu_sureti(proses_rng_veziyyetleri),
+        "parametrler": dict(parametrler or {}),
+    }
+
+
+def veziyyeti_berpa_et(veziyyet, model, optimallashdirici, miqyaslayici=None, proses_nomresi=0):
+    """Model, optimallaşdırıcı, GradScaler və RNG-ləri bərpa edir. Qaytarır: (addim, melumat_movqeyi)."""
+    model.load_state_dict(veziyyet["model"])
+    optimallashdirici.load_state_dict(veziyyet["optimallashdirici"])
+    if miqyaslayici is not None and veziyyet["miqyaslayici"]:
+        miqyaslayici.load_state_dict(veziyyet["miqyaslayici"])
+    proses_rng = veziyyet.get("proses_rng")
+    rng_veziyyetini_berpa_et(proses_rng[proses_nomresi] if proses_rng else veziyyet["rng"])
+    return veziyyet["addim"], veziyyet["melumat_movqeyi"]
+
+
+def son_nezaret_noqtesi(qovluq):
+    """Qovluqdakı ən son nəzarət nöqtəsinin yolu (yoxdursa None)."""
+    fayllar = sorted(glob.glob(os.path.join(qovluq, "ckpt_*.pt")))
+    return fayllar[-1] if fayllar else None
+
+
+def nezaret_noqtesini_yukle(yol):
+    return torch.load(yol, map_location="cpu", weights_only=False)
+
+
+class NezaretNoqtesiYazici:
+    """
+    Nəzarət nöqtələrini arxa thread-də yazır. Növbədə ən çox bir yazılmamış surət olur:
+    disk çox yavaşdırsa, təlim yaddaşı doldurmaq əvəzinə növbəti yaz() çağırışında gözləyir.
+    """
+    def __init__(self, qovluq, saxla=3):
+        self.qovluq = qovluq
+        self.saxla = saxla
+        os.makedirs(qovluq, exist_ok=True)
+        self._novbe = queue.Queue(maxsize=1)
+        self._xeta = None
+        self._thread = threading.Thread(target=self._islet, name="ismayil-checkpoint", daemon=True)
+        self._thread.start()
+
+    def yaz(self, veziyyet):
+        if self._xeta is not None:
+            raise self._xeta
+        self._novbe.put(veziyyet)
+
+    def _islet(self):
+        while True:
+            veziyyet = self._novbe.get()
+            if veziyyet is None:
+                return
+            try:
+                yol = os.path.join(self.qovluq, _FAYL_SABLONU.format(veziyyet["addim"]))
+                muveqqeti = yol + ".tmp"
+                torch.save(veziyyet, muveqqeti)
+                # Yarımçıq fayl heç vaxt son nəzarət nöqtəsi kimi görünməsin
+                os.replace(muveqqeti, yol)
+                for kohne in sorted(glob.glob(os.path.join(self.qovluq, "ckpt_*.pt")))[:-self.saxla]:
+                    os.remove(kohne)
+            except Exception as xata:
+                print(f"Nəzarət nöqtəsi yazılmadı: {xata}")
+                self._xeta = xata
+
+    def bagla(self):
+        """Növbədəki surəti yazıb thread-i dayandırır."""
+        self._novbe.put(None)
+        self._thread.join()
+        if self._xeta is not None:
+            raise self._xeta
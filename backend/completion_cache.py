@@ -0,0 +1,134 @@
+"""
+completion_cache.py — Deterministik chat cavabları üçün LRU keşi
+================================================================
+Greedy (temperatur=0) və ya sabit seed ilə edilən sorğular eyni giriş üçün həmişə eyni cavabı
+verir, buna görə onların nəticəsini yadda saxlamaq olar. Açar: (model versiyası, tokenlər,
+seçim parametrləri, maksimum simvol, dayanmalar). Eyni anda gələn eyni sorğular birləşdirilir —
+yalnız biri generasya olunur, qalanları onun nəticəsini gözləyir.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import astuple
+from typing import Awaitable, Callable, Optional, Tuple
+
+from generation import SecimParametrleri
+
+
+class _Gedis:
+    """Hazırda gedən generasiya: onun tapşırığı və nəticəsini gözləyən sorğuların sayı."""
+    __slots__ = ("tapshiriq", "gozleyen")
+
+    def __init__(self, tapshiriq):
+        self.tapshiriq = tapshiriq
+        self.gozleyen = 0
+
+
+class CavabKeshi:
+    """
+    Ölçü və yaşama müddəti (TTL) ilə məhdud LRU keşi.
+    maks_olcu: saxlanılan maksimum cavab sayı (0 — keş söndürülüb)
+    omur: bir cavabın keşdə qalma müddəti (saniyə, 0 — limitsiz)
+    """
+    def __init__(self, maks_olcu=256, omur=3600.0):
+        self.maks_olcu = maks_olcu
+        self.omur = omur
+        self.versiya = None
+        self._qeydler = OrderedDict() # acar -> (bitme_vaxti, (metn, bitme_sebebi))
+        self._gedenler = {}           # acar -> _Gedis (hazırda generasya olunan sorğular)
+        self.isabet = 0
+        self.qacirma = 0
+        self.birleshdirilen = 0
+
+    def versiyani_teyin_et(self, versiya):
+        """Model çəkiləri dəyişəndə köhnə cavablar etibarsız olur — keş təmizlənir."""
+        if versiya != self.versiya:
+            self.versiya = versiya
+            self._qeydler.clear()
+
+    def acar(self, giris_idleri, parametrler: SecimParametrleri, maks_simvol, dayanmalar, versiya=None):
+        # versiya: cavabı verəcək modelin versiyası (verilməyibsə, keşin cari versiyası)
+        versiya = self.versiya if versiya is None else versiya
+        return (versiya, tuple(giris_idleri), astuple(parametrler), maks_simvol, tuple(dayanmalar))
+
+    def al(self, acar) -> Optional[Tuple[str, str]]:
+        qeyd = self._qeydler.get(acar)
+        if qeyd is None:
+            return None
+        bitme_vaxti, deyer = qeyd
+        if bitme_vaxti is not None and time.monotonic() > bitme_vaxti:
+            del self._qeydler[acar]
+            return None
+        self._qeydler.move_to_end(acar)
+        return deyer
+
+    def qoy(self, acar, deyer: Tuple[str, str]):
+        if self.maks_olcu <= 0 or acar[0] != self.versiya:
+            return # Generasiya zamanı model dəyişibsə, köhnə cavabı saxlamırıq
+        bitme_vaxti = time.monotonic() + self.omur if self.omur else None
+        self._qeydler[acar] = (bitme_vaxti, deyer)
+        self._qeydler.move_to_end(acar)
+        while len(self._qeydler) > self.maks_olcu:
+            self._qeydler.popitem(last=False)
+
+    def axin_ucun_al(self, acar) -> Optional[Tuple[str, str]]:
+        """
+        Axın (stream) sorğuları üçün: keşdəki cavabı qaytarır və isabət/qaçırma sayğacını artırır.
+        Axın generasiyaları birləşdirilmir — hər parça öz müştərisinə gedir.
+        """
+        deyer = self.al(acar)
+        if deyer is not None:
+            self.isabet += 1
+        else:
+            self.qacirma += 1
+        return deyer
+
+    async def al_ve_ya_hesabla(self, acar, hesabla: Callable[[], Awaitable[Tuple[str, str]]]):
+        """
+        Cavab keşdədirsə dərhal qaytarır. Eyni açarla generasiya artıq gedirsə, onun nəticəsini gözləyir.
+        Əks halda hesabla()-nı ayrıca tapşırıq kimi başladıb nəticəni keşə yazır. Generasiyanı başladan
+        müştəri getsə də, o, qalan gözləyənlər üçün davam edir; yalnız hamı gedəndə ləğv olunur.
+        """
+        deyer = self.al(acar)
+        if deyer is not None:
+            self.isabet += 1
+            return deyer
+        gedis = self._gedenler.get(acar)
+        if gedis is not None and not gedis.tapshiriq.done():
+            self.birleshdirilen += 1
+        else:
+            self.qacirma += 1
+            gedis = _Gedis(asyncio.ensure_future(hesabla()))
+            self._gedenler[acar] = gedis
+            gedis.tapshiriq.add_done_callback(lambda tapshiriq: self._bitdi(acar, gedis))
+        gedis.gozleyen += 1
+        try:
+            # shield: gözləyən müştəri getsə, generasiya digərləri üçün ləğv olunmur
+            return await asyncio.shield(gedis.tapshiriq)
+        finally:
+            gedis.gozleyen -= 1
+            if gedis.gozleyen == 0:
+                gedis.tapshiriq.cancel() # Nəticəni gözləyən qalmayıb — planlayıcı boş yerə hesablamasın
+
+    def _bitdi(self, acar, gedis):
+        if self._gedenler.get(acar) is gedis:
+            del self._gedenler[acar]
+        tapshiriq = gedis.tapshiriq
+        if tapshiriq.cancelled():
+            return
+        if tapshiriq.exception() is None: # exception() — gözləyən olmasa belə "never retrieved" xəbərdarlığı olmasın
+            self.qoy(acar, tapshiriq.result())
+
+    def statistika(self):
+        sorgular = self.isabet + self.qacirma + self.birleshdirilen
+        return {
+            "hits": self.isabet,
+            "misses": self.qacirma,
+            "coalesced": self.birleshdirilen,
+            "hit_rate": (self.isabet + self.birleshdirilen) / sorgular if sorgular else 0.0,
+            "size": len(self._qeydler),
+            "max_size": self.maks_olcu,
+            "ttl_seconds": self.omur,
+            "model_version": self.versiya,
+        }
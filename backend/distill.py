@@ -0,0 +1,100 @@
+"""
+distill.py — Spekulyativ generasiya üçün kiçik qaralama modelinin distillə edilməsi
+==================================================================================
+Kiçik IsmayilModeli (standart: 1 lay, 64 ölçü) əsas modelin (müəllimin) çıxış paylanmasını təkrarlamağı
+öyrənir: itki = alfa * KL(müəllim || şagird) (temperatur ilə yumşaldılmış) + (1 - alfa) * həqiqi növbəti
+simvollar üzrə çarpaz entropiya. Spekulyativ generasiyada təklifin qəbul ehtimalı məhz iki paylanmanın
+yaxınlığından asılıdır, ona görə əsas hissə KL-dir. Tokenizator və məlumat train.py ilə eynidir.
+
+İstifadə:
+  python distill.py                                       # ismayil_model.pth -> ismayil_qaralama.pth
+  python distill.py --yerlesdirme-olcusu 64 --lay-sayi 1 --maks-iterasiya 2000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import torch
+from torch.nn import functional as F
+
+from model import IsmayilModeli, ModelKonfiqurasiyasi, cekileri_saxla, modeli_yukle_pth
+from prepare_data import INDEKS_ADI, ParcaliMelumat
+
+
+def distillashdir(muellim, melumat, konfiq, addim_sayi, paket_olcusu=32, temperatur=1.0, alfa=0.9,
+                  oyrenme_derecesi=1e-3, toxum=1337, budce=None, hesabat_araligi=0):
+    """
+    Müəllim modeldən konfiq ölçülü şagird (qaralama) modeli öyrədir. budce (saniyə) verilərsə,
+    təlim addim_sayi-ya çatmamış da dayanır. Paketlər train.py-dəki kimi (toxum, nömrə) ilə seçilir.
+    Qaytarır: eval rejimində şagird model.
+    """
+    blok_olcusu = konfiq.blok_olcusu
+    muellim.eval()
+    torch.manual_seed(toxum)
+    sagird = IsmayilModeli(konfiq).train()
+    optimallashdirici = torch.optim.AdamW(sagird.parameters(), lr=oyrenme_derecesi)
+    hedd = melumat.simvol_sayi('train') - blok_olcusu
+    son = time.perf_counter() + budce if budce else None
+    for addim in range(addim_sayi):
+        if son is not None and time.perf_counter() >= son:
+            break
+        bashlangiclar = np.random.default_rng((toxum, addim)).integers(0, hedd, paket_olcusu)
+        pencereler = torch.from_numpy(melumat.paket('train', bashlangiclar, blok_olcusu + 1))
+        x, y = pencereler[:, :-1], pencereler[:, 1:]
+        with torch.no_grad():
+            muellim_logitleri, _ = muellim(x)
+        sagird_logitleri, _ = sagird(x)
+        # KL(müəllim || şagird) temperatur ilə; T^2 qradiyentlərin miqyasını temperaturdan asılı olmayan saxlayır
+        kl = F.kl_div(F.log_softmax(sagird_logitleri / temperatur, dim=-1),
+                      F.log_softmax(muellim_logitleri.float() / temperatur, dim=-1),
+                      log_target=True, reduction='batchmean') / blok_olcusu * temperatur ** 2
+        ce = F.cross_entropy(sagird_logitleri.reshape(-1, sagird_logitleri.shape[-1]), y.reshape(-1))
+        itki = alfa * kl + (1 - alfa) * ce
+        optimallashdirici.zero_grad(set_to_none=True)
+        itki.backward()
+        optimallashdirici.step()
+        if hesabat_araligi and addim % hesabat_araligi == 0:
+            print(f"Addım {addim}: KL {kl.item():.4f}, çarpaz entropiya {ce.item():.4f}")
+    return sagird.eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spekulyativ generasiya üçün qaralama modelini distillə etmək")
+    parser.add_argument("--muellim", default="ismayil_model.pth", help="Əsas modelin çəkiləri")
+    parser.add_argument("--cixis", default="ismayil_qaralama.pth")
+    parser.add_argument("--melumat", default=os.path.join("data", INDEKS_ADI), help="prepare_data.py indeksi")
+    parser.add_argument("--yerlesdirme-olcusu", type=int, default=64)
+    parser.add_argument("--bash-sayi", type=int, default=4)
+    parser.add_argument("--lay-sayi", type=int, default=1)
+    parser.add_argument("--maks-iterasiya", type=int, default=2000)
+    parser.add_argument("--paket-olcusu", type=int, default=32)
+    parser.add_argument("--temperatur", type=float, default=1.0, help="Distillə temperaturu")
+    parser.add_argument("--alfa", type=float, default=0.9, help="KL itkisinin payı (qalanı çarpaz entropiya)")
+    parser.add_argument("--toxum", type=int, default=1337)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.melumat):
+        print(f"Səhv: '{args.melumat}' tapılmadı — əvvəlcə python prepare_data.py input.txt")
+        return
+    melumat = ParcaliMelumat(args.melumat)
+    muellim = modeli_yukle_pth(args.muellim)
+    if muellim.konfiq.luget_olcusu != melumat.luget_olcusu:
+        print(f"Səhv: müəllimin lüğəti ({muellim.konfiq.luget_olcusu}) məlumatınkından ({melumat.luget_olcusu}) fərqlidir")
+        return
+    # Qaralama eyni tokenizator, eyni kontekst və mövqe növü ilə, amma daha kiçik qurulur
+    konfiq = ModelKonfiqurasiyasi(luget_olcusu=melumat.luget_olcusu, yerlesdirme_olcusu=args.yerlesdirme_olcusu,
+                                  bash_sayi=args.bash_sayi, lay_sayi=args.lay_sayi,
+                                  blok_olcusu=muellim.konfiq.blok_olcusu, movqe_novu=muellim.konfiq.movqe_novu,
+                                  pencere=muellim.konfiq.pencere)
+    sagird = distillashdir(muellim, melumat, konfiq, args.maks_iterasiya, args.paket_olcusu, args.temperatur,
+                           args.alfa, toxum=args.toxum, hesabat_araligi=max(1, args.maks_iterasiya // 10))
+    cekileri_saxla(sagird, args.cixis)
+    parametr = lambda m: sum(p.numel() for p in m.parameters())
+    print(f"Qaralama modeli '{args.cixis}' faylına yazıldı ({parametr(sagird) / 1e6:.2f}M parametr, "
+          f"müəllim {parametr(muellim) / 1e6:.2f}M)")
+
+
+if __name__ == "__main__":
+    main()
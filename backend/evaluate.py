@@ -0,0 +1,104 @@
+"""
+evaluate.py — Dəqiqlik rejimlərinin (fp32 / bf16 / int8) keyfiyyət və sürət müqayisəsi
+=====================================================================================
+Hər rejim üçün yoxlama (validation) mətnində simvol başına bit (bits-per-character) və
+generasiya sürəti (simvol/san) ölçülür, nəticələr fp32 ilə müqayisə edilir.
+
+pencereleri_qiymetlendir sabit pəncərələr üzərində qradiyentsiz, böyük paketlərlə orta itkini hesablayır —
+train.py və sweep.py dövri qiymətləndirmədə onu ParcaliMelumat.ardicil_pencereler-in seçdiyi pəncərələrlə
+çağırır. bit_simvol_hesabla eyni funksiyanı tək bir token massivindən kəsilmiş ardıcıl pəncərələrə tətbiq edir.
+
+İstifadə:
+  python evaluate.py                       # input.txt-in son 10%-i üzərində
+  python evaluate.py --metn diger.txt --pencere-sayi 512
+"""
+
+import argparse
+import contextlib
+import copy
+import math
+import time
+
+import torch
+from torch.nn import functional as F
+
+from model import deqiqliyi_tetbiq_et, modeli_yukle_pth, DEQIQLIK_REJIMLERI
+from tokenizer import tokenizatoru_yukle
+
+
+@torch.no_grad()
+def pencereleri_qiymetlendir(model, pencereler, paket_olcusu=128, avtomatik_tip=contextlib.nullcontext):
+    """
+    pencereler: (N, T+1) tam ədədlər — hər sətirdə x ilk T, y isə bir addım öndəki T tokendir.
+    Böyük qradiyentsiz paketlərlə token başına orta itkini (nat) qaytarır.
+    """
+    if len(pencereler) == 0:
+        raise ValueError("Qiymətləndirmə üçün heç bir pəncərə verilməyib")
+    cihaz = next(model.parameters()).device
+    cem_itki, say = 0.0, 0
+    for i in range(0, len(pencereler), paket_olcusu):
+        paket = pencereler[i:i + paket_olcusu].to(cihaz, non_blocking=True)
+        x, y = paket[:, :-1], paket[:, 1:]
+        with avtomatik_tip():
+            ehtimallar, _ = model(x)
+        itki = F.cross_entropy(ehtimallar.float().reshape(-1, ehtimallar.shape[-1]), y.reshape(-1), reduction='sum')
+        cem_itki += itki.item()
+        say += y.numel()
+    return cem_itki / say
+
+
+def bit_simvol_hesabla(model, melumat, pencere_sayi, paket_olcusu=64):
+    """Ardıcıl, üst-üstə düşməyən pəncərələr üzərində orta itkini bit/simvol ilə qaytarır."""
+    blok_olcusu = model.konfiq.blok_olcusu
+    pencere_sayi = min(pencere_sayi, (len(melumat) - 1) // blok_olcusu)
+    if pencere_sayi < 1:
+        raise ValueError(f"Yoxlama məlumatı ({len(melumat)} token) bir pəncərədən ({blok_olcusu + 1} token) qısadır")
+    bashlangiclar = torch.arange(pencere_sayi) * blok_olcusu
+    pencereler = torch.stack([melumat[j:j + blok_olcusu + 1] for j in bashlangiclar])
+    return pencereleri_qiymetlendir(model, pencereler, paket_olcusu) / math.log(2)
+
+
+@torch.no_grad()
+def suret_olc(model, simvol_sayi=200, paket=1):
+    bashlangic = torch.zeros((paket, 1), dtype=torch.long)
+    model.yeni_metn_yarat(bashlangic, 8)  # Isinma
+    t0 = time.perf_counter()
+    model.yeni_metn_yarat(bashlangic, simvol_sayi)
+    return paket * simvol_sayi / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dəqiqlik rejimlərinin müqayisəsi")
+    parser.add_argument("--metn", default="input.txt", help="Yoxlama mətni (son 10%%-i istifadə olunur)")
+    parser.add_argument("--model", default="ismayil_model.pth")
+    parser.add_argument("--tokenizer", default="tokenizer.json")
+    parser.add_argument("--pencere-sayi", type=int, default=256, help="Qiymətləndirmə pəncərələrinin sayı")
+    parser.add_argument("--rejimler", default=",".join(DEQIQLIK_REJIMLERI))
+    args = parser.parse_args()
+
+    tokenizator = tokenizatoru_yukle(args.tokenizer)
+    with open(args.metn, 'r', encoding='utf-8') as f:
+        metn = f.read()
+    melumat = torch.from_numpy(tokenizator.kodlasdir_massiv(metn)).long()
+    yoxlama_melumati = melumat[int(0.9 * len(melumat)):]
+    # BPE-də bir token bir neçə simvoldur — itkini simvol başına bitə çevirmək üçün
+    simvol_per_token = len(metn) / max(1, len(melumat))
+
+    esas = modeli_yukle_pth(args.model)
+
+    neticeler = {}
+    for rejim in args.rejimler.split(","):
+        model = deqiqliyi_tetbiq_et(copy.deepcopy(esas), rejim)
+        bpc = bit_simvol_hesabla(model, yoxlama_melumati, args.pencere_sayi) / simvol_per_token
+        suret = suret_olc(model) * simvol_per_token
+        suret_paket = suret_olc(model, paket=16) * simvol_per_token
+        neticeler[rejim] = (bpc, suret, suret_paket)
+
+    esas_bpc, esas_suret, _ = neticeler.get('fp32', next(iter(neticeler.values())))
+    print(f"{'rejim':>6} | {'bit/simvol':>10} | {'fərq':>8} | {'simvol/san (1)':>14} | {'simvol/san (16)':>15} | sürətlənmə")
+    for rejim, (bpc, suret, suret_paket) in neticeler.items():
+        print(f"{rejim:>6} | {bpc:10.4f} | {bpc - esas_bpc:+8.4f} | {suret:14.1f} | {suret_paket:15.1f} | {suret / esas_suret:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
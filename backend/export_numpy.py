@@ -0,0 +1,87 @@
+"""
+export_numpy.py — ismayil_model.pth faylını torch-suz NumPy mühərriki üçün .npz formatına çevirir
+================================================================================================
+İstifadə:
+  python export_numpy.py                 # ismayil_model.pth -> ismayil_model.npz
+  python export_numpy.py --yoxla         # + NumPy və torch çıxışlarını, soyuq başlanğıcı və paket ölçülərini müqayisə edir
+"""
+
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import torch
+
+from model import cekileri_yukle, modeli_yukle_pth
+from numpy_engine import NumpyModeli
+from tokenizer import tokenizatoru_yukle
+
+
+def numpy_formatina_cevir(pth_yolu='ismayil_model.pth', npz_yolu='ismayil_model.npz'):
+    ceki, konfiq = cekileri_yukle(pth_yolu)
+    if konfiq.movqe_novu != 'mutleq':
+        raise ValueError("NumPy mühərriki yalnız mütləq mövqeli (movqe_cedveli olan) modelləri dəstəkləyir")
+    massivler = {ad: t.detach().float().numpy() for ad, t in ceki.items()}
+    massivler['_meta.bash_sayi'] = np.array(konfiq.bash_sayi)
+    np.savez(npz_yolu, **massivler)
+    print(f"'{pth_yolu}' -> '{npz_yolu}' ({os.path.getsize(npz_yolu) / 1024:.1f} KB)")
+
+
+def _paket_olcusu(ad):
+    # Quraşdırılmış paketin diskdə tutduğu yer (MB)
+    spec = importlib.util.find_spec(ad)
+    if spec is None or not spec.submodule_search_locations:
+        return float('nan')
+    cem = 0
+    for kok in spec.submodule_search_locations:
+        for qovluq, _, fayllar in os.walk(kok):
+            cem += sum(os.path.getsize(os.path.join(qovluq, f)) for f in fayllar)
+    return cem / 1024 / 1024
+
+
+def _soyuq_bashlangic(kod):
+    # Təmiz prosesdə import + yükləmə müddətini ölçür
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", kod], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - t0
+
+
+def yoxla(pth_yolu, npz_yolu, tokenizer_yolu, tolerans=1e-4):
+    tokenizator = tokenizatoru_yukle(tokenizer_yolu)
+    torch_modeli = modeli_yukle_pth(pth_yolu)
+    np_modeli = NumpyModeli.yukle(npz_yolu)
+
+    idler = torch.randint(tokenizator.luget_olcusu, (4, np_modeli.blok_olcusu))
+    with torch.no_grad():
+        gozlenilen = torch_modeli(idler)[0].numpy()
+    ferq = np.abs(np_modeli.forward(idler.numpy()) - gozlenilen).max()
+
+    # KV-yaddaşlı addım-addım hesablama da eyni nəticəni verməlidir
+    kesh = np_modeli.bosh_kesh()
+    addimli = np.concatenate([np_modeli.forward(idler[:1, i:i + 1].numpy(), kesh) for i in range(idler.shape[1])], axis=1)
+    kesh_ferqi = np.abs(addimli - gozlenilen[:1]).max()
+    print(f"Maks. fərq (tam ötürmə): {ferq:.2e}, (KV-yaddaşla): {kesh_ferqi:.2e} — "
+          f"{'UYĞUNDUR' if max(ferq, kesh_ferqi) < tolerans else 'TOLERANSDAN BÖYÜKDÜR'}")
+
+    torch_vaxti = _soyuq_bashlangic(
+        f"from model import modeli_yukle_pth; modeli_yukle_pth('{pth_yolu}')"
+    )
+    numpy_vaxti = _soyuq_bashlangic(f"from numpy_engine import NumpyModeli; NumpyModeli.yukle('{npz_yolu}')")
+    print(f"Soyuq başlanğıc (import + yükləmə): torch {torch_vaxti:.2f} san, numpy {numpy_vaxti:.2f} san")
+    print(f"Quraşdırılmış paket ölçüsü: torch {_paket_olcusu('torch'):.0f} MB, numpy {_paket_olcusu('numpy'):.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PyTorch çəkilərini NumPy formatına çevirmək")
+    parser.add_argument("--pth", default="ismayil_model.pth")
+    parser.add_argument("--npz", default="ismayil_model.npz")
+    parser.add_argument("--tokenizer", default="tokenizer.json")
+    parser.add_argument("--yoxla", action="store_true", help="NumPy və torch nəticələrini müqayisə et")
+    args = parser.parse_args()
+    numpy_formatina_cevir(args.pth, args.npz)
+    if args.yoxla:
+        yoxla(args.pth, args.npz, args.tokenizer)
@@ -0,0 +1,119 @@
+"""
+generation.py — Generasiya sorğularının ümumi (torch-dan asılı olmayan) hissələri
+================================================================================
+Seçim parametrləri, planlayıcıya göndərilən sorğu və dayanma ardıcıllıqlarının işlənməsi.
+Həm torch planlayıcısı (scheduler.py), həm də NumPy mühərriki (numpy_engine.py) bunlardan istifadə edir.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+
+@dataclass
+class SecimParametrleri:
+    """Bir sorğunun seçim tənzimləmələri."""
+    temperatur: float = 1.0     # 0 — həmişə ən ehtimallı simvol (greedy)
+    top_k: int = 0              # 0 — məhdudiyyət yoxdur
+    top_p: float = 1.0          # 1.0 — məhdudiyyət yoxdur
+    tekrar_cezasi: float = 1.0  # 1.0 — cəza yoxdur
+    toxum: Optional[int] = None # Seed: verilibsə nəticə təkrarlana bilir
+
+    @property
+    def deterministikdir(self):
+        # Greedy və ya sabit seed ilə eyni giriş həmişə eyni cavabı verir
+        return self.temperatur == 0 or self.toxum is not None
+
+
+class NovbeDoludur(Exception):
+    """Planlayıcının gözləmə növbəsi doludur — sorğu qəbul edilmir."""
+
+
+class GenerasiyaIsteyi:
+    """
+    Planlayıcıya göndərilən bir generasiya sorğusu.
+    geri_cagiris(hadise, deyer) planlayıcı thread-indən çağırılır:
+      ("hisse", mətn)        — yeni generasya olunmuş mətn parçası
+      ("son", bitme_sebebi)  — generasiya bitdi ('stop' və ya 'length')
+      ("vaxt_bitdi", None)   — sorğunun vaxt limiti aşıldı
+      ("xeta", mesaj)        — generasiya xəta ilə dayandı
+    vaxt_limiti: sorğunun növbədə gözləmə + generasiya üçün maksimum müddəti (saniyə), None — limitsiz
+    """
+    def __init__(self, giris_idleri: List[int], parametrler: SecimParametrleri, maksimum_yeni_simvol: int,
+                 dayanmalar: List[str], geri_cagiris: Callable[[str, object], None],
+                 vaxt_limiti: Optional[float] = None):
+        # Boş giriş üçün (bütün simvollar lüğətdən kənardadırsa) 0 simvolu ilə başlayırıq
+        self.giris_idleri = list(giris_idleri) or [0]
+        self.parametrler = parametrler
+        self.maksimum_yeni_simvol = maksimum_yeni_simvol
+        self.dayanmalar = dayanmalar
+        self.geri_cagiris = geri_cagiris
+        self.legv_edilib = False # Müştəri getdikdə True edilir — planlayıcı növbəti addımda sorğunu çıxarır
+        self.novbeye_girme_vaxti = time.monotonic()
+        self.son_vaxt = self.novbeye_girme_vaxti + vaxt_limiti if vaxt_limiti else None
+
+    def legv_et(self):
+        self.legv_edilib = True
+
+    def vaxti_bitib(self, indi: float) -> bool:
+        return self.son_vaxt is not None and indi > self.son_vaxt
+
+
+class ArdicilliqVeziyyeti:
+    """
+    Generasya olunan bir ardıcıllığın vəziyyəti: simvollar, mətn və müştəriyə nə qədərinin göndərildiyi.
+    Dayanma ardıcıllığının başlanğıcı ola biləcək son simvollar yoxlanılana qədər saxlanılır.
+    """
+    def __init__(self, istek: GenerasiyaIsteyi):
+        self.istek = istek
+        self.idler = list(istek.giris_idleri) # Giriş + generasya olunmuş simvollar
+        self.yeni_simvol_sayi = 0
+        self.metn = ""
+        self.gonderilib = 0 # Müştəriyə artıq göndərilmiş simvolların sayı
+
+    def simvol_elave_et(self, simvol: int, hisse: str) -> bool:
+        """
+        Yeni simvolu və onun mətnini əlavə edir, lazım olan hadisələri göndərir.
+        Qaytarır: True — generasiya bitdi (dayanma və ya maksimum uzunluq).
+        """
+        istek = self.istek
+        self.idler.append(simvol)
+        self.yeni_simvol_sayi += 1
+        self.metn += hisse
+
+        yer = dayanma_yerini_tap(self.metn, istek.dayanmalar, len(hisse))
+        if yer != -1:
+            # Dayanma ardıcıllığının özü cavaba daxil edilmir
+            self._gonder(yer)
+            istek.geri_cagiris("son", "stop")
+            return True
+        if self.yeni_simvol_sayi >= istek.maksimum_yeni_simvol:
+            self._gonder(len(self.metn))
+            istek.geri_cagiris("son", "length")
+            return True
+        # Dayanma ardıcıllığının başlanğıcı ola biləcək son simvolları hələlik saxlayırıq
+        saxla = max((len(d) for d in istek.dayanmalar), default=1) - 1
+        self._gonder(len(self.metn) - saxla)
+        return False
+
+    def _gonder(self, son: int):
+        # Mətnin hələ göndərilməmiş hissəsini [gonderilib:son] müştəriyə ötürürük
+        if son > self.gonderilib:
+            self.istek.geri_cagiris("hisse", self.metn[self.gonderilib:son])
+            self.gonderilib = son
+
+
+def dayanma_yerini_tap(metn: str, dayanmalar: List[str], yeni_hisse_uzunlugu: int) -> int:
+    """
+    Mətndə dayanma ardıcıllığı tapılıbsa onun başlanğıc indeksini, yoxdursa -1 qaytarır.
+    Yalnız son əlavə olunmuş hissəni əhatə edən pəncərəyə baxılır ki, yoxlama hər addımda ucuz olsun.
+    """
+    ilk = -1
+    for dayanma in dayanmalar:
+        if not dayanma:
+            continue
+        bashlangic = max(0, len(metn) - yeni_hisse_uzunlugu - len(dayanma) + 1)
+        yer = metn.find(dayanma, bashlangic)
+        if yer != -1 and (ilk == -1 or yer < ilk):
+            ilk = yer
+    return ilk
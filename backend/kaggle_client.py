@@ -119,19 +119,28 @@ def _notebook_slug() -> str:
 # ANA FUNKSIYALAR
 # ─────────────────────────────────────────────────────────────
 
-def is_gondər(video_bytes: bytes, prompt: str, fayl_adi: str = "video.mp4") -> str:
+def yeni_is_qovlugu() -> tuple:
     """
-    TAM AVTOMATİK: Video upload → dataset yarat → kernel işlət
-    Qaytarır: iş ID-si (polling üçün)
+    Yeni iş üçün video_jobs/<id>/ qovluğunu yaradır — yüklənən video birbaşa bura yazılır.
+    Qaytarır: (iş ID-si, qovluq)
     """
     is_id = str(uuid.uuid4())[:8]
-
     is_qovluqu = Path("video_jobs") / is_id
     is_qovluqu.mkdir(parents=True, exist_ok=True)
+    return is_id, is_qovluqu
+
 
-    video_yolu = is_qovluqu / fayl_adi
-    with open(video_yolu, "wb") as f:
-        f.write(video_bytes)
+def is_gondər(is_id: str, video_yolu, prompt: str, olcu: int = None, sha256: str = None,
+              orijinal_ad: str = None) -> str:
+    """
+    TAM AVTOMATİK: dataset yarat → kernel işlət
+    Video artıq yeni_is_qovlugu()-nun qaytardığı qovluqdadır (yaddaşa oxunmur).
+    orijinal_ad: müştərinin göndərdiyi fayl adı — yalnız məlumat üçün saxlanılır, diskdəki ad video_yolu-dur.
+    Qaytarır: iş ID-si (polling üçün)
+    """
+    video_yolu = Path(video_yolu)
+    is_qovluqu = video_yolu.parent
+    fayl_adi = video_yolu.name
 
     with open(is_qovluqu / "prompt.txt", "w", encoding="utf-8") as f:
         f.write(prompt)
@@ -140,6 +149,9 @@ def is_gondər(video_bytes: bytes, prompt: str, fayl_adi: str = "video.mp4") ->
         "status": "uploading",
         "prompt": prompt,
         "video_path": str(video_yolu),
+        "size_bytes": olcu,
+        "sha256": sha256,
+        "original_filename": orijinal_ad,
         "output_path": None,
         "dataset_slug": None,
         "created_at": time.time()
@@ -172,11 +184,12 @@ def _arxa_planda_isle(is_id: str, is_qovluqu: Path, prompt: str, fayl_adi: str):
         dataset_slug = f"{username}/{dataset_adi}"
         _is_leyi[is_id]["dataset_slug"] = dataset_slug
 
-        with tempfile.TemporaryDirectory() as tmp:
+        # Dataset qovluğu iş qovluğunun içində yaradılır ki, video eyni fayl sistemində hardlink ilə
+        # (kopyalamadan) əlavə oluna bilsin
+        with tempfile.TemporaryDirectory(dir=is_qovluqu) as tmp:
             tmp_path = Path(tmp)
-            shutil.copy(is_qovluqu / fayl_adi, tmp_path / fayl_adi)
-            with open(tmp_path / "prompt.txt", "w") as f:
-                f.write(prompt)
+            _kopyalamadan_elave_et(is_qovluqu / fayl_adi, tmp_path / fayl_adi)
+            _kopyalamadan_elave_et(is_qovluqu / "prompt.txt", tmp_path / "prompt.txt")
             meta = {
                 "title": f"İsmayıl AI Video {is_id}",
                 "id": dataset_slug,
@@ -236,6 +249,17 @@ def _arxa_planda_isle(is_id: str, is_qovluqu: Path, prompt: str, fayl_adi: str):
         _is_leyi[is_id]["error"] = str(xata)
 
 
+def _kopyalamadan_elave_et(menbe: Path, hedef: Path):
+    """Faylı dataset qovluğuna hardlink ilə əlavə edir; mümkün deyilsə symlink, son çarə kimi kopya."""
+    try:
+        os.link(menbe, hedef)
+    except OSError:
+        try:
+            os.symlink(menbe.resolve(), hedef)
+        except OSError:
+            shutil.copyfile(menbe, hedef)
+
+
 def _kernel_bitene_qeder_gozle(api, kernel_slug: str, is_id: str, max_deqiqe: int = 60):
     """Kernel tamamlanana qədər hər 30 saniyədən bir yoxlayır."""
     baslangic = time.time()
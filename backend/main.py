@@ -1,10 +1,18 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from typing import List
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional, Union
 import uvicorn
+import asyncio
+import hmac
+import json
 import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Torch opsionaldir — Railway-də lazim deyil (GPU Kaggle-dadır)
@@ -14,18 +22,58 @@ try:
 except ImportError:
     TORCH_VAR = False
 
-# Model və tokenizer opsionaldir — yalnız lokal dev-də işləyir
+# Tokenizer və generasiya tipləri torch tələb etmir
+from tokenizer import tokenizatoru_yukle
+from generation import GenerasiyaIsteyi, NovbeDoludur, SecimParametrleri
+from completion_cache import CavabKeshi
+from model_registry import ManifestIzleyici, ModelNusxesi, ModelReyestri, manifesti_oxu, manifesti_yoxla
+
+# Torch modeli opsionaldir — yalnız lokal dev-də işləyir
 try:
-    from model import IsmayilModeli
-    from tokenizer import CharTokenizator
+    from model import IsmayilModeli, cekileri_yukle, deqiqliyi_tetbiq_et
+    from scheduler import ChatPlanlayici
+    from weight_format import modeli_yukle
     MODEL_VAR = True
 except ImportError:
     MODEL_VAR = False
 
-from kaggle_client import is_gondər, is_veziyyeti, is_siyahisi
+# NumPy mühərriki — torch olmayan mühitlərdə (Railway) export_numpy.py ilə çıxarılmış çəkilərlə işləyir
+try:
+    from numpy_engine import NumpyModeli, NumpyPlanlayici
+    NUMPY_VAR = True
+except ImportError:
+    NUMPY_VAR = False
+
+from kaggle_client import is_gondər, is_veziyyeti, is_siyahisi, yeni_is_qovlugu
+from upload import YuklemeXetasi, multipart_yukle
+
+@asynccontextmanager
+async def omur_dovru(app: FastAPI):
+    """
+    Server başlayanda modeli arxa planda yükləyib isindirir (warmup), dayananda planlayıcını söndürür.
+    Yükləmə zamanı server artıq sorğu qəbul edir — "/" dərhal cavab verir, "/ready" isə hazırlıq bitəndə.
+    """
+    async def hazirla():
+        try:
+            await asyncio.to_thread(_bashlangic_hazirligi)
+        except Exception as xata:
+            print(f"Modelin yüklənməsi zamanı xəta: {xata}")
+        finally:
+            _hazirliq.set()
+
+    tapshiriq = asyncio.create_task(hazirla())
+    # Yeni versiyalar manifest dəyişəndə avtomatik yüklənir (ISMAYIL_MANIFEST_YOXLAMA_SAN=0 — söndürülüb)
+    izleyici = ManifestIzleyici(MODEL_QOVLUGU, MANIFEST_YOXLAMA_SAN, _manifestden_yenile) \
+        if MANIFEST_YOXLAMA_SAN > 0 else None
+    yield
+    await tapshiriq
+    if izleyici is not None:
+        izleyici.dayandir()
+    if model_reyestri.aktiv is not None:
+        model_reyestri.aktiv.kohnelt()
 
 # FastAPI tətbiqini yaradırıq
-ismayil_server = FastAPI(title="İsmayılın Şəxsi AI Serveri")
+ismayil_server = FastAPI(title="İsmayılın Şəxsi AI Serveri", lifespan=omur_dovru)
 
 # CORS tənzimləmələri
 # Bütün mənbələrə icazə veririk ki, Vercel rahat qoşulsun
@@ -37,35 +85,195 @@ ismayil_server.add_middleware(
     allow_headers=["*"],
 )
 
-# Qlobal dəyişənlər — Model və Tokenizatoru burada saxlayırıq
+# Qlobal dəyişənlər — aktiv model versiyası (tokenizator + model + planlayıcı) reyestrdə saxlanılır.
+# Hər chat sorğusu başlayanda aktiv nüsxəni götürür və sonuna qədər onunla işləyir — isti yeniləmə
+# zamanı davam edən generasiyalar köhnə çəkilərlə bitir
 cihaz = ('cuda' if (TORCH_VAR and torch.cuda.is_available()) else 'cpu') if TORCH_VAR else 'cpu'
-tokenizator = None
-ismayil_modeli = None
+model_reyestri = ModelReyestri()
+
+# Planlayıcı tənzimləmələri (env vasitəsilə dəyişdirilə bilər)
+MAKS_PAKET = int(os.environ.get("ISMAYIL_MAKS_PAKET", "16"))             # Eyni anda generasya olunan maks. sorğu
+MAKS_GOZLEME_MS = float(os.environ.get("ISMAYIL_MAKS_GOZLEME_MS", "5"))  # Paket yığmaq üçün maks. gözləmə
+MAKS_NOVBE = int(os.environ.get("ISMAYIL_MAKS_NOVBE", "64"))             # Paketə qoşulmağı gözləyən maks. sorğu
+VAXT_LIMITI = float(os.environ.get("ISMAYIL_VAXT_LIMITI_SAN", "60"))     # Bir sorğunun maks. müddəti (saniyə)
+TORCH_THREAD_SAYI = int(os.environ.get("ISMAYIL_TORCH_THREADS", "0")) or None # Generasiya üçün torch thread sayı
+# Inference dəqiqliyi: fp32 | bf16 | int8 (int8 yalnız CPU üçün)
+DEQIQLIK = os.environ.get("ISMAYIL_PRECISION", "fp32").lower()
+# İsinma (warmup): hansı paket ölçülərində və neçə simvolluq generasiya ilə isindirilsin
+ISINMA_PAKETLERI = [int(p) for p in os.environ.get("ISMAYIL_ISINMA_PAKETLERI", "1,8").split(",") if p.strip()]
+ISINMA_SIMVOL = int(os.environ.get("ISMAYIL_ISINMA_SIMVOL", "32"))
+NUMPY_PARALEL = int(os.environ.get("ISMAYIL_NUMPY_PARALEL", "4"))       # NumPy mühərrikində paralel sorğu sayı
+# Deterministik cavabların keşi: maksimum cavab sayı (0 — söndürülüb) və yaşama müddəti
+KESH_OLCUSU = int(os.environ.get("ISMAYIL_KESH_OLCUSU", "256"))
+KESH_OMRU = float(os.environ.get("ISMAYIL_KESH_OMRU_SAN", "3600"))
+# Söhbət tarixçəsi: fırlanan mövqeli modeldə bir dəfəyə hesablanan maks. simvol sayı və
+# növbələr arasında saxlanılan KV-yaddaş vəziyyətlərinin sayı
+KONTEKST_BUDCESI = int(os.environ.get("ISMAYIL_KONTEKST_BUDCESI", "512"))
+PREFIKS_KESHI_OLCUSU = int(os.environ.get("ISMAYIL_PREFIKS_KESHI", "64"))
+# Versiyalı modellər (model_registry.py): manifest-in qovluğu, onun yoxlanma aralığı və admin endpoint-inin tokeni
+MODEL_QOVLUGU = os.environ.get("ISMAYIL_MODEL_QOVLUGU", "models")
+MANIFEST_YOXLAMA_SAN = float(os.environ.get("ISMAYIL_MANIFEST_YOXLAMA_SAN", "10"))
+ADMIN_TOKENI = os.environ.get("ISMAYIL_ADMIN_TOKEN", "")  # Boşdursa /admin/reload söndürülüb
+MAKS_VIDEO_OLCUSU = int(os.environ.get("ISMAYIL_MAKS_VIDEO_MB", "500")) * 1024 * 1024  # /video/edit həddi, yükləmə zamanı yoxlanılır
+
+_yuklenme_kilidi = threading.Lock() # Eyni anda iki yükləmənin (və ya yeniləmənin) qarşısını alır
+_hazirliq = asyncio.Event()         # Yükləmə və isinma bitəndə qurulur ("/ready" üçün)
+_ilk_sorgu_olculub = False
+cavab_keshi = CavabKeshi(KESH_OLCUSU, KESH_OMRU)
+
+def _fayl_versiyasi(yol):
+    # Manifest olmadıqda: çəki faylı dəyişəndə (yenidən öyrədilib/yazılıbsa) versiya da dəyişir və keş təmizlənir
+    melumat = os.stat(yol)
+    return f"{os.path.basename(yol)}:{melumat.st_size}:{melumat.st_mtime_ns}"
+
+def _aktiv_et(nusxe):
+    # Əvvəlki nüsxə köhnəlir: onun son sorğusu bitəndə planlayıcısı dayandırılır və yaddaşı buraxılır
+    cavab_keshi.versiyani_teyin_et(nusxe.versiya)
+    return model_reyestri.deyishdir(nusxe)
 
 def ai_ni_bashlat():
     """
     Modeli və Tokenizatoru yaddaşdan yükləyən funksiya.
-    Torch və ya model faylı yoxdursa False qaytarır (Railway-də normal haldir).
+    Torch yoxdursa, ismayil_model.npz varsa NumPy mühərrikinə keçir.
+    Heç bir model faylı yoxdursa False qaytarır (Railway-də normal haldir).
     """  
-    if not TORCH_VAR or not MODEL_VAR:
-        return False  # Railway-də torch/model yoxdur — chat endpoint disabled
-    global tokenizator, ismayil_modeli
-    if ismayil_modeli is None:
-        # Faylların varlığını yoxlayırıq
-        if not os.path.exists('tokenizer.json') or not os.path.exists('ismayil_model.pth'):
+    if not (TORCH_VAR and MODEL_VAR) and not NUMPY_VAR:
+        return False  # Nə torch, nə numpy mühərriki var — chat endpoint disabled
+    with _yuklenme_kilidi:
+        return _yukle()
+
+def _nusxe_yarat(cheki_yolu, tokenizator_yolu, versiya):
+    """Çəki faylının növünə görə (torch / NumPy) model və planlayıcı qurub işə salır."""
+    tokenizator = tokenizatoru_yukle(tokenizator_yolu)
+    if cheki_yolu.endswith('.npz'):
+        # Torch-suz yol: çəkilər .npz-dən oxunur, generasiya NumPy ilə thread hovuzunda aparılır
+        if not NUMPY_VAR:
+            raise RuntimeError("NumPy mühərriki mövcud deyil")
+        model = NumpyModeli.yukle(cheki_yolu)
+        planlayici = NumpyPlanlayici(model, tokenizator, maks_paralel=NUMPY_PARALEL, maks_novbe=MAKS_NOVBE)
+    else:
+        if not (TORCH_VAR and MODEL_VAR):
+            raise RuntimeError(f"'{cheki_yolu}' üçün torch lazımdır")
+        if cheki_yolu.endswith('.safetensors'):
+            # Parametrlər fayla baxan görünüşlərdir — kopyalama və deserializasiya yoxdur
+            model = modeli_yukle(cheki_yolu, tokenizator.luget_olcusu)
+        else:
+            ceki, konfiq = cekileri_yukle(cheki_yolu, map_location=cihaz)
+            # Model memarlığını (ölçülər, mövqe növü) çəkilərlə saxlanılmış konfiqurasiyadan qururuq
+            model = IsmayilModeli(konfiq)
+            # Öyrənilmiş çəkiləri (weights) modelə yükləyirik
+            model.load_state_dict(ceki)
+        model.to(cihaz)
+        model.eval() # Modeli yalnız cavab vermə (inference) rejiminə salırıq
+        # Seçilmiş dəqiqlik rejimini (bf16 / int8) tətbiq edirik
+        model = deqiqliyi_tetbiq_et(model, DEQIQLIK)
+        # Generasiya planlayıcısını ayrıca thread-də işə salırıq
+        planlayici = ChatPlanlayici(
+            model, tokenizator, cihaz=cihaz,
+            maks_paket=MAKS_PAKET, maks_gozleme=MAKS_GOZLEME_MS / 1000,
+            maks_novbe=MAKS_NOVBE, torch_thread_sayi=TORCH_THREAD_SAYI,
+            kontekst_budcesi=KONTEKST_BUDCESI, prefiks_keshi_olcusu=PREFIKS_KESHI_OLCUSU
+        )
+    planlayici.bashlat()
+    return ModelNusxesi(versiya, tokenizator, model, planlayici)
+
+def _manifest_nusxesi():
+    # Manifest varsa, onun versiyası checksum-lar yoxlandıqdan sonra yüklənir
+    manifest = manifesti_oxu(MODEL_QOVLUGU)
+    if manifest is None:
+        return None
+    cheki_yolu, tokenizator_yolu = manifesti_yoxla(MODEL_QOVLUGU, manifest)
+    return _nusxe_yarat(cheki_yolu, tokenizator_yolu, manifest["versiya"])
+
+def _yukle():
+    if model_reyestri.aktiv is not None:
+        return True
+    nusxe = _manifest_nusxesi()
+    if nusxe is None:
+        # Manifest yoxdur — işçi qovluğundakı fayllar (əvvəlki kimi)
+        if not os.path.exists('tokenizer.json'):
             return False
-            
-        # Tokenizatoru yükləyirik
-        tokenizator = CharTokenizator.yukle('tokenizer.json')
-        # Model memarlığını yaradırıq
-        ismayil_modeli = IsmayilModeli(tokenizator.luget_olcusu)
-        # Öyrənilmiş çəkiləri (weights) modelə yükləyirik
-        ismayil_modeli.load_state_dict(torch.load('ismayil_model.pth', map_location=cihaz))
-        ismayil_modeli.to(cihaz)
-        ismayil_modeli.eval() # Modeli yalnız cavab vermə (inference) rejiminə salırıq
-        print("İsmayıl AI uğurla işə düşdü və suallarınızı gözləyir!")
+        # mmap formatı (.safetensors) varsa ona üstünlük veririk: bütün worker-lər çəkilərin eyni nüsxəsini paylaşır
+        namizedler = ('ismayil_model.safetensors', 'ismayil_model.pth') if TORCH_VAR and MODEL_VAR else ()
+        if NUMPY_VAR:
+            namizedler += ('ismayil_model.npz',)
+        cheki_yolu = next((y for y in namizedler if os.path.exists(y)), None)
+        if cheki_yolu is None:
+            return False
+        nusxe = _nusxe_yarat(cheki_yolu, 'tokenizer.json', _fayl_versiyasi(cheki_yolu))
+    _aktiv_et(nusxe)
+    if not hasattr(nusxe.model, 'movqe_novu'): # NumpyModeli
+        print(f"İsmayıl AI NumPy mühərriki ilə (torch-suz) işə düşdü (versiya {nusxe.versiya}) və suallarınızı gözləyir!")
+    else:
+        print(f"İsmayıl AI uğurla işə düşdü ({DEQIQLIK}, mövqe: {nusxe.model.movqe_novu}, versiya {nusxe.versiya}) "
+              f"və suallarınızı gözləyir!")
     return True
 
+def yeniden_yukle():
+    """
+    Manifest-dəki versiyanı arxa planda yükləyir, isindirir və aktiv nüsxəni atomik olaraq dəyişdirir.
+    Qaytarır: (əvvəlki versiya, yeni versiya); versiya dəyişməyibsə yeni versiya None-dır.
+    Başqa yükləmə gedirsə RuntimeError.
+    """
+    if not _yuklenme_kilidi.acquire(blocking=False):
+        raise RuntimeError("Başqa yükləmə artıq gedir")
+    try:
+        kohne = model_reyestri.aktiv
+        kohne_versiya = kohne.versiya if kohne is not None else None
+        manifest = manifesti_oxu(MODEL_QOVLUGU)
+        if manifest is None:
+            raise RuntimeError(f"'{MODEL_QOVLUGU}' qovluğunda manifest yoxdur")
+        if manifest["versiya"] == kohne_versiya:
+            return kohne_versiya, None
+        t0 = time.perf_counter()
+        nusxe = _manifest_nusxesi()
+        yuklenme = time.perf_counter() - t0
+        # İsinma yeni nüsxənin öz planlayıcısında gedir — aktiv nüsxənin sorğuları gözləmir
+        _isindir(nusxe)
+        _aktiv_et(nusxe)
+        print(f"Model versiyası {kohne_versiya} -> {nusxe.versiya} (yükləmə {yuklenme:.2f} san, "
+              f"isinma {time.perf_counter() - t0 - yuklenme:.2f} san)")
+        return kohne_versiya, nusxe.versiya
+    finally:
+        _yuklenme_kilidi.release()
+
+def _manifestden_yenile():
+    # Manifest izləyicisindən: başlanğıc hazırlığı bitməmiş və ya başqa yükləmə gedirsə, növbəti dəyişikliyi gözləyirik
+    if not _hazirliq.is_set():
+        return
+    try:
+        yeniden_yukle()
+    except RuntimeError as xata:
+        print(f"Manifest dəyişdi, amma yeniləmə edilmədi: {xata}")
+
+def _isindir(nusxe):
+    """
+    Tipik paket ölçülərində bir neçə qısa generasiya edir ki, yaddaş ayırıcısı və
+    hesablama nüvələri ilk real istifadəçidən əvvəl "qızışsın".
+    """
+    for paket in ISINMA_PAKETLERI:
+        bitenler = threading.Semaphore(0)
+        for i in range(paket):
+            nusxe.planlayici.gonder(GenerasiyaIsteyi(
+                nusxe.tokenizator.kodlasdir("Salam"), SecimParametrleri(toxum=i), ISINMA_SIMVOL, [],
+                lambda hadise, deyer: bitenler.release() if hadise in ("son", "vaxt_bitdi", "xeta") else None,
+            ))
+        for _ in range(paket):
+            bitenler.acquire()
+
+def _bashlangic_hazirligi():
+    # Server başlayanda bir dəfə çağırılır: yükləmə + isinma, müddətlər loglanır
+    t0 = time.perf_counter()
+    model_var = ai_ni_bashlat()
+    yuklenme = time.perf_counter() - t0
+    if not model_var:
+        print(f"Lokal model tapılmadı — chat yüngül rejimdə işləyir ({yuklenme:.2f} san)")
+        return
+    t1 = time.perf_counter()
+    _isindir(model_reyestri.aktiv)
+    print(f"Başlanğıc hazırlığı: yükləmə {yuklenme:.2f} san, isinma {time.perf_counter() - t1:.2f} san "
+          f"(paketlər: {ISINMA_PAKETLERI})")
+
 # API istəkləri üçün məlumat strukturları (Pydantic modelləri)
 class Mesaj(BaseModel):
     role: str # 'user' və ya 'assistant'
@@ -73,46 +281,264 @@ class Mesaj(BaseModel):
 
 class ChatIsteyi(BaseModel):
     messages: List[Mesaj]
+    # Generasiya tənzimləmələri (OpenAI formatına uyğun adlar)
+    temperature: float = Field(1.0, ge=0.0, le=5.0) # 0 — həmişə ən ehtimallı simvol
+    top_k: int = Field(0, ge=0)                     # 0 — məhdudiyyət yoxdur
+    top_p: float = Field(1.0, gt=0.0, le=1.0)
+    repetition_penalty: float = Field(1.0, gt=0.0, le=10.0)
+    max_tokens: int = Field(100, ge=1, le=1000)     # Maksimum yeni simvol sayı
+    stop: Optional[Union[str, List[str]]] = None    # Əlavə dayanma ardıcıllıqları (yeni sətir həmişə dayandırır)
+    seed: Optional[int] = None
+    stream: bool = False # True olduqda cavab SSE (server-sent events) ilə parça-parça göndərilir
+
+    def secim_parametrleri(self):
+        return SecimParametrleri(
+            temperatur=self.temperature,
+            top_k=self.top_k,
+            top_p=self.top_p,
+            tekrar_cezasi=self.repetition_penalty,
+            toxum=self.seed,
+        )
+
+    def dayanmalar(self):
+        elave = [self.stop] if isinstance(self.stop, str) else (self.stop or [])
+        return ["\n"] + [d for d in elave if d]
+
+    def tarixce(self):
+        # Bütün söhbət — hər mesaj ayrı sətirdə; cavab da yeni sətirdən başlayır və yeni sətirdə dayanır.
+        # Beləliklə "tarixçə + cavab" növbəti növbənin tarixçəsinin prefiksidir və planlayıcı
+        # əvvəlki növbələrin KV-yaddaşını keşdən bərpa edir.
+        return "\n".join(m.content for m in self.messages) + "\n"
+
+def _generasiya_axini(nusxe, giriş_idləri, istek):
+    """
+    Sorğunu dərhal planlayıcının növbəsinə qoyur (növbə doludursa NovbeDoludur qaldırır) və
+    generasya olunan hadisələri ardıcıl qaytaran async generator verir:
+    ("hisse", mətn) ... ("son", bitmə_səbəbi). Axın yarımçıq qalarsa, sorğu ləğv edilir.
+    """
+    dovr = asyncio.get_running_loop()
+    hadiseler = asyncio.Queue()
+
+    def geri_cagiris(hadise, deyer):
+        # Planlayıcı thread-indən asyncio dövrünə təhlükəsiz ötürürük
+        dovr.call_soon_threadsafe(hadiseler.put_nowait, (hadise, deyer))
+
+    gen_istek = GenerasiyaIsteyi(
+        giriş_idləri, istek.secim_parametrleri(), istek.max_tokens, istek.dayanmalar(), geri_cagiris,
+        vaxt_limiti=VAXT_LIMITI
+    )
+    nusxe.planlayici.gonder(gen_istek)
+    return _hadiseleri_oxu(gen_istek, hadiseler)
+
+async def _hadiseleri_oxu(gen_istek, hadiseler):
+    try:
+        while True:
+            # Planlayıcı özü də vaxt limitini yoxlayır; bu isə uzun addımda ilişib qalmamaq üçün ehtiyatdır
+            qalan = gen_istek.son_vaxt - time.monotonic() + 1 if gen_istek.son_vaxt else None
+            hadise, deyer = await asyncio.wait_for(hadiseler.get(), qalan)
+            if hadise == "vaxt_bitdi":
+                raise asyncio.TimeoutError()
+            if hadise == "xeta":
+                raise RuntimeError(deyer)
+            yield hadise, deyer
+            if hadise == "son":
+                return
+    finally:
+        # Müştəri getdisə və ya xəta oldusa, planlayıcı bu sorğu üçün hesablamanı dayandırır
+        gen_istek.legv_et()
+
+async def _cavab_yarat(nusxe, giriş_idləri, istek):
+    """
+    Cavabı tam generasya edib qaytarır.
+    Qaytarır: (cavab mətni, bitmə səbəbi — 'stop' və ya 'length')
+    """
+    hisseler = []
+    async for hadise, deyer in _generasiya_axini(nusxe, giriş_idləri, istek):
+        if hadise == "hisse":
+            hisseler.append(deyer)
+        else:
+            return "".join(hisseler), deyer
+
+# Lokal model olmadıqda qaytarılan cavab
+RAILWAY_MESAJI = "Salam! Mən hazırda 'Video Düzəlt' rejimində, yüngül (Railway) serverdə işləyirəm. Öz 'Custom Transformer' beynim (PyTorch) bu serverə yüklənməyib. Mənlə real söhbət etmək üçün məni öz kompüterinizdə (Anaconda ilə) çalışdırın və ya 'Video Düzəlt' bölməsindən videomuzu hazırlayaq! 🎬"
+
+def _sse_parcasi(cavab_id, yaradilma, versiya, delta, bitme_sebebi=None):
+    # OpenAI "chat.completion.chunk" formatında bir SSE hadisəsi
+    parca = {
+        "id": cavab_id,
+        "object": "chat.completion.chunk",
+        "created": yaradilma,
+        "model": "ismayil",
+        "model_version": versiya,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": bitme_sebebi}],
+    }
+    return f"data: {json.dumps(parca, ensure_ascii=False)}\n\n"
+
+async def _sse_axini(sorgu: Request, hadise_axini, nusxe=None):
+    """
+    hadise_axini-ndən gələn mətn parçalarını seçildiyi anda SSE "data:" hadisələri kimi göndərir.
+    Müştəri bağlantını kəsərsə, generasiya dövrü dayandırılır. Axın bitəndə model nüsxəsi buraxılır.
+    """
+    cavab_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    yaradilma = int(time.time())
+    versiya = nusxe.versiya if nusxe is not None else None
+    yield _sse_parcasi(cavab_id, yaradilma, versiya, {"role": "assistant"})
+    try:
+        async for hadise, deyer in hadise_axini:
+            if await sorgu.is_disconnected():
+                break
+            if hadise == "hisse":
+                yield _sse_parcasi(cavab_id, yaradilma, versiya, {"content": deyer})
+            else:
+                yield _sse_parcasi(cavab_id, yaradilma, versiya, {}, deyer)
+        else:
+            yield "data: [DONE]\n\n"
+    except Exception as xata:
+        yield f"data: {json.dumps({'error': {'message': str(xata)}}, ensure_ascii=False)}\n\n"
+    finally:
+        # async generatoru bağlamaq planlayıcıdakı sorğunu ləğv edir
+        await hadise_axini.aclose()
+        if nusxe is not None:
+            nusxe.burax()
+
+async def _sabit_axin(metn, bitme_sebebi="stop"):
+    # Model olmadıqda hazır mesajı (və ya keşdəki cavabı) da axın formatında qaytarmaq üçün
+    yield "hisse", metn
+    yield "son", bitme_sebebi
+
+async def _keshe_yazan_axin(acar, hadise_axini):
+    # Axın sonuna qədər oxunarsa, tam cavab keşə yazılır
+    hisseler = []
+    try:
+        async for hadise, deyer in hadise_axini:
+            if hadise == "hisse":
+                hisseler.append(deyer)
+            else:
+                cavab_keshi.qoy(acar, ("".join(hisseler), deyer))
+            yield hadise, deyer
+    finally:
+        await hadise_axini.aclose()
+
+def _sse_cavabi(sorgu: Request, hadise_axini, nusxe=None):
+    # nusxe: axın bitənə qədər tutulan model nüsxəsi (axın onu özü buraxır)
+    return StreamingResponse(
+        _sse_axini(sorgu, hadise_axini, nusxe),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+                 "X-Model-Version": nusxe.versiya if nusxe is not None else ""},
+    )
 
 @ismayil_server.get("/")
 async def ana_sehife():
     # Serverin aktiv olub-olmadığını yoxlamaq üçün kiçik endpoint
     return {"status": "online", "model": "İsmayıl Custom Transformer"}
 
+@ismayil_server.get("/ready")
+async def hazirliq_yoxlamasi():
+    # Sağlamlıq yoxlaması (health check) üçün: model yüklənib isindirilənə qədər 503 qaytarır
+    if not _hazirliq.is_set():
+        raise HTTPException(status_code=503, detail="Model hələ yüklənir", headers={"Retry-After": "5"})
+    nusxe = model_reyestri.aktiv
+    return {"status": "ready", "model_loaded": nusxe is not None,
+            "model_version": nusxe.versiya if nusxe is not None else None}
+
+@ismayil_server.get("/cache/stats")
+async def kesh_statistikasi():
+    # Cavab keşinin isabət/qaçırma sayğacları
+    return cavab_keshi.statistika()
+
+@ismayil_server.post("/admin/reload")
+async def modeli_yenile(sorgu: Request):
+    """
+    Manifest-dəki yeni versiyanı arxa planda yükləyib isindirir və aktiv modeli dəyişdirir.
+    X-Admin-Token başlığı ISMAYIL_ADMIN_TOKEN ilə eyni olmalıdır (token təyin edilməyibsə endpoint söndürülüb).
+    """
+    # compare_digest: müqayisə müddəti tokenin neçə simvolunun düz olduğunu bildirmir
+    token = sorgu.headers.get("X-Admin-Token", "").encode()
+    if not ADMIN_TOKENI or not hmac.compare_digest(token, ADMIN_TOKENI.encode()):
+        raise HTTPException(status_code=403, detail="İcazə yoxdur")
+    if not _hazirliq.is_set():
+        raise HTTPException(status_code=503, detail="Model hələ yüklənir", headers={"Retry-After": "5"})
+    try:
+        evvelki, yeni = await asyncio.to_thread(yeniden_yukle)
+    except RuntimeError as xata:
+        raise HTTPException(status_code=409, detail=str(xata))
+    except ValueError as xata: # Checksum və ya fayl uyğunsuzluğu — aktiv model dəyişmir
+        raise HTTPException(status_code=422, detail=str(xata))
+    return {"previous_version": evvelki, "model_version": yeni or evvelki, "reloaded": yeni is not None}
+
 @ismayil_server.post("/v1/chat/completions")
-async def chat_cavabi(istek: ChatIsteyi):
+async def chat_cavabi(istek: ChatIsteyi, sorgu: Request):
     """
     Bu əsas hissədir. İstifadəçidən gələn mesajı AI-yə göndərir və cavab alır.
+    stream=true olduqda cavab OpenAI formatında SSE parçaları ilə göndərilir.
     """
-    # AI-nin hazır olub-olmadığını yoxlayırıq
-    if not ai_ni_bashlat():
+    # AI-nin hazır olub-olmadığını yoxlayırıq — yükləmə hələ bitməyibsə, onu gözləyirik
+    global _ilk_sorgu_olculub
+    sorgu_bashlangici = time.perf_counter()
+    if not _hazirliq.is_set():
+        try:
+            await asyncio.wait_for(_hazirliq.wait(), VAXT_LIMITI)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Model hələ yüklənir", headers={"Retry-After": "5"})
+    # Aktiv versiyanı götürürük: cavab tam hazır olana qədər (axında — axın bitənə qədər) bu nüsxə işləyir
+    nusxe = model_reyestri.tut()
+    if nusxe is None:
+        if istek.stream:
+            return _sse_cavabi(sorgu, _sabit_axin(RAILWAY_MESAJI))
         # Railway-də lokal model yoxdursa "bağışlayın" mock cavabı qaytarırıq (xəta verməkdən yaxşıdır)
         return {
             "choices": [
                 {
                     "message": {
                         "role": "assistant",
-                        "content": "Salam! Mən hazırda 'Video Düzəlt' rejimində, yüngül (Railway) serverdə işləyirəm. Öz 'Custom Transformer' beynim (PyTorch) bu serverə yüklənməyib. Mənlə real söhbət etmək üçün məni öz kompüterinizdə (Anaconda ilə) çalışdırın və ya 'Video Düzəlt' bölməsindən videomuzu hazırlayaq! 🎬"
+                        "content": RAILWAY_MESAJI
                     }
                 }
-            ]
+            ],
+            "model_version": None
         }
-        
+
+    axina_verildi = False # Axın cavabında nüsxəni axın özü buraxır
     try:
-        # İstifadəçinin son göndərdiyi sualı götürürük
-        son_mesaj = istek.messages[-1].content
+        # Bütün söhbət tarixçəsini götürürük (planlayıcı onu kontekst büdcəsinə sığdırır)
+        sohbet = istek.tarixce()
         
         # Mətni rəqəmlərə (tokenlərə) çeviririk
-        giriş_idləri = torch.tensor([tokenizator.kodlasdir(son_mesaj)], dtype=torch.long, device=cihaz)
+        giriş_idləri = nusxe.tokenizator.kodlasdir(sohbet)
+
+        # Greedy və ya seed-li sorğular deterministikdir — cavabı keşdən götürmək olar.
+        # Açar cavabı verəcək nüsxənin versiyası ilə qurulur (yeniləmə zamanı köhnə cavab yeni versiyaya yazılmasın)
+        acar = None
+        if istek.secim_parametrleri().deterministikdir and cavab_keshi.maks_olcu > 0:
+            acar = cavab_keshi.acar(giriş_idləri, istek.secim_parametrleri(), istek.max_tokens, istek.dayanmalar(),
+                                    versiya=nusxe.versiya)
+
+        if istek.stream:
+            if acar is not None:
+                kesh_cavabi = cavab_keshi.axin_ucun_al(acar)
+                if kesh_cavabi is not None:
+                    axin = _sabit_axin(*kesh_cavabi)
+                else:
+                    axin = _keshe_yazan_axin(acar, _generasiya_axini(nusxe, giriş_idləri, istek))
+            else:
+                # Hər parça seçildiyi anda müştəriyə göndərilir
+                axin = _generasiya_axini(nusxe, giriş_idləri, istek)
+            # Sorğu planlayıcıya qəbul olundu (NovbeDoludur olmadı) — nüsxəni bundan sonra axın özü buraxır
+            axina_verildi = True
+            return _sse_cavabi(sorgu, axin, nusxe)
         
-        # AI-dən yeni simvollar generasya etməsini istəyirik
-        with torch.no_grad():
-            # generate() yerinə yeni_metn_yarat() istifadə edirik (model.py-da adını dəyişmişik)
-            butun_idlar = ismayil_modeli.yeni_metn_yarat(giriş_idləri, maksimum_yeni_simvol=100)
-            # Yalnız AI-nin yaratdığı hissəni kəsib götürürük (giriş mətnini çıxarıq)
-            cavab_idlari = butun_idlar[0][len(giriş_idləri[0]):].tolist()
-            # Rəqəmləri yenidən başa düşülən mətnə çeviririk
-            cavab_metni = tokenizator.de_kodlasdir(cavab_idlari)
+        # AI-dən yeni simvollar generasya etməsini istəyirik (planlayıcı digər sorğularla birlikdə paketləyir)
+        if acar is not None:
+            # Eyni anda gələn eyni sorğular bir generasiyada birləşdirilir
+            cavab_metni, bitme_sebebi = await cavab_keshi.al_ve_ya_hesabla(
+                acar, lambda: _cavab_yarat(nusxe, giriş_idləri, istek)
+            )
+        else:
+            cavab_metni, bitme_sebebi = await _cavab_yarat(nusxe, giriş_idləri, istek)
+        if not _ilk_sorgu_olculub:
+            _ilk_sorgu_olculub = True
+            print(f"İlk chat sorğusu {time.perf_counter() - sorgu_bashlangici:.3f} saniyəyə cavablandı")
             
         # OpenAI formatına uyğun cavab qaytarırıq (Frontend bunu gözləyir)
         return {
@@ -121,62 +547,72 @@ async def chat_cavabi(istek: ChatIsteyi):
                     "message": {
                         "role": "assistant",
                         "content": cavab_metni
-                    }
+                    },
+                    "finish_reason": bitme_sebebi
                 }
-            ]
+            ],
+            "model_version": nusxe.versiya
         }
+    except NovbeDoludur:
+        # Server yüklüdür — müştəri bir az sonra yenidən cəhd etsin
+        raise HTTPException(
+            status_code=503,
+            detail="Server hazırda çox yüklüdür, bir az sonra yenidən cəhd edin.",
+            headers={"Retry-After": "1"}
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Cavabın hazırlanması vaxt limitini aşdı.")
     except Exception as xata:
         raise HTTPException(status_code=500, detail=str(xata))
+    finally:
+        if not axina_verildi:
+            nusxe.burax()
 
 # ═══════════════════════════════════════════════════════════
 # 🎬 VİDEO DÜZƏLTMƏ ENDPOINT-LƏRİ (Kaggle + Stable Diffusion)
 # ═══════════════════════════════════════════════════════════
 
-@ismayil_server.post("/video/edit")
-async def video_duzelт(
-    video: UploadFile = File(..., description="Düzəldiləcək video fayl (mp4, avi, mov)"),
-    prompt: str = Form(..., description="Necə görünsün? Məs: 'oil painting style, colorful'")
-):
-    """
-    Video faylı və prompt qəbul edib Kaggle-a emal üçün göndərir.
-    Dərhal iş ID-si qaytarır — status-u /video/status/{job_id} ilə izləyin.
-    """
-    # Fayl növünü yoxlayırıq
+def _video_faylini_yoxla(fayl_adi, content_type):
+    # Fayl növünü yoxlayırıq (məzmun oxunmazdan əvvəl)
     icaze_verilmis = {"video/mp4", "video/avi", "video/quicktime", "video/x-msvideo"}
-    if video.content_type and video.content_type not in icaze_verilmis:
+    if content_type and content_type not in icaze_verilmis:
         # Content-type həmişə dəqiq olmur, buna görə adını da yoxlayırıq
-        ad = (video.filename or "").lower()
+        ad = fayl_adi.lower()
         if not any(ad.endswith(x) for x in [".mp4", ".avi", ".mov", ".mkv"]):
-            raise HTTPException(
-                status_code=400,
-                detail="Yalnız video faylları (mp4, avi, mov, mkv) qəbul edilir."
-            )
-    
-    # Video məzmununu oxuyuruq
-    video_bytes = await video.read()
-    
-    if len(video_bytes) == 0:
-        raise HTTPException(status_code=400, detail="Boş fayl göndərildi.")
-    
-    # Maksimum ölçü yoxlanışı (500 MB)
-    max_olchu = 500 * 1024 * 1024
-    if len(video_bytes) > max_olchu:
-        raise HTTPException(
-            status_code=413,
-            detail=f"Fayl həddən böyükdür. Maksimum: 500 MB, Göndərilən: {len(video_bytes)//1024//1024} MB"
-        )
-    
+            raise YuklemeXetasi(400, "Yalnız video faylları (mp4, avi, mov, mkv) qəbul edilir.")
+
+@ismayil_server.post("/video/edit")
+async def video_duzelт(sorgu: Request):
+    """
+    Video faylı ("video" sahəsi) və prompt qəbul edib Kaggle-a emal üçün göndərir.
+    Video hissə-hissə birbaşa video_jobs/<id>/ qovluğuna yazılır: ölçü həddi (standart 500 MB) yükləmə zamanı yoxlanılır,
+    sha256 yolda hesablanır. Dərhal iş ID-si qaytarır — status-u /video/status/{job_id} ilə izləyin.
+    """
+    is_id, is_qovlugu = yeni_is_qovlugu()
+    try:
+        saheler, video = await multipart_yukle(sorgu, "video", is_qovlugu, MAKS_VIDEO_OLCUSU, _video_faylini_yoxla)
+        prompt = saheler.get("prompt", "").strip()
+        if not prompt:
+            raise YuklemeXetasi(422, "'prompt' sahəsi tələb olunur.")
+    except YuklemeXetasi as xata:
+        shutil.rmtree(is_qovlugu, ignore_errors=True)
+        raise HTTPException(status_code=xata.status_kodu, detail=str(xata))
+    except BaseException:
+        # Müştəri bağlantını kəsdi və s. — yarımçıq iş qovluğu qalmasın
+        shutil.rmtree(is_qovlugu, ignore_errors=True)
+        raise
+
     # Kaggle-a iş göndəririk
-    is_id = is_gondər(
-        video_bytes=video_bytes,
-        prompt=prompt,
-        fayl_adi=video.filename or "video.mp4"
-    )
+    # Diskdə video.<uzantı> adı ilə saxlanılır; müştərinin fayl adı yalnız məlumat kimi ötürülür
+    is_gondər(is_id, video.yol, prompt, olcu=video.olcu, sha256=video.sha256, orijinal_ad=video.ad)
     
     return {
         "success": True,
         "job_id": is_id,
         "message": "Video emal üçün qəbul edildi!",
+        "size_bytes": video.olcu,
+        "sha256": video.sha256,
+        "filename": video.ad,
         "kaggle_telimat": (
             f"📋 Kaggle Notebook-a gedin → video_jobs/{is_id}/ qovluğundakı video + prompt.txt fayllarını "
             f"Kaggle Dataset-ə yükləyin → video_edit_worker.py notebook-unu işlədin → "
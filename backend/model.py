@@ -1,67 +1,419 @@
+import re
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
+
 import torch
 import torch.nn as nn
 from torch.nn import functional as F
 
-# Hiperparametrlər (Modelin ölçüsünü və gücünü müəyyən edən sabitlər)
+# Standart hiperparametrlər (Modelin ölçüsünü və gücünü müəyyən edən sabitlər).
+# Modullar bunları birbaşa oxumur — hər model öz ModelKonfiqurasiyasi obyekti ilə qurulur
 yerlesdirme_olcusu = 128 # n_embd: Hər bir simbolun neçə rəqəmlə təmsil olunacağı
 bash_sayi = 4            # n_head: Diqqət mexanizminin neçə paralel hissədən ibarət olacağı
 lay_sayi = 4             # n_layer: Transformer bloklarının sayı (dərinlik)
 atilan_melumat = 0.1     # dropout: Modelin çox öyrənib əzbərləməməsi üçün bəzi məlumatları təsadüfi silmə dərəcəsi
 blok_olcusu = 64         # block_size: Bir dəfəyə baxılan maksimum mətni uzunluğu (kontekst)
 
-class DiqqetBashi(nn.Module):
-    """ 
-    Bu sinif "Self-Attention" (Özünə Diqqət) mexanizminin bir hissəsidir.
-    AI mətn içindəki sözlərin bir-biri ilə necə əlaqəli olduğunu bura vasitəsilə başa düşür.
+# Mövqe məlumatının növləri:
+#   mutleq   — öyrənilən mövqe cədvəli (movqe_cedveli), kontekst blok_olcusu ilə məhduddur
+#   firlanma — fırlanan mövqe kodlaşdırması (RoPE) + sürüşən pəncərəli diqqət, kontekst limitsizdir
+MOVQE_NOVLERI = ('mutleq', 'firlanma')
+
+@dataclass(frozen=True)
+class ModelKonfiqurasiyasi:
     """
-    def __init__(self, bash_olcusu):
-        super().__init__()
-        self.acharlar = nn.Linear(yerlesdirme_olcusu, bash_olcusu, bias=False) # Key
-        self.sorgular = nn.Linear(yerlesdirme_olcusu, bash_olcusu, bias=False) # Query
-        self.deyerler = nn.Linear(yerlesdirme_olcusu, bash_olcusu, bias=False) # Value
-        # Gələcəkdəki sözləri görməmək üçün maskalama üçbucağı (Lower triangular matrix)
-        self.register_buffer('maska', torch.tril(torch.ones(blok_olcusu, blok_olcusu)))
-        self.seyriltme = nn.Dropout(atilan_melumat)
+    Modelin memarlığı. Bütün modullara ötürülür və çəkilərlə birlikdə saxlanılır ki,
+    yükləyən tərəf (main.py, evaluate.py) eyni ölçülü modeli avtomatik qursun.
+    pencere: 'firlanma' rejimində hər simvolun baxdığı maksimum keçmiş simvol sayı (None — blok_olcusu)
+    """
+    luget_olcusu: int
+    yerlesdirme_olcusu: int = yerlesdirme_olcusu
+    bash_sayi: int = bash_sayi
+    lay_sayi: int = lay_sayi
+    blok_olcusu: int = blok_olcusu
+    atilan_melumat: float = atilan_melumat
+    movqe_novu: str = 'mutleq'
+    pencere: Optional[int] = None
 
-    def forward(self, x):
-        B, T, C = x.shape
-        k = self.acharlar(x)   # (B, T, bash_olcusu)
-        q = self.sorgular(x) # (B, T, bash_olcusu)
-        
-        # Diqqət ballarının hesablanması (Hansı söz hansına daha çox fokuslanmalıdır?)
-        bali = q @ k.transpose(-2, -1) * C**-0.5 # (B, T, C) @ (B, C, T) -> (B, T, T)
-        bali = bali.masked_fill(self.maska[:T, :T] == 0, float('-inf')) # Gələcəyi bağla
-        bali = F.softmax(bali, dim=-1) # Ehtimallara çevir
-        bali = self.seyriltme(bali)
-        
-        # Dəyərlərin bu ballar əsasında birləşdirilməsi
-        v = self.deyerler(x) # (B, T, bash_olcusu)
-        sonuc = bali @ v    # (B, T, T) @ (B, T, bash_olcusu) -> (B, T, bash_olcusu)
-        return sonuc
+    def __post_init__(self):
+        if self.movqe_novu not in MOVQE_NOVLERI:
+            raise ValueError(f"Naməlum mövqe növü: {self.movqe_novu}. Mümkün olanlar: {', '.join(MOVQE_NOVLERI)}")
+        if self.yerlesdirme_olcusu % self.bash_sayi:
+            raise ValueError(f"yerlesdirme_olcusu ({self.yerlesdirme_olcusu}) bash_sayi-ya ({self.bash_sayi}) bölünməlidir")
+        if self.pencere is None:
+            object.__setattr__(self, 'pencere', self.blok_olcusu)
+
+    @property
+    def bash_olcusu(self):
+        return self.yerlesdirme_olcusu // self.bash_sayi
+
+    def lugete(self):
+        return asdict(self)
+
+    @classmethod
+    def lugetden(cls, melumat):
+        # Sonradan əlavə olunmuş/silinmiş sahələr köhnə faylların yüklənməsinə mane olmasın
+        adlar = {f.name for f in fields(cls)}
+        return cls(**{ad: deyer for ad, deyer in melumat.items() if ad in adlar})
+
+    @classmethod
+    def cekilerden(cls, ceki):
+        """
+        Konfiqurasiyası saxlanılmamış köhnə checkpoint-lər üçün: ölçülər tenzorların formasından çıxarılır.
+        Başlıq sayı formadan bilinmir — standart dəyər (4) götürülür.
+        """
+        luget_olcusu, C = ceki['simvol_cedveli.weight'].shape
+        laylar = {int(m.group(1)) for ad in ceki if (m := re.match(r'bloklar\.(\d+)\.', ad))}
+        movqe_novu = movqe_novunu_mueyyen_et(ceki)
+        parametrler = dict(luget_olcusu=luget_olcusu, yerlesdirme_olcusu=C, lay_sayi=len(laylar), movqe_novu=movqe_novu)
+        if movqe_novu == 'mutleq':
+            parametrler['blok_olcusu'] = ceki['movqe_cedveli.weight'].shape[0]
+        return cls(**parametrler)
+
+# Köhnə (ingiliscə) çəki adlarından yeni Azərbaycan adlarına xəritə
+KOHNE_AD_XERITESI = {
+    'token_embedding_table': 'simvol_cedveli',
+    'position_embedding_table': 'movqe_cedveli',
+    'blocks': 'bloklar',
+    'sa.heads': 'diqqet.bashlar',
+    'sa.proj': 'diqqet.proyeksiya',
+    'sa.dropout': 'diqqet.seyriltme',
+    'ffwd.net.0': 'hesablama.shabaka.0',
+    'ffwd.net.2': 'hesablama.shabaka.2',
+    'ffwd.net.3': 'hesablama.shabaka.3',
+    'ln1': 'norma1',
+    'ln2': 'norma2',
+    'ln_f': 'son_norma',
+    'lm_head': 'bash_qati'
+}
+
+# Ayrı-ayrı başlıqların proyeksiya adları (həm yeni, həm də köhnə ingiliscə adlar)
+_BASHLIQ_PROYEKSIYALARI = {
+    'sorgular': 0, 'query': 0,
+    'acharlar': 1, 'key': 1,
+    'deyerler': 2, 'value': 2,
+}
+
+def kohne_cekileri_uygunlashdir(ceki):
+    """
+    Köhnə checkpoint-ləri (hər başlığın ayrıca açar/sorğu/dəyər qatı olan) birləşdirilmiş qkv
+    formatına çevirir. Həm orijinal ingiliscə adlı, həm də remap_weights.py ilə yenidən
+    adlandırılmış fayllar dəstəklənir. Artıq yeni formatda olan çəkilər olduğu kimi qaytarılır.
+    """
+    yeni_ceki = {}
+    bashliqlar = {} # (qat_prefiksi, başlıq, proyeksiya) -> çəki
+    for ad, deyer in ceki.items():
+        for ingilisce, azerbaycanca in KOHNE_AD_XERITESI.items():
+            ad = ad.replace(ingilisce, azerbaycanca)
+        if '.diqqet.bashlar.' not in ad:
+            yeni_ceki[ad] = deyer
+            continue
+        # Məs: bloklar.0.diqqet.bashlar.3.acharlar.weight
+        prefiks, qalan = ad.split('.diqqet.bashlar.')
+        bash, proyeksiya = qalan.split('.')[:2]
+        if proyeksiya in _BASHLIQ_PROYEKSIYALARI:
+            bashliqlar[(prefiks, int(bash), _BASHLIQ_PROYEKSIYALARI[proyeksiya])] = deyer
+        # Maska buferləri (maska/tril) artıq lazım deyil — diqqət funksiyası özü maskalayır
+
+    for prefiks in sorted({p for p, _, _ in bashliqlar}):
+        bash_sayi_ = 1 + max(b for p, b, _ in bashliqlar if p == prefiks)
+        # Sıra: əvvəl bütün başlıqların sorğuları, sonra açarları, sonra dəyərləri
+        hisseler = [bashliqlar[(prefiks, b, nov)] for nov in range(3) for b in range(bash_sayi_)]
+        yeni_ceki[f'{prefiks}.diqqet.qkv.weight'] = torch.cat(hisseler, dim=0)
+    return yeni_ceki
+
+def movqe_novunu_mueyyen_et(ceki):
+    # Checkpoint-də mövqe cədvəli yoxdursa, model fırlanan mövqelərlə öyrədilib
+    if any(ad.endswith(('movqe_cedveli.weight', 'position_embedding_table.weight')) for ad in ceki):
+        return 'mutleq'
+    return 'firlanma'
+
+def cekileri_saxla(model, yol):
+    """Çəkiləri konfiqurasiya ilə birlikdə .pth faylına yazır: {'konfiq': {...}, 'model': state_dict}."""
+    torch.save({'konfiq': model.konfiq.lugete(), 'model': model.state_dict()}, yol)
+
+def cekileri_yukle(yol, map_location='cpu'):
+    """
+    .pth faylını oxuyur. Qaytarır: (state_dict, ModelKonfiqurasiyasi).
+    Köhnə fayllarda (yalnız state_dict) konfiqurasiya çəkilərin formasından çıxarılır.
+    """
+    yuklenmish = torch.load(yol, map_location=map_location)
+    if 'konfiq' in yuklenmish and 'model' in yuklenmish:
+        return yuklenmish['model'], ModelKonfiqurasiyasi.lugetden(yuklenmish['konfiq'])
+    ceki = kohne_cekileri_uygunlashdir(yuklenmish)
+    return ceki, ModelKonfiqurasiyasi.cekilerden(ceki)
+
+def modeli_yukle_pth(yol, map_location='cpu'):
+    """Saxlanılmış konfiqurasiyaya uyğun IsmayilModeli qurub çəkiləri yükləyir (eval rejimində)."""
+    ceki, konfiq = cekileri_yukle(yol, map_location)
+    model = IsmayilModeli(konfiq)
+    model.load_state_dict(ceki)
+    return model.to(map_location).eval()
+
+# Inference üçün mövcud hesablama dəqiqlikləri
+DEQIQLIK_REJIMLERI = ('fp32', 'bf16', 'int8')
+
+def deqiqliyi_tetbiq_et(model, rejim='fp32'):
+    """
+    Öyrədilmiş modeli seçilmiş dəqiqliklə inference üçün hazırlayır:
+      fp32 — dəyişiklik yoxdur
+      bf16 — bütün çəkilər və hesablamalar bfloat16-da (yaddaş yarıya düşür)
+      int8 — nn.Linear qatları (qkv, proyeksiya, İrəli Bəsləmə, bash_qati) dinamik int8 kvantlaşdırılır (yalnız CPU)
+    """
+    if rejim == 'fp32':
+        return model
+    if rejim == 'bf16':
+        return model.to(torch.bfloat16)
+    if rejim == 'int8':
+        return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    raise ValueError(f"Naməlum dəqiqlik rejimi: {rejim}. Mümkün olanlar: {', '.join(DEQIQLIK_REJIMLERI)}")
+
+class KVKesh:
+    """
+    Artımlı (incremental) generasiya üçün açar/dəyər yaddaşı.
+    Hər qat və hər başlıq üçün əvvəlki simvolların açar (key) və dəyər (value) tenzorlarını
+    əvvəlcədən ayrılmış buferdə saxlayır ki, hər addımda bütün konteksti yenidən hesablamayaq.
+    Hər sətrin (ardıcıllığın) öz uzunluğu olur — fərqli vaxtda başlamış sorğular eyni paketdə ola bilər.
+    """
+    def __init__(self, konfiq, paket, tutum, cihaz=None, dtype=torch.float32):
+        forma = (konfiq.lay_sayi, paket, konfiq.bash_sayi, tutum, konfiq.bash_olcusu)
+        self.tutum = tutum # Yaddaşa sığan maksimum simvol sayı (adətən blok_olcusu)
+        self.acharlar = torch.zeros(forma, device=cihaz, dtype=dtype)
+        self.deyerler = torch.zeros(forma, device=cihaz, dtype=dtype)
+        self.uzunluqlar = torch.zeros(paket, dtype=torch.long, device=cihaz) # Hər sətirdə yadda olan simvol sayı
+
+    @property
+    def uzunluq(self):
+        # Ən uzun sətirdə yadda olan simvolların sayı
+        return int(self.uzunluqlar.max())
+
+    def sifirla(self, setirler=None):
+        # Yaddaşı (və ya yalnız verilmiş sətirləri) boşaldırıq — buferlər yenidən istifadə olunur
+        if setirler is None:
+            self.uzunluqlar.zero_()
+        else:
+            self.uzunluqlar[setirler] = 0
+
+    def addima_hazirla(self, T, setirler=None):
+        """
+        Seçilmiş sətirlərə T yeni simvol əlavə etməyə hazırlaşır.
+        Qaytarır: yeni simvolların mövqeləri (B, T).
+        """
+        cihaz = self.uzunluqlar.device
+        if setirler is None:
+            setirler = torch.arange(self.uzunluqlar.shape[0], device=cihaz)
+        self._setirler = setirler
+        self._movqeler = self.uzunluqlar[setirler][:, None] + torch.arange(T, device=cihaz)
+        self._L = int(self._movqeler.max()) + 1
+        # Hər yeni simvol yalnız öz mövqeyinə qədər olan açarlara baxa bilər: (B, 1, T, L)
+        self._maska = (torch.arange(self._L, device=cihaz)[None, None, :] <= self._movqeler[:, :, None])[:, None]
+        return self._movqeler
+
+    def yaz_ve_oxu(self, lay, k, v):
+        """
+        k, v: (B, bash_sayi, T, bash_olcusu) — yeni açar/dəyərləri yaddaşa yazır.
+        Qaytarır: bütün keçmişlə birlikdə açarlar, dəyərlər və diqqət maskası.
+        """
+        setir = self._setirler[:, None].expand_as(self._movqeler)
+        self.acharlar[lay][setir, :, self._movqeler] = k.transpose(1, 2)
+        self.deyerler[lay][setir, :, self._movqeler] = v.transpose(1, 2)
+        k = self.acharlar[lay][self._setirler, :, :self._L]
+        v = self.deyerler[lay][self._setirler, :, :self._L]
+        return k, v, self._maska
+
+    def addimi_bitir(self):
+        self.uzunluqlar[self._setirler] += self._movqeler.shape[1]
+
+    def geri_al(self, say):
+        # Son addımda yazılmış simvollardan son `say`-ını unuduruq (spekulyativ generasiyada rədd olunanlar).
+        # Buferdəki dəyərlər silinmir — növbəti addımda onların üstünə yazılır
+        self.uzunluqlar[self._setirler] -= say
+
+    def doludur(self, setir):
+        # Mütləq mövqelərdə yaddaş dolduqda kontekst yenidən hesablanmalıdır
+        return int(self.uzunluqlar[setir]) >= self.tutum
+
+class SurusenKVKesh:
+    """
+    Sürüşən pəncərəli diqqət üçün dairəvi (ring) açar/dəyər yaddaşı.
+    Hər simvol yalnız son `pencere` simvola baxdığı üçün yaddaşda da yalnız onlar saxlanılır:
+    mövqe p olan simvol p % pencere yuvasına yazılır, köhnəsinin üstünə. Fırlanan mövqelər
+    nisbi olduğu üçün yaddaş heç vaxt "dolmur" və yenidən hesablama lazım olmur.
+    KVKesh ilə eyni interfeysə malikdir.
+    """
+    def __init__(self, konfiq, paket, pencere, cihaz=None, dtype=torch.float32):
+        forma = (konfiq.lay_sayi, paket, konfiq.bash_sayi, pencere, konfiq.bash_olcusu)
+        self.tutum = pencere
+        self.acharlar = torch.zeros(forma, device=cihaz, dtype=dtype)
+        self.deyerler = torch.zeros(forma, device=cihaz, dtype=dtype)
+        # Hər yuvadakı simvolun mütləq mövqeyi (-1 — boş yuva)
+        self.yuva_movqeleri = torch.full((paket, pencere), -1, dtype=torch.long, device=cihaz)
+        self.uzunluqlar = torch.zeros(paket, dtype=torch.long, device=cihaz) # Hər sətirdə indiyə qədər işlənmiş simvol sayı
+
+    @property
+    def uzunluq(self):
+        return int(self.uzunluqlar.max())
+
+    def sifirla(self, setirler=None):
+        if setirler is None:
+            self.uzunluqlar.zero_()
+            self.yuva_movqeleri.fill_(-1)
+        else:
+            self.uzunluqlar[setirler] = 0
+            self.yuva_movqeleri[setirler] = -1
+
+    def doludur(self, setir):
+        return False
+
+    def addima_hazirla(self, T, setirler=None):
+        cihaz = self.uzunluqlar.device
+        if setirler is None:
+            setirler = torch.arange(self.uzunluqlar.shape[0], device=cihaz)
+        W = self.tutum
+        self._setirler = setirler
+        self._movqeler = self.uzunluqlar[setirler][:, None] + torch.arange(T, device=cihaz) # (B, T)
+        # Yaddaşdakı açarlar: boş olmayan və pəncərəyə düşən yuvalar
+        yuvalar = self.yuva_movqeleri[setirler] # (B, W)
+        mesafe = self._movqeler[:, :, None] - yuvalar[:, None, :]
+        kohne_maska = (yuvalar[:, None, :] >= 0) & (mesafe < W)
+        # Yeni açarlar: səbəbli və pəncərə daxilində
+        i = torch.arange(T, device=cihaz)
+        yeni_maska = (i[None, :] <= i[:, None]) & (i[:, None] - i[None, :] < W)
+        self._maska = torch.cat([kohne_maska, yeni_maska.expand(len(setirler), T, T)], dim=-1)[:, None] # (B, 1, T, W+T)
+        # Yaddaşa yalnız son W simvol yazılır (qalanlarını onsuz da heç kim görməyəcək)
+        self._yazilan = slice(max(0, T - W), T)
+        self._yuvalar = self._movqeler[:, self._yazilan] % W
+        # geri_al() üçün: üstünə yazılan yuvaların əvvəlki mövqeləri və (hər qatda) açar/dəyərləri
+        self._evvelki_yuvalar = yuvalar
+        self._evvelki = []
+        return self._movqeler
+
+    def yaz_ve_oxu(self, lay, k, v):
+        # Əvvəlcə köhnə yaddaşı oxuyuruq (yeni simvollar eyni yuvaların üstünə yaza bilər)
+        kohne_k = self.acharlar[lay][self._setirler]
+        kohne_v = self.deyerler[lay][self._setirler]
+        self._evvelki.append((kohne_k, kohne_v))
+        setir = self._setirler[:, None].expand_as(self._yuvalar)
+        self.acharlar[lay][setir, :, self._yuvalar] = k[:, :, self._yazilan].transpose(1, 2)
+        self.deyerler[lay][setir, :, self._yuvalar] = v[:, :, self._yazilan].transpose(1, 2)
+        return torch.cat([kohne_k, k], dim=2), torch.cat([kohne_v, v], dim=2), self._maska
+
+    def addimi_bitir(self):
+        setir = self._setirler[:, None].expand_as(self._yuvalar)
+        self.yuva_movqeleri[setir, self._yuvalar] = self._movqeler[:, self._yazilan]
+        self.uzunluqlar[self._setirler] += self._movqeler.shape[1]
+
+    def geri_al(self, say):
+        """
+        Son `say` simvolu geri alır (spekulyativ generasiyada rədd olunanlar).
+        Son addımda yazılanların yuvalarına əvvəlki açar/dəyərlər qaytarılır. Bu yalnız addımda pəncərədən
+        çox simvol olmayanda (T <= pencere) dəqiqdir — daha uzun addımda köhnə yuvaların məzmunu yaddaşda
+        saxlanılmır, ona görə belə addımı geri almaq olmaz. Daha əvvəlki addımların simvolları sadəcə
+        unudulur: onların üstünə yazılmış köhnə açarlar itir. Bu yalnız bir neçə addımla təklif edən qaralama
+        modelində baş verir və təkliflərə təsir edir, nəticənin paylanmasına yox; əsas model hər dəfə
+        yalnız son yoxlama addımını geri alır.
+        """
+        if say <= 0:
+            return
+        assert self._movqeler.shape[1] <= self.tutum, "Pəncərədən uzun addımı geri almaq olmaz"
+        son = min(say, self._yuvalar.shape[1])
+        yuvalar = self._yuvalar[:, self._yuvalar.shape[1] - son:]
+        setir = self._setirler[:, None].expand_as(yuvalar)
+        sira = torch.arange(len(self._setirler), device=yuvalar.device)[:, None].expand_as(yuvalar)
+        for lay, (kohne_k, kohne_v) in enumerate(self._evvelki):
+            self.acharlar[lay][setir, :, yuvalar] = kohne_k[sira, :, yuvalar]
+            self.deyerler[lay][setir, :, yuvalar] = kohne_v[sira, :, yuvalar]
+        self.yuva_movqeleri[setir, yuvalar] = self._evvelki_yuvalar.gather(1, yuvalar)
+        self.uzunluqlar[self._setirler] -= say
+        if say > son:
+            unudulan = self.uzunluqlar[self._setirler][:, None] + torch.arange(say - son, device=yuvalar.device)
+            self.yuva_movqeleri[self._setirler[:, None].expand_as(unudulan), unudulan % self.tutum] = -1
+
+    def veziyyeti_gotur(self, setir):
+        """Bir sətrin yaddaşının surəti — söhbətin növbəti növbəsində prefiks kimi bərpa etmək üçün."""
+        return (self.acharlar[:, setir].clone(), self.deyerler[:, setir].clone(),
+                self.yuva_movqeleri[setir].clone(), self.uzunluqlar[setir].clone())
+
+    def veziyyeti_yukle(self, setir, veziyyet):
+        acharlar, deyerler, yuva_movqeleri, uzunluq = veziyyet
+        self.acharlar[:, setir] = acharlar
+        self.deyerler[:, setir] = deyerler
+        self.yuva_movqeleri[setir] = yuva_movqeleri
+        self.uzunluqlar[setir] = uzunluq
+
+def firlanma_bucaqlari(movqeler, bash_olcusu):
+    """
+    Fırlanan mövqe kodlaşdırması (RoPE) üçün cos/sin cədvəlləri.
+    movqeler: (T,) və ya (B, T) -> (T, bash_olcusu/2) və ya (B, 1, T, bash_olcusu/2)
+    Tezliklər hər dəfə fp32-də hesablanır ki, bf16 rejimində də mövqelər dəqiq qalsın.
+    """
+    tezlikler = 10000.0 ** (-torch.arange(0, bash_olcusu, 2, device=movqeler.device).float() / bash_olcusu)
+    bucaqlar = movqeler[..., None].float() * tezlikler
+    if bucaqlar.dim() == 3:
+        bucaqlar = bucaqlar[:, None] # Başlıqlar üzrə yayılması üçün
+    return bucaqlar.cos(), bucaqlar.sin()
+
+def _firlat(x, cos, sin):
+    # Hər vektorun iki yarısını mövqeyə uyğun bucaq qədər fırladırıq
+    x1, x2 = x.chunk(2, dim=-1)
+    cos, sin = cos.to(x.dtype), sin.to(x.dtype)
+    return torch.cat([x1 * cos - x2 * sin, x1 * sin + x2 * cos], dim=-1)
 
 class ChoxBashliDiqqet(nn.Module):
-    """ Bir neçə diqqət başlığının paralel işləməsini təmin edir. """
-    def __init__(self, bash_sayi, bash_olcusu):
+    """
+    Bir neçə diqqət başlığının paralel işləməsini təmin edir.
+    Bütün başlıqların açar/sorğu/dəyər proyeksiyaları tək bir matris vurmasında (qkv) birləşdirilib,
+    diqqətin özü isə F.scaled_dot_product_attention ilə hesablanır.
+    """
+    def __init__(self, konfiq):
         super().__init__()
-        self.bashlar = nn.ModuleList([DiqqetBashi(bash_olcusu) for _ in range(bash_sayi)])
-        self.proyeksiya = nn.Linear(yerlesdirme_olcusu, yerlesdirme_olcusu)
-        self.seyriltme = nn.Dropout(atilan_melumat)
+        self.bash_sayi = konfiq.bash_sayi
+        self.bash_olcusu = konfiq.bash_olcusu
+        self.atilan_melumat = konfiq.atilan_melumat
+        C = konfiq.yerlesdirme_olcusu
+        # Sorğu (Query), Açar (Key) və Dəyər (Value) proyeksiyaları — hamısı bir qatda
+        self.qkv = nn.Linear(C, 3 * self.bash_sayi * self.bash_olcusu, bias=False)
+        self.proyeksiya = nn.Linear(C, C)
+        self.seyriltme = nn.Dropout(konfiq.atilan_melumat)
 
-    def forward(self, x):
+    def forward(self, x, kesh=None, lay=0, firlanma=None, maska=None):
+        # kesh: KVKesh (verilmişsə), lay: bu qatın yaddaşdakı indeksi
+        # firlanma: (cos, sin) — fırlanan mövqelər, maska: kesh-siz uzun ardıcıllıq üçün pəncərə maskası
+        B, T, C = x.shape
+        q, k, v = self.qkv(x).split(self.bash_sayi * self.bash_olcusu, dim=-1)
+        q = q.view(B, T, self.bash_sayi, self.bash_olcusu).transpose(1, 2) # (B, bash_sayi, T, bash_olcusu)
+        k = k.view(B, T, self.bash_sayi, self.bash_olcusu).transpose(1, 2)
+        v = v.view(B, T, self.bash_sayi, self.bash_olcusu).transpose(1, 2)
+        if firlanma is not None:
+            q, k = _firlat(q, *firlanma), _firlat(k, *firlanma)
+
+        # Gələcəyi bağlayan maska: yaddaş yoxdursa adi səbəbli (causal) maska kifayətdir,
+        # yaddaş varsa hər sətrin öz uzunluğuna görə hazırlanmış maskadan istifadə edirik
+        if kesh is not None:
+            # Yeni açar və dəyərləri yaddaşa yazıb, əvvəlkilərlə birlikdə istifadə edirik
+            k, v, maska = kesh.yaz_ve_oxu(lay, k, v)
+        sonuc = F.scaled_dot_product_attention(
+            q, k, v,
+            attn_mask=maska,
+            dropout_p=self.atilan_melumat if self.training else 0.0,
+            is_causal=maska is None and T > 1,
+            scale=C**-0.5, # Orijinal başlıqlardakı kimi yerlesdirme_olcusu ilə normallaşdırırıq
+        )
         # Bütün başlıqların nəticələrini yan-yana düzürük
-        sonuc = torch.cat([b(x) for b in self.bashlar], dim=-1)
+        sonuc = sonuc.transpose(1, 2).contiguous().view(B, T, C)
         sonuc = self.seyriltme(self.proyeksiya(sonuc))
         return sonuc
 
 class IreliBesleme(nn.Module):
     """ Modelin öyrəndiyi məlumatları emal etməsi üçün sadə neyron şəbəkə qatı. """
-    def __init__(self, yerlesdirme_olcusu):
+    def __init__(self, konfiq):
         super().__init__()
+        C = konfiq.yerlesdirme_olcusu
         self.shabaka = nn.Sequential(
-            nn.Linear(yerlesdirme_olcusu, 4 * yerlesdirme_olcusu),
+            nn.Linear(C, 4 * C),
             nn.ReLU(), # Aktivləşdirmə funksiyası (Qeyri-xəttilik əlavə edir)
-            nn.Linear(4 * yerlesdirme_olcusu, yerlesdirme_olcusu),
-            nn.Dropout(atilan_melumat),
+            nn.Linear(4 * C, C),
+            nn.Dropout(konfiq.atilan_melumat),
         )
 
     def forward(self, x):
@@ -72,43 +424,94 @@ class TransformerBloku(nn.Module):
     Əsas Transformer kərpici: 
     Əvvəlcə ünsiyyət (Diqqət), sonra isə hesablama (İrəli Bəsləmə).
     """
-    def __init__(self, yerlesdirme_olcusu, bash_sayi):
+    def __init__(self, konfiq):
         super().__init__()
-        bash_olcusu = yerlesdirme_olcusu // bash_sayi
-        self.diqqet = ChoxBashliDiqqet(bash_sayi, bash_olcusu)
-        self.hesablama = IreliBesleme(yerlesdirme_olcusu)
-        self.norma1 = nn.LayerNorm(yerlesdirme_olcusu) # Məlumatları stabilləşdirir
-        self.norma2 = nn.LayerNorm(yerlesdirme_olcusu)
+        self.diqqet = ChoxBashliDiqqet(konfiq)
+        self.hesablama = IreliBesleme(konfiq)
+        self.norma1 = nn.LayerNorm(konfiq.yerlesdirme_olcusu) # Məlumatları stabilləşdirir
+        self.norma2 = nn.LayerNorm(konfiq.yerlesdirme_olcusu)
 
-    def forward(self, x):
+    def forward(self, x, kesh=None, lay=0, firlanma=None, maska=None):
         # Qalıq bağlantılar (Residual connections) vasitəsilə məlumatın itməsinin qarşısını alırıq
-        x = x + self.diqqet(self.norma1(x))
+        x = x + self.diqqet(self.norma1(x), kesh, lay, firlanma, maska)
         x = x + self.hesablama(self.norma2(x))
         return x
 
 class IsmayilModeli(nn.Module):
-    """ İsmayılın əsas Dil Modeli (Language Model) memarlığı. """
-    def __init__(self, luget_olcusu):
+    """
+    İsmayılın əsas Dil Modeli (Language Model) memarlığı.
+    konfiq: ModelKonfiqurasiyasi. Köhnə çağırışlar üçün lüğət ölçüsü də verilə bilər —
+    onda qalan ölçülər standartdır, movqe_novu/pencere isə ayrıca göstərilir.
+    """
+    def __init__(self, konfiq, movqe_novu=None, pencere=None):
         super().__init__()
+        if not isinstance(konfiq, ModelKonfiqurasiyasi):
+            konfiq = ModelKonfiqurasiyasi(luget_olcusu=konfiq, movqe_novu=movqe_novu or 'mutleq', pencere=pencere)
+        self.konfiq = konfiq
+        self.movqe_novu = konfiq.movqe_novu
+        self.pencere = konfiq.pencere
+        C = konfiq.yerlesdirme_olcusu
         # Simvolların rəqəmsal qarşılığı (Token Embeddings)
-        self.simvol_cedveli = nn.Embedding(luget_olcusu, yerlesdirme_olcusu)
-        # Simvolların mətndəki mövqeyi (Positional Embeddings)
-        self.movqe_cedveli = nn.Embedding(blok_olcusu, yerlesdirme_olcusu)
+        self.simvol_cedveli = nn.Embedding(konfiq.luget_olcusu, C)
+        if self.movqe_novu == 'mutleq':
+            # Simvolların mətndəki mövqeyi (Positional Embeddings)
+            self.movqe_cedveli = nn.Embedding(konfiq.blok_olcusu, C)
         # Arxa-arxaya düzülmüş Transformer blokları
-        self.bloklar = nn.Sequential(*[TransformerBloku(yerlesdirme_olcusu, bash_sayi=bash_sayi) for _ in range(lay_sayi)])
-        self.son_norma = nn.LayerNorm(yerlesdirme_olcusu)
+        self.bloklar = nn.Sequential(*[TransformerBloku(konfiq) for _ in range(konfiq.lay_sayi)])
+        self.son_norma = nn.LayerNorm(C)
         # Rəqəmləri yenidən simvolların ehtimallarına çevirən qat
-        self.bash_qati = nn.Linear(yerlesdirme_olcusu, luget_olcusu)
+        self.bash_qati = nn.Linear(C, konfiq.luget_olcusu)
+
+    @property
+    def kontekst_limiti(self):
+        # Mütləq mövqelərdə model blok_olcusu-dan uzun konteksti görə bilmir; fırlananda limit yoxdur
+        return self.konfiq.blok_olcusu if self.movqe_novu == 'mutleq' else None
+
+    def kesh_yarat(self, paket, cihaz=None):
+        """Bu modelin mövqe növünə uyğun KV-yaddaş yaradır."""
+        dtype = self.simvol_cedveli.weight.dtype
+        if self.movqe_novu == 'mutleq':
+            return KVKesh(self.konfiq, paket, self.konfiq.blok_olcusu, cihaz=cihaz, dtype=dtype)
+        return SurusenKVKesh(self.konfiq, paket, self.pencere, cihaz=cihaz, dtype=dtype)
+
+    def load_state_dict(self, state_dict, strict=True, assign=False):
+        # Köhnə formatlı checkpoint-ləri avtomatik olaraq birləşdirilmiş qkv formatına çeviririk
+        return super().load_state_dict(kohne_cekileri_uygunlashdir(state_dict), strict=strict, assign=assign)
 
-    def forward(self, indeksler, hedefler=None):
+    def forward(self, indeksler, hedefler=None, kesh=None, yalniz_son=False, setirler=None):
+        # yalniz_son=True olduqda ehtimallar yalnız sonuncu mövqe üçün hesablanır (generasiya üçün kifayətdir)
+        # setirler: kesh verilmişsə, paketin hər sətrinin yaddaşda hansı sətrə uyğun gəldiyi
         B, T = indeksler.shape
+        if kesh is None:
+            movqeler = torch.arange(T, device=indeksler.device) # (Time)
+        else:
+            # Yaddaş (KV-kesh) varsa, yeni simvollar hər sətirdə artıq yadda olanlardan sonra gəlir
+            movqeler = kesh.addima_hazirla(T, setirler) # (Batch, Time)
         
         simvol_embs = self.simvol_cedveli(indeksler) # (Batch, Time, Channel)
-        movqe_embs = self.movqe_cedveli(torch.arange(T, device=indeksler.device)) # (Time, Channel)
-        
-        # Məumat və mövqe enerjisini birləşdiririk
-        x = simvol_embs + movqe_embs 
-        x = self.bloklar(x)    
+        if self.movqe_novu == 'mutleq':
+            movqe_embs = self.movqe_cedveli(movqeler) # (Time, Channel) və ya (Batch, Time, Channel)
+            # Məumat və mövqe enerjisini birləşdiririk
+            x = simvol_embs + movqe_embs 
+            firlanma = None
+        else:
+            # Mövqe məlumatı diqqətin içində sorğu və açarların fırladılması ilə verilir
+            x = simvol_embs
+            firlanma = firlanma_bucaqlari(movqeler, self.konfiq.bash_olcusu)
+        if kesh is None:
+            maska = None
+            if firlanma is not None and T > self.pencere:
+                # Uzun ardıcıllıqda hər simvol yalnız son `pencere` simvola baxır
+                i = torch.arange(T, device=indeksler.device)
+                maska = (i[None, :] <= i[:, None]) & (i[:, None] - i[None, :] < self.pencere)
+            for blok in self.bloklar:
+                x = blok(x, firlanma=firlanma, maska=maska)
+        else:
+            for i, blok in enumerate(self.bloklar):
+                x = blok(x, kesh, i, firlanma)
+            kesh.addimi_bitir()
+        if yalniz_son:
+            x = x[:, -1:, :]
         x = self.son_norma(x)      
         ehtimallar = self.bash_qati(x) # (B, T, luget_olcusu)
 
@@ -117,23 +520,73 @@ class IsmayilModeli(nn.Module):
         else:
             B, T, C = ehtimallar.shape
             ehtimallar = ehtimallar.view(B*T, C)
-            hedefler = hedefler.view(B*T)
+            # Hədəflər çox vaxt pəncərələrin dilimidir (pencereler[:, 1:]) — ardıcıl olmaya bilər
+            hedefler = hedefler.reshape(B*T)
             # Modelin səhvini (itkisini) hesablayırıq
             itki = F.cross_entropy(ehtimallar, hedefler)
 
         return ehtimallar, itki
 
-    def yeni_metn_yarat(self, indeksler, maksimum_yeni_simvol):
-        # Verilmiş başlanğıc mətni əsasında yeni simvollar generasya edir
+    def simvol_axini(self, indeksler, maksimum_yeni_simvol, kesh_istifade=True, secici=None, qaralama=None,
+                     teklif_sayi=4):
+        """
+        Generator: hər addımda yeni seçilmiş simvolları (B, 1) qaytarır.
+        Çağıran tərəf istədiyi an dayandıra bilər (məs. dayanma ardıcıllığı görünəndə).
+        qaralama: verilərsə, bu kiçik model ilə spekulyativ generasiya (speculative.py, yalnız paket 1)
+        """
+        B, T0 = indeksler.shape
+        netice = torch.empty((B, T0 + maksimum_yeni_simvol), dtype=indeksler.dtype, device=indeksler.device)
+        netice[:, :T0] = indeksler
+        yield from self._generasiya(netice, T0, maksimum_yeni_simvol, kesh_istifade, secici, qaralama, teklif_sayi)
+
+    def _generasiya(self, netice, n, maksimum_yeni_simvol, kesh_istifade, secici, qaralama, teklif_sayi):
+        if qaralama is None:
+            return self._addimlar(netice, n, maksimum_yeni_simvol, kesh_istifade, secici)
+        from speculative import spekulyativ_addimlar
+        return spekulyativ_addimlar(self, qaralama, netice, n, maksimum_yeni_simvol, teklif_sayi, secici)
+
+    def _addimlar(self, netice, n, maksimum_yeni_simvol, kesh_istifade, secici):
+        # netice: əvvəlcədən ayrılmış bufer, ilk n simvolu başlanğıc mətnidir
+        B = netice.shape[0]
+        kesh = self.kesh_yarat(B, cihaz=netice.device) if kesh_istifade else None
+        if secici is not None:
+            secici.kecmishi_qeyd_et(netice[:, :n])
+        # Konteksti blok ölçüsünə uyğun kəsirik (fırlanan mövqelərdə bütün mətn işlənir)
+        limit = self.kontekst_limiti or netice.shape[1]
+        indeks_kontekst = netice[:, max(0, n - limit):n]
         for _ in range(maksimum_yeni_simvol):
-            # Konteksti blok ölçüsünə uyğun kəsirik
-            indeks_kontekst = indeksler[:, -blok_olcusu:]
-            ehtimallar, itki = self(indeks_kontekst)
+            if kesh is not None and self.kontekst_limiti and kesh.uzunluq + indeks_kontekst.shape[1] > limit:
+                # Yaddaş doldu: mövqelər sürüşdüyü üçün son blok_olcusu simvolu yenidən hesablayırıq
+                kesh.sifirla()
+                indeks_kontekst = netice[:, n - limit:n]
+            ehtimallar, itki = self(indeks_kontekst, kesh=kesh, yalniz_son=kesh is not None)
             # Yalnız ən sonuncu simvolun ehtimalına baxırıq
             ehtimallar = ehtimallar[:, -1, :] 
-            yumshaq_ehtimal = F.softmax(ehtimallar, dim=-1)
-            # Ehtimallara uyğun təsadüfi növbəti simvolu seçirik
-            novbeti_indeks = torch.multinomial(yumshaq_ehtimal, num_samples=1) 
+            if secici is None:
+                yumshaq_ehtimal = F.softmax(ehtimallar, dim=-1)
+                # Ehtimallara uyğun təsadüfi növbəti simvolu seçirik
+                novbeti_indeks = torch.multinomial(yumshaq_ehtimal, num_samples=1) 
+            else:
+                # Temperatur, top-k, top-p və təkrar cəzası ilə seçim
+                novbeti_indeks = secici.sec(ehtimallar)
             # Yeni simvolu mövcud mətnin sonuna əlavə edirik
-            indeksler = torch.cat((indeksler, novbeti_indeks), dim=1) 
-        return indeksler
+            netice[:, n:n + 1] = novbeti_indeks
+            n += 1
+            yield novbeti_indeks
+            if kesh is not None:
+                # Yaddaş olduqda növbəti addımda yalnız yeni simvolu ötürürük
+                indeks_kontekst = netice[:, n - 1:n]
+            else:
+                indeks_kontekst = netice[:, max(0, n - limit):n]
+
+    def yeni_metn_yarat(self, indeksler, maksimum_yeni_simvol, kesh_istifade=True, secici=None, qaralama=None,
+                        teklif_sayi=4):
+        # Verilmiş başlanğıc mətni əsasında yeni simvollar generasya edir
+        # qaralama: kiçik IsmayilModeli — verilərsə, hər addımda teklif_sayi simvol təklif edir (spekulyativ generasiya)
+        B, T0 = indeksler.shape
+        # Nəticə üçün buferi əvvəlcədən ayırırıq (hər addımda torch.cat etməmək üçün)
+        netice = torch.empty((B, T0 + maksimum_yeni_simvol), dtype=indeksler.dtype, device=indeksler.device)
+        netice[:, :T0] = indeksler
+        for _ in self._generasiya(netice, T0, maksimum_yeni_simvol, kesh_istifade, secici, qaralama, teklif_sayi):
+            pass
+        return netice
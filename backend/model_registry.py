@@ -0,0 +1,204 @@
+"""
+model_registry.py — Versiyalı model çəkiləri və işləyən serverdə isti yeniləmə (hot reload)
+==========================================================================================
+Qovluq quruluşu (ISMAYIL_MODEL_QOVLUGU, standart 'models'):
+  models/manifest.json                 — aktiv versiya: versiya, çəki faylı, sha256, tokenizator və onun sha256-sı
+  models/<versiya>/ismayil_model.*     — .safetensors, .pth və ya .npz (NumPy mühərriki)
+  models/<versiya>/tokenizer.json
+
+Yeni versiyanı dərc etmək (fayllar kopyalanır, checksum hesablanır, manifest atomik olaraq dəyişdirilir):
+  python model_registry.py ismayil_model.safetensors --tokenizer tokenizer.json --versiya 2026-10-18
+
+Server manifest-i izləyir (və ya POST /admin/reload): yeni versiya arxa planda yüklənir, isindirilir
+və sonra aktiv nüsxə atomik olaraq dəyişdirilir. Davam edən generasiyalar köhnə nüsxədə bitir;
+köhnə nüsxənin son sorğusu bitən kimi onun planlayıcısı dayandırılır və yaddaşı buraxılır.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+MANIFEST_ADI = "manifest.json"
+
+
+def fayl_hashi(yol, blok_olcusu=1 << 20):
+    """Faylın sha256-sı (hissə-hissə oxunur — böyük çəkilər yaddaşa yüklənmir)."""
+    hesh = hashlib.sha256()
+    with open(yol, "rb") as f:
+        while blok := f.read(blok_olcusu):
+            hesh.update(blok)
+    return hesh.hexdigest()
+
+
+def manifesti_oxu(qovluq):
+    """Manifest-i qaytarır; yoxdursa None."""
+    try:
+        with open(os.path.join(qovluq, MANIFEST_ADI), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def manifesti_yoxla(qovluq, manifest):
+    """
+    Manifest-dəki faylların varlığını və checksum-larını yoxlayır.
+    Qaytarır: (çəki faylının yolu, tokenizatorun yolu). Uyğunsuzluqda ValueError.
+    """
+    yollar = []
+    for acar in ("cekiler", "tokenizator"):
+        yol = os.path.join(qovluq, manifest["versiya"], manifest[acar])
+        if not os.path.exists(yol):
+            raise ValueError(f"Versiya {manifest['versiya']}: '{yol}' tapılmadı")
+        if fayl_hashi(yol) != manifest[f"{acar}_sha256"]:
+            raise ValueError(f"Versiya {manifest['versiya']}: '{yol}' checksum-ı manifest ilə uyğun gəlmir")
+        yollar.append(yol)
+    return tuple(yollar)
+
+
+def versiyani_derc_et(cekiler, tokenizator, qovluq="models", versiya=None):
+    """
+    Çəkiləri və tokenizatoru qovluq/<versiya>/ altına kopyalayıb manifest-i yeni versiyaya yönəldir.
+    Manifest müvəqqəti fayla yazılıb os.replace ilə dəyişdirilir — server heç vaxt yarımçıq manifest oxumur.
+    """
+    cekiler_hashi = fayl_hashi(cekiler)
+    versiya = versiya or f"{time.strftime('%Y%m%d-%H%M%S')}-{cekiler_hashi[:8]}"
+    hedef = os.path.join(qovluq, versiya)
+    if os.path.exists(hedef):
+        raise ValueError(f"Versiya {versiya} artıq mövcuddur")
+    os.makedirs(hedef)
+    for menbe in (cekiler, tokenizator):
+        shutil.copyfile(menbe, os.path.join(hedef, os.path.basename(menbe)))
+    manifest = {
+        "versiya": versiya,
+        "cekiler": os.path.basename(cekiler),
+        "cekiler_sha256": cekiler_hashi,
+        "tokenizator": os.path.basename(tokenizator),
+        "tokenizator_sha256": fayl_hashi(tokenizator),
+        "yaradilma": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    muveqqeti = os.path.join(qovluq, MANIFEST_ADI + ".tmp")
+    with open(muveqqeti, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(muveqqeti, os.path.join(qovluq, MANIFEST_ADI))
+    return manifest
+
+
+class ModelNusxesi:
+    """
+    Bir model versiyası: tokenizator, model və onun planlayıcısı.
+    İstifadə sayğacı davam edən sorğuları sayır; köhnəlmiş nüsxə son sorğu buraxılan kimi bağlanır.
+    """
+    def __init__(self, versiya, tokenizator, model, planlayici):
+        self.versiya = versiya
+        self.tokenizator = tokenizator
+        self.model = model
+        self.planlayici = planlayici
+        self._kilid = threading.Lock()
+        self._istifade = 0
+        self._kohnelib = False
+        self.baglanib = False
+
+    def burax(self):
+        """Sorğu bitdi. Nüsxə köhnəlibsə və bu son sorğu idisə, nüsxə bağlanır."""
+        with self._kilid:
+            self._istifade -= 1
+            bagla = self._kohnelib and self._istifade == 0
+        if bagla:
+            self._bagla()
+
+    def kohnelt(self):
+        """Nüsxəni aktivlikdən çıxarır: istifadə edən yoxdursa dərhal, əks halda son sorğudan sonra bağlanır."""
+        with self._kilid:
+            self._kohnelib = True
+            bagla = self._istifade == 0
+        if bagla:
+            self._bagla()
+
+    def _bagla(self):
+        self.planlayici.dayandir()
+        # Model, KV-yaddaş və planlayıcı yalnız bu nüsxədən istinad olunur — istinadlar silinən kimi
+        # yaddaş (və mmap edilmiş çəkilər) GC-nin növbəti dövrünü gözləmədən buraxılır
+        self.planlayici = self.model = None
+        self.baglanib = True
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+class ModelReyestri:
+    """Aktiv ModelNusxesi-ni saxlayır. tut() ilə götürülən nüsxə dəyişdirilmədən sonra da sorğunun sonuna qədər işləyir."""
+    def __init__(self):
+        self._kilid = threading.Lock()
+        self._aktiv = None
+
+    @property
+    def aktiv(self):
+        return self._aktiv
+
+    def tut(self):
+        """Aktiv nüsxəni sorğu üçün götürür (yoxdursa None). İş bitəndə nusxe.burax() çağırılmalıdır."""
+        with self._kilid:
+            nusxe = self._aktiv
+            if nusxe is not None:
+                with nusxe._kilid:
+                    nusxe._istifade += 1
+            return nusxe
+
+    def deyishdir(self, yeni):
+        """Yeni nüsxəni atomik olaraq aktiv edir; əvvəlkini köhnəldir. Qaytarır: əvvəlki nüsxə."""
+        with self._kilid:
+            kohne, self._aktiv = self._aktiv, yeni
+        if kohne is not None:
+            kohne.kohnelt()
+        return kohne
+
+
+class ManifestIzleyici:
+    """Manifest faylını `aralig` saniyədən bir yoxlayır; dəyişəndə geri_cagiris() arxa thread-də çağırılır."""
+    def __init__(self, qovluq, aralig, geri_cagiris):
+        self.yol = os.path.join(qovluq, MANIFEST_ADI)
+        self.aralig = aralig
+        self.geri_cagiris = geri_cagiris
+        self._dayan = threading.Event()
+        self._son = self._imza()
+        self._thread = threading.Thread(target=self._islet, name="ismayil-manifest", daemon=True)
+        self._thread.start()
+
+    def _imza(self):
+        try:
+            melumat = os.stat(self.yol)
+        except FileNotFoundError:
+            return None
+        return melumat.st_size, melumat.st_mtime_ns
+
+    def _islet(self):
+        while not self._dayan.wait(self.aralig):
+            imza = self._imza()
+            if imza is not None and imza != self._son:
+                self._son = imza
+                try:
+                    self.geri_cagiris()
+                except Exception as xata:
+                    print(f"Manifest dəyişikliyi tətbiq olunmadı: {xata}")
+
+    def dayandir(self):
+        self._dayan.set()
+        self._thread.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yeni model versiyasını dərc etmək (manifest + checksum)")
+    parser.add_argument("cekiler", help="ismayil_model.safetensors / .pth / .npz")
+    parser.add_argument("--tokenizer", default="tokenizer.json")
+    parser.add_argument("--qovluq", default=os.environ.get("ISMAYIL_MODEL_QOVLUGU", "models"))
+    parser.add_argument("--versiya", default=None, help="Standart: tarix + çəkilərin sha256 prefiksi")
+    args = parser.parse_args()
+    manifest = versiyani_derc_et(args.cekiler, args.tokenizer, args.qovluq, args.versiya)
+    print(f"Versiya {manifest['versiya']} dərc edildi ({manifest['cekiler']}, sha256 {manifest['cekiler_sha256'][:12]}…)")
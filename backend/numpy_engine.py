@@ -0,0 +1,188 @@
+"""
+numpy_engine.py — Torch olmadan işləyən NumPy inference mühərriki
+=================================================================
+Railway image-ində torch yoxdur, amma numpy var. Bu modul export_numpy.py ilə .npz faylına
+çıxarılmış çəkilər üzərində IsmayilModeli-nin forward ötürməsini (simvol/mövqe cədvəlləri,
+LayerNorm, səbəbli diqqət, İrəli Bəsləmə, bash_qati) və seçim (sampling) məntiqini təkrarlayır.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from generation import ArdicilliqVeziyyeti, GenerasiyaIsteyi, NovbeDoludur, SecimParametrleri
+
+
+def _lay_norma(x, w, b, eps=1e-5):
+    orta = x.mean(axis=-1, keepdims=True)
+    ferq = x.var(axis=-1, keepdims=True)
+    return (x - orta) / np.sqrt(ferq + eps) * w + b
+
+
+class NumpyModeli:
+    """IsmayilModeli-nin NumPy surəti (yalnız inference üçün)."""
+    def __init__(self, cekiler):
+        self.bash_sayi = int(cekiler['_meta.bash_sayi'])
+        self.simvol_cedveli = cekiler['simvol_cedveli.weight']
+        self.movqe_cedveli = cekiler['movqe_cedveli.weight']
+        self.blok_olcusu, self.yerlesdirme_olcusu = self.movqe_cedveli.shape
+        self.luget_olcusu = self.simvol_cedveli.shape[0]
+        self.bash_olcusu = self.yerlesdirme_olcusu // self.bash_sayi
+        self.laylar = []
+        i = 0
+        while f'bloklar.{i}.norma1.weight' in cekiler:
+            p = f'bloklar.{i}.'
+            # Matris vurmalarında x @ W şəklində istifadə etmək üçün çəkiləri əvvəlcədən transpozə edirik
+            self.laylar.append({
+                'norma1': (cekiler[p + 'norma1.weight'], cekiler[p + 'norma1.bias']),
+                'norma2': (cekiler[p + 'norma2.weight'], cekiler[p + 'norma2.bias']),
+                'qkv': np.ascontiguousarray(cekiler[p + 'diqqet.qkv.weight'].T),
+                'proyeksiya': (np.ascontiguousarray(cekiler[p + 'diqqet.proyeksiya.weight'].T), cekiler[p + 'diqqet.proyeksiya.bias']),
+                'genislet': (np.ascontiguousarray(cekiler[p + 'hesablama.shabaka.0.weight'].T), cekiler[p + 'hesablama.shabaka.0.bias']),
+                'daralt': (np.ascontiguousarray(cekiler[p + 'hesablama.shabaka.2.weight'].T), cekiler[p + 'hesablama.shabaka.2.bias']),
+            })
+            i += 1
+        self.son_norma = (cekiler['son_norma.weight'], cekiler['son_norma.bias'])
+        self.bash_qati = (np.ascontiguousarray(cekiler['bash_qati.weight'].T), cekiler['bash_qati.bias'])
+
+    @classmethod
+    def yukle(cls, yol):
+        with np.load(yol) as fayl:
+            return cls({ad: fayl[ad] for ad in fayl.files})
+
+    def bosh_kesh(self):
+        # Tək ardıcıllıq üçün açar/dəyər yaddaşı: (lay, bash_sayi, blok_olcusu, bash_olcusu)
+        forma = (len(self.laylar), self.bash_sayi, self.blok_olcusu, self.bash_olcusu)
+        return {'k': np.zeros(forma, dtype=np.float32), 'v': np.zeros(forma, dtype=np.float32), 'uzunluq': 0}
+
+    def forward(self, idler, kesh=None):
+        """
+        idler: (B, T) tam ədədlər. kesh verilərsə (B=1), yeni simvollar yaddaşdakılardan sonra gəlir.
+        Qaytarır: (B, T, luget_olcusu) logitlər.
+        """
+        idler = np.asarray(idler)
+        B, T = idler.shape
+        C, H, hs = self.yerlesdirme_olcusu, self.bash_sayi, self.bash_olcusu
+        bashlangic = kesh['uzunluq'] if kesh is not None else 0
+        son = bashlangic + T
+
+        x = self.simvol_cedveli[idler] + self.movqe_cedveli[bashlangic:son]
+        # Səbəbli maska: T yeni simvolun hər biri yalnız özünə qədər olan mövqelərə baxır
+        maska = np.arange(son)[None, :] <= (bashlangic + np.arange(T))[:, None]
+        for i, lay in enumerate(self.laylar):
+            h = _lay_norma(x, *lay['norma1'])
+            q, k, v = np.split(h @ lay['qkv'], 3, axis=-1)
+            q = q.reshape(B, T, H, hs).transpose(0, 2, 1, 3) # (B, H, T, hs)
+            k = k.reshape(B, T, H, hs).transpose(0, 2, 1, 3)
+            v = v.reshape(B, T, H, hs).transpose(0, 2, 1, 3)
+            if kesh is not None:
+                kesh['k'][i, :, bashlangic:son] = k[0]
+                kesh['v'][i, :, bashlangic:son] = v[0]
+                k, v = kesh['k'][i, None, :, :son], kesh['v'][i, None, :, :son]
+            bali = (q @ k.transpose(0, 1, 3, 2)) * C**-0.5 # (B, H, T, L)
+            bali = np.where(maska, bali, -np.inf)
+            bali = np.exp(bali - bali.max(axis=-1, keepdims=True))
+            bali /= bali.sum(axis=-1, keepdims=True)
+            sonuc = (bali @ v).transpose(0, 2, 1, 3).reshape(B, T, C)
+            w, b = lay['proyeksiya']
+            x = x + sonuc @ w + b
+            h = _lay_norma(x, *lay['norma2'])
+            w0, b0 = lay['genislet']
+            w2, b2 = lay['daralt']
+            x = x + np.maximum(h @ w0 + b0, 0) @ w2 + b2
+        if kesh is not None:
+            kesh['uzunluq'] = son
+        x = _lay_norma(x, *self.son_norma)
+        w, b = self.bash_qati
+        return x @ w + b
+
+
+def simvol_sec(logitler, parametrler: SecimParametrleri, gorulub, rng):
+    """sampler.PaketSecici ilə eyni qaydalarla (tək sətir üçün) növbəti simvolu seçir."""
+    logitler = logitler.astype(np.float64)
+    ceza = parametrler.tekrar_cezasi
+    if ceza != 1.0:
+        logitler = np.where(gorulub, np.where(logitler > 0, logitler / ceza, logitler * ceza), logitler)
+    if parametrler.temperatur == 0:
+        return int(np.argmax(logitler))
+    logitler = logitler / parametrler.temperatur
+    sira = np.argsort(-logitler, kind='stable')
+    sirali = logitler[sira]
+    if 0 < parametrler.top_k < len(sirali):
+        sirali[parametrler.top_k:] = -np.inf
+    ehtimallar = np.exp(sirali - sirali[0])
+    ehtimallar /= ehtimallar.sum()
+    if parametrler.top_p < 1.0:
+        # Özündən əvvəlki ehtimalların cəmi top_p-ni keçən simvolları atırıq (ən azı biri qalır)
+        evvelki_cem = np.cumsum(ehtimallar) - ehtimallar
+        ehtimallar[evvelki_cem > parametrler.top_p] = 0.0
+        ehtimallar /= ehtimallar.sum()
+    return int(sira[rng.choice(len(ehtimallar), p=ehtimallar)])
+
+
+class NumpyPlanlayici:
+    """
+    ChatPlanlayici ilə eyni interfeysli (bashlat/gonder/dayandir) sadə planlayıcı.
+    Hər sorğu thread hovuzunda öz KV-yaddaşı ilə generasya olunur — numpy matris vurmaları GIL-i buraxır.
+    """
+    def __init__(self, model: NumpyModeli, tokenizator, maks_paralel=4, maks_novbe=0):
+        self.model = model
+        self.tokenizator = tokenizator
+        self.maks_paralel = maks_paralel
+        self.maks_novbe = maks_novbe
+        self._hovuz = None
+        self._kilid = threading.Lock()
+        self._gozleyen_ve_isleyen = 0
+
+    def bashlat(self):
+        if self._hovuz is None:
+            self._hovuz = ThreadPoolExecutor(max_workers=self.maks_paralel, thread_name_prefix="ismayil-numpy")
+
+    def dayandir(self):
+        if self._hovuz is not None:
+            self._hovuz.shutdown(wait=True)
+            self._hovuz = None
+
+    def gonder(self, istek: GenerasiyaIsteyi):
+        with self._kilid:
+            if self.maks_novbe and self._gozleyen_ve_isleyen >= self.maks_paralel + self.maks_novbe:
+                raise NovbeDoludur()
+            self._gozleyen_ve_isleyen += 1
+        self._hovuz.submit(self._islet, istek)
+
+    def _islet(self, istek: GenerasiyaIsteyi):
+        try:
+            self._generasiya_et(istek)
+        except Exception as xata:
+            istek.geri_cagiris("xeta", str(xata))
+        finally:
+            with self._kilid:
+                self._gozleyen_ve_isleyen -= 1
+
+    def _generasiya_et(self, istek: GenerasiyaIsteyi):
+        model = self.model
+        ardicilliq = ArdicilliqVeziyyeti(istek)
+        rng = np.random.default_rng(istek.parametrler.toxum)
+        gorulub = np.zeros(model.luget_olcusu, dtype=bool)
+        gorulub[ardicilliq.idler] = True
+        kesh = model.bosh_kesh()
+        dekoder = self.tokenizator.dekoder()
+        girish = ardicilliq.idler[-model.blok_olcusu:]
+        while True:
+            if istek.legv_edilib:
+                return
+            if istek.vaxti_bitib(time.monotonic()):
+                istek.geri_cagiris("vaxt_bitdi", None)
+                return
+            if kesh['uzunluq'] + len(girish) > model.blok_olcusu:
+                # Yaddaş doldu: mütləq mövqelər sürüşdüyü üçün son blok_olcusu simvolu yenidən hesablayırıq
+                kesh['uzunluq'] = 0
+                girish = ardicilliq.idler[-model.blok_olcusu:]
+            logitler = model.forward(np.array([girish]), kesh)[0, -1]
+            simvol = simvol_sec(logitler, istek.parametrler, gorulub, rng)
+            gorulub[simvol] = True
+            if ardicilliq.simvol_elave_et(simvol, dekoder(simvol)):
+                return
+            girish = [simvol]
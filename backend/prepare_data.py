@@ -0,0 +1,319 @@
+"""
+prepare_data.py — Təlim korpusunu tokenləşdirilmiş .bin parçalarına çevirmək
+============================================================================
+train.py əvvəllər bütün input.txt-i yaddaşa oxuyub hər dəfə yenidən tokenləşdirirdi. Bu skript
+bir və ya bir neçə mətn faylını hissə-hissə oxuyur, tokenləşdirir və nəticəni uint16 (token başına
+2 bayt) .bin parçalarına yazır. Yanında index.json yaranır: parçalar, tədris/yoxlama bölgüsü,
+tokenizator və mənbə faylların ölçü/vaxtı. Təlim parçaları np.memmap ilə açır — korpus RAM-dan
+böyük ola bilər, təkrar işə salmada isə tokenləşdirmə ümumiyyətlə olmur.
+
+Yoxlama bölgüsü hər hissənin son `yoxlama_payi` qədəridir — korpusun hər yerindən nümunə olur,
+tək hissəli kiçik korpusda isə əvvəlki kimi mətnin son 10%-i alınır.
+
+İstifadə:
+  python prepare_data.py input.txt                         # -> data/index.json + data/*.bin
+  python prepare_data.py a.txt b.txt --tokenizator bpe --bpe-luget 1024 --cixis data_bpe
+  python prepare_data.py korpus.txt --tokenizer tokenizer.json   # mövcud tokenizatorla
+"""
+
+import argparse
+import glob
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from tokenizer import BPETokenizator, CharTokenizator, TOKENIZATOR_NOVLERI, tokenizatoru_yukle
+
+INDEKS_ADI = "index.json"
+TOKENIZATOR_ADI = "tokenizer.json"
+SIMVOL_TIPI = np.dtype("<u2") # uint16, little-endian — lüğət 65536-dan böyük ola bilməz
+
+
+def metn_hisseleri(fayllar, hisse_olcusu=16 << 20):
+    """
+    Faylları ardıcıl, təxminən hisse_olcusu simvolluq hissələrlə qaytarır.
+    Hissə sonuncu boşluqdan kəsilir ki, BPE sözü iki hissəyə bölünməsin.
+    """
+    for yol in fayllar:
+        with open(yol, "r", encoding="utf-8") as f:
+            qaliq = ""
+            while True:
+                hisse = f.read(hisse_olcusu)
+                if not hisse:
+                    break
+                hisse = qaliq + hisse
+                kesim = max(hisse.rfind(" "), hisse.rfind("\n"))
+                if kesim > 0:
+                    hisse, qaliq = hisse[:kesim], hisse[kesim:]
+                else:
+                    qaliq = ""
+                yield hisse
+            if qaliq:
+                yield qaliq
+
+
+def _menbeler(fayllar):
+    menbeler = []
+    for yol in fayllar:
+        melumat = os.stat(yol)
+        menbeler.append({"yol": os.path.abspath(yol), "olcu": melumat.st_size, "mtime_ns": melumat.st_mtime_ns})
+    return menbeler
+
+
+def tokenizatoru_qur(fayllar, tokenizator_novu="simvol", bpe_luget_olcusu=512, bpe_numune_olcusu=4 << 20):
+    """
+    simvol: bütün korpus axınla bir dəfə oxunur və unikal simvollar toplanır.
+    bpe: birləşmələr korpusun ilk bpe_numune_olcusu simvolu üzərində öyrədilir.
+    """
+    if tokenizator_novu == "bpe":
+        numune = []
+        for hisse in metn_hisseleri(fayllar, min(bpe_numune_olcusu, 16 << 20)):
+            numune.append(hisse)
+            bpe_numune_olcusu -= len(hisse)
+            if bpe_numune_olcusu <= 0:
+                break
+        return BPETokenizator("".join(numune), luget_olcusu=bpe_luget_olcusu)
+    if tokenizator_novu != "simvol":
+        raise ValueError(f"Naməlum tokenizator növü: {tokenizator_novu}. Mümkün olanlar: {', '.join(TOKENIZATOR_NOVLERI)}")
+    simvollar = set()
+    for hisse in metn_hisseleri(fayllar):
+        simvollar.update(hisse)
+    return CharTokenizator("".join(simvollar))
+
+
+class _ParcaYazici:
+    """Bir bölmənin (train/val) tokenlərini parca_olcusu tokenlik .bin fayllarına yazır."""
+    def __init__(self, qovluq, bolme, parca_olcusu):
+        self.qovluq = qovluq
+        self.bolme = bolme
+        self.parca_olcusu = parca_olcusu
+        self.parcalar = [] # [{"fayl": ..., "simvol_sayi": ...}]
+        self._fayl = None
+
+    def yaz(self, idler):
+        while len(idler):
+            if self._fayl is None:
+                ad = f"{self.bolme}_{len(self.parcalar):04d}.bin"
+                self._fayl = open(os.path.join(self.qovluq, ad), "wb")
+                self.parcalar.append({"fayl": ad, "simvol_sayi": 0})
+            parca = self.parcalar[-1]
+            yer = self.parca_olcusu - parca["simvol_sayi"]
+            self._fayl.write(idler[:yer].tobytes())
+            parca["simvol_sayi"] += min(yer, len(idler))
+            idler = idler[yer:]
+            if parca["simvol_sayi"] == self.parca_olcusu:
+                self.bagla()
+
+    def bagla(self):
+        if self._fayl is not None:
+            self._fayl.close()
+            self._fayl = None
+        return self.parcalar
+
+
+def melumati_hazirla(fayllar, cixis="data", tokenizator=None, tokenizator_novu="simvol", bpe_luget_olcusu=512,
+                     yoxlama_payi=0.1, parca_olcusu=1 << 26, hisse_olcusu=16 << 20):
+    """
+    fayllar-ı tokenləşdirib cixis qovluğuna .bin parçaları və index.json yazır. Qaytarır: index yolu.
+    tokenizator verilməyibsə, korpusdan yenisi qurulur (tokenizator_novu, bpe_luget_olcusu).
+    """
+    bashlama = time.perf_counter()
+    qurulur = tokenizator is None
+    if qurulur:
+        tokenizator = tokenizatoru_qur(fayllar, tokenizator_novu, bpe_luget_olcusu)
+    if tokenizator.luget_olcusu > np.iinfo(SIMVOL_TIPI).max + 1:
+        raise ValueError(f"Lüğət ölçüsü {tokenizator.luget_olcusu} uint16-ya sığmır (maks. 65536)")
+
+    os.makedirs(cixis, exist_ok=True)
+    indeks_yolu = os.path.join(cixis, INDEKS_ADI)
+    # Köhnə index əvvəlcə silinir: yarımçıq qalan hazırlıq heç vaxt etibarlı görünməsin
+    if os.path.exists(indeks_yolu):
+        os.remove(indeks_yolu)
+    for kohne in glob.glob(os.path.join(cixis, "train_*.bin")) + glob.glob(os.path.join(cixis, "val_*.bin")):
+        os.remove(kohne)
+    tokenizator.yadda_saxla(os.path.join(cixis, TOKENIZATOR_ADI))
+
+    yazicilar = {bolme: _ParcaYazici(cixis, bolme, parca_olcusu) for bolme in ("train", "val")}
+    simvol_sayi = 0
+    for hisse in metn_hisseleri(fayllar, hisse_olcusu):
+        idler = tokenizator.kodlasdir_massiv(hisse, dtype=SIMVOL_TIPI)
+        n = int((1 - yoxlama_payi) * len(idler))
+        yazicilar["train"].yaz(idler[:n])
+        yazicilar["val"].yaz(idler[n:])
+        simvol_sayi += len(idler)
+
+    indeks = {
+        "dtype": SIMVOL_TIPI.str,
+        "tokenizator": TOKENIZATOR_ADI,
+        "tokenizator_novu": "bpe" if isinstance(tokenizator, BPETokenizator) else "simvol",
+        "luget_olcusu": tokenizator.luget_olcusu,
+        "bpe_luget_olcusu": bpe_luget_olcusu if qurulur and tokenizator_novu == "bpe" else None,
+        "yoxlama_payi": yoxlama_payi,
+        "menbeler": _menbeler(fayllar),
+        "bolmeler": {bolme: yazici.bagla() for bolme, yazici in yazicilar.items()},
+    }
+    muveqqeti = indeks_yolu + ".tmp"
+    with open(muveqqeti, "w", encoding="utf-8") as f:
+        json.dump(indeks, f, ensure_ascii=False, indent=2)
+    os.replace(muveqqeti, indeks_yolu)
+    print(f"{simvol_sayi} token {len(fayllar)} fayldan '{cixis}' qovluğuna yazıldı "
+          f"({simvol_sayi * SIMVOL_TIPI.itemsize / 1024**2:.1f} MB, {time.perf_counter() - bashlama:.1f} san)")
+    return indeks_yolu
+
+
+def indeks_kohnedir(indeks_yolu, fayllar, tokenizator_novu=None, bpe_luget_olcusu=None):
+    """Index yoxdursa, mənbə fayllar dəyişibsə və ya tokenizator parametrləri fərqlidirsə True."""
+    try:
+        with open(indeks_yolu, "r", encoding="utf-8") as f:
+            indeks = json.load(f)
+    except (OSError, ValueError):
+        return True
+    if indeks["menbeler"] != _menbeler(fayllar):
+        return True
+    if tokenizator_novu is not None and indeks["tokenizator_novu"] != tokenizator_novu:
+        return True
+    return tokenizator_novu == "bpe" and bpe_luget_olcusu is not None and indeks["bpe_luget_olcusu"] != bpe_luget_olcusu
+
+
+class ParcaliMelumat:
+    """
+    index.json-un parçalarını np.memmap görünüşləri kimi açır. Hər bölmə parçaların ardıcıl
+    birləşməsi kimi görünür — pəncərə iki parçanın sərhədindən keçə bilər.
+    """
+    def __init__(self, indeks_yolu):
+        with open(indeks_yolu, "r", encoding="utf-8") as f:
+            self.indeks = json.load(f)
+        self.qovluq = os.path.dirname(os.path.abspath(indeks_yolu))
+        self.luget_olcusu = self.indeks["luget_olcusu"]
+        dtype = np.dtype(self.indeks["dtype"])
+        self._parcalar, self._sonlar = {}, {}
+        for bolme, parcalar in self.indeks["bolmeler"].items():
+            parcalar = [p for p in parcalar if p["simvol_sayi"]]
+            self._parcalar[bolme] = [np.memmap(os.path.join(self.qovluq, p["fayl"]), dtype=dtype, mode="r",
+                                               shape=(p["simvol_sayi"],)) for p in parcalar]
+            self._sonlar[bolme] = np.cumsum([p["simvol_sayi"] for p in parcalar], dtype=np.int64)
+
+    def tokenizator(self):
+        return tokenizatoru_yukle(os.path.join(self.qovluq, self.indeks["tokenizator"]))
+
+    def simvol_sayi(self, bolme):
+        sonlar = self._sonlar[bolme]
+        return int(sonlar[-1]) if len(sonlar) else 0
+
+    def pencere(self, bolme, bashlangic, uzunluq):
+        """Bölmənin [bashlangic, bashlangic+uzunluq) tokenlərini np.int64 massivi kimi qaytarır."""
+        parcalar, sonlar = self._parcalar[bolme], self._sonlar[bolme]
+        i = int(np.searchsorted(sonlar, bashlangic, side="right"))
+        yer = bashlangic - (int(sonlar[i - 1]) if i else 0)
+        hisseler = []
+        while uzunluq > 0:
+            hisse = parcalar[i][yer:yer + uzunluq]
+            hisseler.append(hisse)
+            uzunluq -= len(hisse)
+            i, yer = i + 1, 0
+        return np.concatenate(hisseler).astype(np.int64)
+
+    def ardicil_pencereler(self, bolme, say, uzunluq):
+        """
+        Bölmə boyunca bərabər aralıqlı, üst-üstə düşməyən `say` pəncərə (ən çoxu bölməyə sığan qədər).
+        Təsadüfi deyil — hər qiymətləndirmə eyni pəncərələr üzərində aparılır.
+        Bölmə bir pəncərədən qısadırsa (heç bir pəncərə sığmırsa) ValueError atılır.
+        """
+        mumkun = (self.simvol_sayi(bolme) - 1) // (uzunluq - 1)
+        if mumkun < 1 or say < 1:
+            raise ValueError(f"'{bolme}' bölməsindən pəncərə seçilə bilmir: {self.simvol_sayi(bolme)} token, "
+                             f"pəncərə uzunluğu {uzunluq}, istənən say {say}")
+        secilen = np.unique(np.linspace(0, mumkun - 1, min(say, mumkun)).astype(np.int64))
+        return self.paket(bolme, secilen * (uzunluq - 1), uzunluq)
+
+    def paket(self, bolme, bashlangiclar, uzunluq):
+        """
+        Bütün pəncərələri bir indeks əməliyyatı ilə toplayır: (len(bashlangiclar), uzunluq) np.int64.
+        Parçalar arasında keçən pəncərələr nadirdir — hər parça üçün ayrıca bir toplama edilir.
+        """
+        parcalar, sonlar = self._parcalar[bolme], self._sonlar[bolme]
+        indeksler = np.asarray(bashlangiclar, dtype=np.int64)[:, None] + np.arange(uzunluq)
+        if len(parcalar) == 1:
+            return parcalar[0][indeksler].astype(np.int64)
+        parca = np.searchsorted(sonlar, indeksler, side="right")
+        yer = indeksler - np.concatenate(([0], sonlar[:-1]))[parca]
+        netice = np.empty(indeksler.shape, dtype=np.int64)
+        for i in np.unique(parca):
+            secim = parca == i
+            netice[secim] = parcalar[i][yer[secim]]
+        return netice
+
+
+class OncedenYukleyici:
+    """
+    hazirla(nomre)-ni arxa thread-də çağırıb növbəti `derinlik` paketi növbədə hazır saxlayır —
+    məlumat hazırlığı təlim addımı ilə üst-üstə düşür. derinlik=0 — sinxron (thread yoxdur).
+    Paket yalnız nömrəsindən asılı olmalıdır ki, nəticə thread-in sürətindən asılı olmasın.
+    """
+    def __init__(self, hazirla, derinlik=4, bashlangic=0):
+        self.hazirla = hazirla
+        self.derinlik = derinlik
+        self._nomre = bashlangic
+        self._dayan = threading.Event()
+        self._thread = None
+        if derinlik > 0:
+            self._novbe = queue.Queue(maxsize=derinlik)
+            self._thread = threading.Thread(target=self._islet, name="ismayil-melumat", daemon=True)
+            self._thread.start()
+
+    def _islet(self):
+        nomre = self._nomre
+        while not self._dayan.is_set():
+            try:
+                element = ("paket", self.hazirla(nomre))
+            except BaseException as xata:
+                element = ("xeta", xata)
+            while not self._dayan.is_set():
+                try:
+                    self._novbe.put(element, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if element[0] == "xeta":
+                return
+            nomre += 1
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._thread is None:
+            self._nomre += 1
+            return self.hazirla(self._nomre - 1)
+        nov, deyer = self._novbe.get()
+        if nov == "xeta":
+            raise deyer
+        return deyer
+
+    def bagla(self):
+        self._dayan.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mətn korpusunu uint16 token parçalarına çevirmək")
+    parser.add_argument("fayllar", nargs="+", help="UTF-8 mətn faylları (göstərilən sıra ilə birləşdirilir)")
+    parser.add_argument("--cixis", default="data", help="Parçaların və index.json-un qovluğu")
+    parser.add_argument("--tokenizer", default=None, help="Mövcud tokenizer.json (verilməzsə korpusdan qurulur)")
+    parser.add_argument("--tokenizator", choices=list(TOKENIZATOR_NOVLERI), default="simvol")
+    parser.add_argument("--bpe-luget", type=int, default=512)
+    parser.add_argument("--yoxlama-payi", type=float, default=0.1, help="Hər hissənin yoxlamaya gedən payı")
+    parser.add_argument("--parca-olcusu", type=int, default=1 << 26, help="Bir .bin faylındakı token sayı")
+    parser.add_argument("--hisse-mb", type=int, default=16, help="Bir dəfəyə oxunan mətn (milyon simvol)")
+    args = parser.parse_args()
+    melumati_hazirla(args.fayllar, args.cixis,
+                     tokenizator=tokenizatoru_yukle(args.tokenizer) if args.tokenizer else None,
+                     tokenizator_novu=args.tokenizator, bpe_luget_olcusu=args.bpe_luget,
+                     yoxlama_payi=args.yoxlama_payi, parca_olcusu=args.parca_olcusu,
+                     hisse_olcusu=args.hisse_mb << 20)
@@ -0,0 +1,135 @@
+"""
+sampler.py — Növbəti simvolun seçilməsi (sampling)
+==================================================
+Temperatur, top-k, top-p (nucleus) və təkrar cəzası bütün paket (batch) üzərində tenzor
+əməliyyatları ilə tətbiq olunur. Paketin hər sətrinin öz parametrləri və öz təsadüfi
+generatoru (seed) ola bilər.
+"""
+
+from typing import List
+
+import torch
+from torch.nn import functional as F
+
+from generation import SecimParametrleri
+
+
+class PaketSecici:
+    """
+    Paketdəki hər sətir üçün öz parametrləri ilə növbəti simvolu seçir.
+    Təkrar cəzası üçün hər sətirdə hansı simvolların artıq göründüyünü yadda saxlayır.
+    """
+    def __init__(self, parametrler: List[SecimParametrleri], luget_olcusu: int, cihaz="cpu"):
+        self.luget_olcusu = luget_olcusu
+        self.cihaz = cihaz
+        self.temperatur = torch.tensor([p.temperatur for p in parametrler], dtype=torch.float32, device=cihaz)
+        self.top_k = torch.tensor([p.top_k for p in parametrler], dtype=torch.long, device=cihaz)
+        self.top_p = torch.tensor([p.top_p for p in parametrler], dtype=torch.float32, device=cihaz)
+        self.tekrar_cezasi = torch.tensor([p.tekrar_cezasi for p in parametrler], dtype=torch.float32, device=cihaz)
+        # Seed verilmiş sətirlərin öz generatorları olur, qalanları qlobal RNG-dən istifadə edir
+        self.generatorlar = []
+        for p in parametrler:
+            if p.toxum is None:
+                self.generatorlar.append(None)
+            else:
+                g = torch.Generator(device=cihaz)
+                g.manual_seed(p.toxum)
+                self.generatorlar.append(g)
+        self.gorulub = torch.zeros(len(parametrler), luget_olcusu, dtype=torch.bool, device=cihaz)
+
+    def kecmishi_qeyd_et(self, indeksler):
+        # indeksler: (B, T) — bu simvollar təkrar cəzasına düşəcək
+        if indeksler.numel():
+            self.gorulub.scatter_(1, indeksler, True)
+
+    def setri_teyin_et(self, setir: int, parametrler: SecimParametrleri, kecmish: List[int]):
+        """Paketin bir sətrini yeni sorğu üçün hazırlayır (davamlı paketləmədə sətirlər təkrar istifadə olunur)."""
+        self.temperatur[setir] = parametrler.temperatur
+        self.top_k[setir] = parametrler.top_k
+        self.top_p[setir] = parametrler.top_p
+        self.tekrar_cezasi[setir] = parametrler.tekrar_cezasi
+        g = None
+        if parametrler.toxum is not None:
+            g = torch.Generator(device=self.cihaz)
+            g.manual_seed(parametrler.toxum)
+        self.generatorlar[setir] = g
+        self.gorulub[setir] = False
+        if kecmish:
+            self.gorulub[setir, torch.tensor(kecmish, dtype=torch.long, device=self.cihaz)] = True
+
+    def _kuy(self, ehtimallar, setirler):
+        # Hər sətir üçün Exp(1) küyü: argmax(p / küy) multinomial ilə eyni paylanmanı verir
+        kuy = torch.empty_like(ehtimallar).exponential_()
+        for i, setir in enumerate(setirler):
+            g = self.generatorlar[setir]
+            if g is not None:
+                kuy[i].exponential_(generator=g)
+        return kuy
+
+    def _suz(self, logitler, indeks, gorulub):
+        """
+        Təkrar cəzası, temperatur, top-k və top-p-ni tətbiq edir.
+        Qaytarır: sıralanmış fəzada süzülmüş logitlər, sıralama indeksləri və greedy sətirlərin maskası.
+        """
+        temperatur = self.temperatur[indeks]
+
+        # Təkrar cəzası (CTRL üslubu): görünmüş simvolların logitlərini zəiflədirik
+        ceza = self.tekrar_cezasi[indeks][:, None]
+        cezali = torch.where(logitler > 0, logitler / ceza, logitler * ceza)
+        logitler = torch.where(gorulub, cezali, logitler)
+
+        greedy = temperatur == 0
+        logitler = logitler / temperatur.clamp_min(1e-5)[:, None]
+
+        # Bir dəfə sıralayıb həm top-k, həm də top-p-ni sıralanmış fəzada tətbiq edirik
+        sirali, sira_indeksleri = logitler.sort(dim=-1, descending=True)
+        movqeler = torch.arange(self.luget_olcusu, device=logitler.device)[None, :]
+        top_k = self.top_k[indeks]
+        k = torch.where(top_k > 0, top_k, self.luget_olcusu)[:, None]
+        sirali = sirali.masked_fill(movqeler >= k, float('-inf'))
+
+        ehtimallar = F.softmax(sirali, dim=-1)
+        # Özündən əvvəlki ehtimalların cəmi top_p-ni keçən simvolları atırıq (ən azı biri qalır)
+        evvelki_cem = ehtimallar.cumsum(dim=-1) - ehtimallar
+        sirali = sirali.masked_fill(evvelki_cem > self.top_p[indeks][:, None], float('-inf'))
+        return sirali, sira_indeksleri, greedy
+
+    def sec(self, logitler, setirler=None):
+        """
+        logitler: (B, luget_olcusu) -> (B, 1) seçilmiş simvollar.
+        setirler: logitlərin hər sətri paketin hansı sətrinə aiddir (verilməyibsə, hamısı ardıcıl).
+        """
+        logitler = logitler.float()
+        if setirler is None:
+            setirler = list(range(logitler.shape[0]))
+        indeks = torch.tensor(setirler, dtype=torch.long, device=logitler.device)
+        sirali, sira_indeksleri, greedy = self._suz(logitler, indeks, self.gorulub[indeks])
+        ehtimallar = F.softmax(sirali, dim=-1)
+
+        secim = torch.argmax(ehtimallar / self._kuy(ehtimallar, setirler), dim=-1)
+        # Greedy sətirlərdə sıralanmış fəzanın ilk elementi ən ehtimallı simvoldur
+        secim = torch.where(greedy, torch.zeros_like(secim), secim)
+        novbeti = sira_indeksleri.gather(1, secim[:, None])
+
+        self.gorulub[indeks, novbeti[:, 0]] = True
+        return novbeti
+
+    def paylanma(self, logitler, setir=0, gorulub=None):
+        """
+        Bir sətrin parametrləri ilə T mövqenin seçim paylanması — sec() ilə eyni çevrilmələr.
+        logitler: (T, luget_olcusu) -> (T, luget_olcusu) ehtimallar (greedy sətirdə bir simvolun ehtimalı 1-dir).
+        gorulub: (T, luget_olcusu) hər mövqedə təkrar cəzasına düşən simvollar (verilməyibsə, sətrin özününkü).
+        Spekulyativ generasiyada qəbul/rədd qaydası üçün lazımdır; gorulub burada yenilənmir.
+        """
+        logitler = logitler.float()
+        T = logitler.shape[0]
+        indeks = torch.full((T,), setir, dtype=torch.long, device=logitler.device)
+        if gorulub is None:
+            gorulub = self.gorulub[indeks]
+        sirali, sira_indeksleri, greedy = self._suz(logitler, indeks, gorulub)
+        ehtimallar = F.softmax(sirali, dim=-1)
+        # Greedy mövqelərdə bütün ehtimal sıralanmış fəzanın ilk simvolundadır
+        ilk = torch.zeros_like(ehtimallar)
+        ilk[:, 0] = 1.0
+        ehtimallar = torch.where(greedy[:, None], ilk, ehtimallar)
+        return torch.zeros_like(ehtimallar).scatter_(1, sira_indeksleri, ehtimallar)
@@ -0,0 +1,263 @@
+"""
+scheduler.py — Davamlı paketləmə (continuous batching) ilə generasiya planlayıcısı
+==================================================================================
+Bütün aktiv chat sorğuları bir paketdə saxlanılır və hər addımda onların hamısı üçün tək bir
+forward ötürməsi edilir. Yeni sorğular simvol sərhədlərində paketə qoşulur, bitənlər isə
+digərlərini gözlətmədən paketdən çıxır. Planlayıcı ayrıca thread-də işləyir.
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import torch
+
+from generation import ArdicilliqVeziyyeti, GenerasiyaIsteyi, NovbeDoludur, SecimParametrleri
+from sampler import PaketSecici
+
+
+class PrefiksKeshi:
+    """
+    Söhbətlərin əvvəlki növbələrindən qalan KV-yaddaş vəziyyətlərinin LRU keşi.
+    Açar — yaddaşın əhatə etdiyi simvollar (söhbətin əvvəlindən). Yeni sorğunun simvolları
+    keşdəki açarla başlayırsa, yalnız qalan hissə hesablanır.
+    """
+    def __init__(self, maks_olcu=64):
+        self.maks_olcu = maks_olcu
+        self._qeydler = OrderedDict() # tuple(simvollar) -> vəziyyət
+        self.isabet = 0
+        self.qacirma = 0
+
+    def tap(self, idler):
+        """Ən uzun uyğun prefiksi (uzunluq, vəziyyət) qaytarır; yoxdursa None."""
+        en_yaxshi = None
+        for acar in self._qeydler:
+            # Ən azı bir yeni simvol qalmalıdır ki, onun üçün logitlər hesablansın
+            if len(acar) < len(idler) and (en_yaxshi is None or len(acar) > len(en_yaxshi)) \
+                    and tuple(idler[:len(acar)]) == acar:
+                en_yaxshi = acar
+        if en_yaxshi is None:
+            self.qacirma += 1
+            return None
+        self.isabet += 1
+        self._qeydler.move_to_end(en_yaxshi)
+        return len(en_yaxshi), self._qeydler[en_yaxshi]
+
+    def qoy(self, idler, veziyyet):
+        if self.maks_olcu <= 0:
+            return
+        self._qeydler[tuple(idler)] = veziyyet
+        self._qeydler.move_to_end(tuple(idler))
+        while len(self._qeydler) > self.maks_olcu:
+            self._qeydler.popitem(last=False)
+
+
+class ChatPlanlayici:
+    """
+    Davamlı paketləmə planlayıcısı.
+    maks_paket: eyni anda generasya olunan maksimum sorğu sayı
+    maks_gozleme: boş planlayıcı ilk sorğunu aldıqdan sonra digərlərinin qoşulmasını nə qədər gözləsin (saniyə)
+    maks_novbe: paketə qoşulmağı gözləyən maksimum sorğu sayı (0 — limitsiz)
+    torch_thread_sayi: planlayıcı thread-i üçün torch intra-op thread sayı (None — dəyişdirilmir)
+    kontekst_budcesi: fırlanan mövqeli modeldə keşdə prefiksi olmayan sorğu üçün hesablanan maksimum simvol sayı
+    prefiks_keshi_olcusu: söhbət növbələri arasında saxlanılan KV-yaddaş vəziyyətlərinin sayı (0 — söndürülüb)
+    """
+    def __init__(self, model, tokenizator, cihaz="cpu", maks_paket=16, maks_gozleme=0.005,
+                 maks_novbe=0, torch_thread_sayi=None, kontekst_budcesi=512, prefiks_keshi_olcusu=64):
+        self.model = model
+        self.tokenizator = tokenizator
+        self.cihaz = cihaz
+        self.maks_paket = maks_paket
+        self.maks_gozleme = maks_gozleme
+        self.torch_thread_sayi = torch_thread_sayi
+        self.novbe = queue.Queue(maxsize=maks_novbe)
+        self.kesh = model.kesh_yarat(maks_paket, cihaz=cihaz)
+        # Mütləq mövqelərdə kontekst blok_olcusu ilə məhduddur, fırlananda isə büdcə ilə
+        self.kontekst_limiti = model.kontekst_limiti or kontekst_budcesi
+        # Prefiks vəziyyətlərini yalnız sürüşən pəncərəli yaddaş bərpa edə bilir
+        self.prefiks_keshi = PrefiksKeshi(prefiks_keshi_olcusu) \
+            if model.kontekst_limiti is None and prefiks_keshi_olcusu > 0 else None
+        self.secici = PaketSecici([SecimParametrleri()] * maks_paket, model.bash_qati.out_features, cihaz=cihaz)
+        self.aktiv = {} # paketdəki sətir -> ArdicilliqVeziyyeti
+        self.yaddash_bashlangici = {} # paketdəki sətir -> yaddaşdakı ilk simvolun idler-dəki indeksi
+        self.dekoderler = {} # paketdəki sətir -> simvolları bir-bir mətnə çevirən funksiya (BPE-də baytları yığır)
+        self.bosh_setirler = list(range(maks_paket - 1, -1, -1))
+        self._thread: Optional[threading.Thread] = None
+
+    # ── İdarəetmə ────────────────────────────────────────────────
+    def bashlat(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._dovr, name="ismayil-planlayici", daemon=True)
+            self._thread.start()
+
+    def dayandir(self):
+        if self._thread is not None:
+            self.novbe.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def gonder(self, istek: GenerasiyaIsteyi):
+        """Sorğunu növbəyə qoyur. Növbə doludursa gözləmədən NovbeDoludur qaldırır."""
+        try:
+            self.novbe.put_nowait(istek)
+        except queue.Full:
+            raise NovbeDoludur() from None
+
+    def novbe_uzunlugu(self) -> int:
+        return self.novbe.qsize()
+
+    # ── Əsas dövr ────────────────────────────────────────────────
+    def _dovr(self):
+        if self.torch_thread_sayi:
+            torch.set_num_threads(self.torch_thread_sayi)
+        while True:
+            yeniler = []
+            if not self.aktiv:
+                # Heç nə işləmir — ilk sorğunu gözləyirik, sonra qısa müddət digərlərini toplayırıq
+                ilk = self.novbe.get()
+                if ilk is None:
+                    return
+                yeniler.append(ilk)
+                son_vaxt = time.monotonic() + self.maks_gozleme
+                while len(yeniler) < len(self.bosh_setirler):
+                    qalan = son_vaxt - time.monotonic()
+                    if qalan <= 0:
+                        break
+                    try:
+                        istek = self.novbe.get(timeout=qalan)
+                    except queue.Empty:
+                        break
+                    if istek is None:
+                        return
+                    yeniler.append(istek)
+            else:
+                # Paket işləyir — boş yer varsa gözləmədən yeni sorğuları qoşuruq
+                while len(yeniler) < len(self.bosh_setirler):
+                    try:
+                        istek = self.novbe.get_nowait()
+                    except queue.Empty:
+                        break
+                    if istek is None:
+                        return
+                    yeniler.append(istek)
+
+            try:
+                with torch.no_grad():
+                    self._addim(yeniler)
+            except Exception as xata:
+                # Xəta bütün paketə aiddir — hamıya bildirib paketi boşaldırıq
+                tesir_edenler = {id(i): i for i in yeniler + [a.istek for a in self.aktiv.values()]}
+                for istek in tesir_edenler.values():
+                    istek.geri_cagiris("xeta", str(xata))
+                for setir in list(self.aktiv):
+                    self._burax(setir)
+
+    def _addim(self, yeniler: List[GenerasiyaIsteyi]):
+        # Ləğv edilmiş və vaxtı bitmiş sorğuları paketdən çıxarırıq
+        indi = time.monotonic()
+        for setir, ardicilliq in list(self.aktiv.items()):
+            if ardicilliq.istek.legv_edilib:
+                self._burax(setir)
+            elif ardicilliq.istek.vaxti_bitib(indi):
+                ardicilliq.istek.geri_cagiris("vaxt_bitdi", None)
+                self._burax(setir)
+
+        butun_setirler, butun_logitler = [], []
+
+        # 1. Yeni sorğuları paketə qəbul edib girişlərini (prefill) işləyirik
+        artiq_isleyenler = list(self.aktiv)
+        qebul_edilenler = {}
+        for istek in yeniler:
+            if istek.legv_edilib:
+                continue
+            if istek.vaxti_bitib(indi):
+                # Növbədə gözləyərkən vaxtı bitib — hesablamağa ehtiyac yoxdur
+                istek.geri_cagiris("vaxt_bitdi", None)
+                continue
+            setir = self.bosh_setirler.pop()
+            ardicilliq = ArdicilliqVeziyyeti(istek)
+            self.aktiv[setir] = ardicilliq
+            self.dekoderler[setir] = self.tokenizator.dekoder()
+            self.secici.setri_teyin_et(setir, istek.parametrler, ardicilliq.idler)
+            qebul_edilenler[setir] = self._bashlangic_konteksti(setir)
+        if qebul_edilenler:
+            butun_setirler.extend(qebul_edilenler)
+            butun_logitler.append(self._doldur(qebul_edilenler))
+
+        # 2. Artıq işləyən sorğular üçün tək simvolluq addım — yaddaşı dolanlar ayrıca yenidən hesablanır
+        adi, dolu = [], []
+        for setir in artiq_isleyenler:
+            if setir in self.aktiv:
+                (dolu if self.kesh.doludur(setir) else adi).append(setir)
+        if adi:
+            girish = torch.tensor([[self.aktiv[s].idler[-1]] for s in adi], dtype=torch.long, device=self.cihaz)
+            logitler, _ = self.model(girish, kesh=self.kesh, yalniz_son=True,
+                                     setirler=torch.tensor(adi, dtype=torch.long, device=self.cihaz))
+            butun_setirler.extend(adi)
+            butun_logitler.append(logitler[:, -1, :])
+        if dolu:
+            # Mütləq mövqelər sürüşdüyü üçün son blok_olcusu simvolu yenidən hesablayırıq
+            self.kesh.sifirla(torch.tensor(dolu, dtype=torch.long, device=self.cihaz))
+            for s in dolu:
+                self.yaddash_bashlangici[s] = len(self.aktiv[s].idler) - self.kontekst_limiti
+            butun_setirler.extend(dolu)
+            butun_logitler.append(self._doldur({s: self.aktiv[s].idler[-self.kontekst_limiti:] for s in dolu}))
+
+        if not butun_setirler:
+            return
+
+        # 3. Bütün paket üçün bir dəfəyə seçim edirik
+        novbetiler = self.secici.sec(torch.cat(butun_logitler, dim=0), butun_setirler)[:, 0].tolist()
+        for setir, simvol in zip(butun_setirler, novbetiler):
+            self._simvol_elave_et(setir, simvol)
+
+    def _bashlangic_konteksti(self, setir: int):
+        """
+        Yeni qəbul olunmuş sətrin yaddaşını hazırlayır və hələ hesablanmalı olan simvolları qaytarır.
+        Söhbətin əvvəlki növbəsinin vəziyyəti keşdədirsə, o bərpa edilir və yalnız yeni hissə qalır.
+        """
+        ardicilliq = self.aktiv[setir]
+        if self.prefiks_keshi is not None:
+            tapilan = self.prefiks_keshi.tap(ardicilliq.idler)
+            if tapilan is not None:
+                uzunluq, (bashlangic, veziyyet) = tapilan
+                self.kesh.veziyyeti_yukle(setir, veziyyet)
+                self.yaddash_bashlangici[setir] = bashlangic
+                return ardicilliq.idler[uzunluq:]
+        self.kesh.sifirla(torch.tensor([setir], dtype=torch.long, device=self.cihaz))
+        self.yaddash_bashlangici[setir] = max(0, len(ardicilliq.idler) - self.kontekst_limiti)
+        return ardicilliq.idler[self.yaddash_bashlangici[setir]:]
+
+    def _doldur(self, kontekstler):
+        # Verilmiş sətirlərin simvollarını (setir -> simvollar) yaddaşa əlavə edib son logitləri qaytarırıq.
+        # Eyni uzunluqlu sətirlər bir paketdə, fərqlilər ayrı-ayrılıqda hesablanır.
+        qruplar = {}
+        for setir, kontekst in kontekstler.items():
+            qruplar.setdefault(len(kontekst), []).append((setir, kontekst))
+        neticeler = {}
+        for qrup in qruplar.values():
+            indeks = torch.tensor([s for s, _ in qrup], dtype=torch.long, device=self.cihaz)
+            girish = torch.tensor([k for _, k in qrup], dtype=torch.long, device=self.cihaz)
+            logitler, _ = self.model(girish, kesh=self.kesh, yalniz_son=True, setirler=indeks)
+            for i, (setir, _) in enumerate(qrup):
+                neticeler[setir] = logitler[i, -1]
+        return torch.stack([neticeler[s] for s in kontekstler])
+
+    def _simvol_elave_et(self, setir: int, simvol: int):
+        ardicilliq = self.aktiv[setir]
+        if ardicilliq.simvol_elave_et(simvol, self.dekoderler[setir](simvol)):
+            if self.prefiks_keshi is not None:
+                # Söhbətin növbəti növbəsi bu cavabla başlayacaq — yaddaşı saxlayırıq.
+                # Son seçilmiş simvol hələ modelə ötürülməyib, ona görə açara daxil deyil.
+                bashlangic = self.yaddash_bashlangici[setir]
+                son = bashlangic + int(self.kesh.uzunluqlar[setir])
+                self.prefiks_keshi.qoy(ardicilliq.idler[:son], (bashlangic, self.kesh.veziyyeti_gotur(setir)))
+            self._burax(setir)
+
+    def _burax(self, setir: int):
+        del self.aktiv[setir]
+        self.yaddash_bashlangici.pop(setir, None)
+        self.dekoderler.pop(setir, None)
+        self.bosh_setirler.append(setir)
@@ -0,0 +1,138 @@
+"""
+speculative.py — Kiçik qaralama (draft) modeli ilə spekulyativ generasiya
+========================================================================
+Kiçik IsmayilModeli (məs. 1 lay, 64 ölçü — distill.py ilə öyrədilir) ardıcıl k simvol təklif edir,
+əsas model isə hamısını bir forward ötürməsində yoxlayır. Standart qəbul/rədd qaydası:
+q-dan seçilmiş x simvolu min(1, p(x) / q(x)) ehtimalı ilə qəbul edilir; ilk rədd olunan mövqedə
+yeni simvol max(0, p - q) paylanmasından seçilir, hamısı qəbul olunubsa — əsas modelin p-sindən
+əlavə bir simvol. Beləliklə nəticənin paylanması əsas modelin öz paylanması ilə eynidir, qaralama
+yalnız sürətə təsir edir. Seçim parametrləri (temperatur, top-k/top-p, təkrar cəzası) hər iki
+modelə PaketSecici.paylanma() ilə eyni şəkildə tətbiq olunur.
+
+Yalnız bir ardıcıllıq (paket 1) üçündür: tək sorğunun gecikməsini azaldır.
+Başlanğıc mətni (son simvoldan başqa) hər iki yaddaşa əvvəlcədən yazılır, ona görə hər yoxlama addımı
+yalnız k + 1 simvol ötürür; fırlanan mövqelərdə k + 1 pəncərəyə sığacaq qədər məhdudlaşdırılır ki,
+rədd olunan təkliflərin dairəvi yaddaşda geri alınması dəqiq olsun.
+Mütləq mövqeli modellərdə adi generasiya (IsmayilModeli._addimlar) kontekst blok_olcusu-nu keçəndən sonra
+hər mövqeni son blok_olcusu simvoldan yenidən hesablayır. Yoxlama addımı da eyni şeyi edir: limitə qədər
+olan mövqelər yaddaşla, ondan sonrakıların hər biri öz pəncərəsi ilə (hamısı bir paketdə) hesablanır.
+"""
+
+import torch
+from torch.nn import functional as F
+
+
+class _KeshliModel:
+    """Model və onun KV-yaddaşı; netice buferinin ilk neçə simvolunun artıq ötürüldüyünü izləyir."""
+    def __init__(self, model, cihaz):
+        self.model = model
+        self.kesh = model.kesh_yarat(1, cihaz=cihaz)
+        self.limit = model.kontekst_limiti
+        self.ishlenmish = 0
+
+    def irelile(self, netice, n, logit_lazim=True):
+        """
+        netice[:, :n]-in hələ ötürülməmiş simvollarını ötürür. Qaytarır: onların logitləri (T, luget_olcusu).
+        Mütləq mövqelərdə j-ci mövqe adi generasiyadakı kimi netice[j - limit:j]-dən proqnozlaşdırılır:
+        limitə qədər yaddaşla, ondan sonra hər mövqe öz pəncərəsi ilə. logit_lazim=False — yalnız yaddaşı doldurur.
+        """
+        logitler = []
+        yaddasha_qeder = min(n, self.limit) if self.limit else n
+        if self.ishlenmish < yaddasha_qeder:
+            logitler.append(self.model(netice[:, self.ishlenmish:yaddasha_qeder], kesh=self.kesh)[0][0])
+        bas = max(self.ishlenmish, yaddasha_qeder)
+        if bas < n and logit_lazim:
+            pencereler = netice[0, bas + 1 - self.limit:n].unfold(0, self.limit, 1)
+            logitler.append(self.model(pencereler, yalniz_son=True)[0][:, -1])
+        self.ishlenmish = n
+        return torch.cat(logitler) if logitler else None
+
+    def geri_al(self, n):
+        """netice-nin ilk n simvolundan sonrakıları unudur."""
+        artiq = self.kesh.uzunluq - n
+        if artiq > 0:
+            self.kesh.geri_al(artiq)
+        self.ishlenmish = min(self.ishlenmish, n)
+
+
+def _paylanma(logitler, secici, gorulub):
+    if secici is None:
+        return F.softmax(logitler.float(), dim=-1)
+    return secici.paylanma(logitler, 0, gorulub)
+
+
+@torch.no_grad()
+def spekulyativ_addimlar(model, qaralama, netice, n, maksimum_yeni_simvol, teklif_sayi=4, secici=None,
+                         statistika=None):
+    """
+    Generator: netice buferinin n-ci mövqeyindən başlayaraq seçilmiş simvolları (1, 1) bir-bir qaytarır
+    (IsmayilModeli._addimlar ilə eyni interfeys). Bir yoxlama addımı 1..teklif_sayi+1 simvol verir.
+    statistika (dict) verilərsə, orada 'addim', 'teklif' və 'qebul' sayları yığılır.
+    """
+    if netice.shape[0] != 1:
+        raise ValueError("Spekulyativ generasiya yalnız paket 1 üçündür")
+    if qaralama.konfiq.luget_olcusu != model.konfiq.luget_olcusu:
+        raise ValueError("Qaralama və əsas model eyni tokenizatordan (lüğətdən) istifadə etməlidir")
+    cihaz = netice.device
+    esas = _KeshliModel(model, cihaz)
+    qaralayici = _KeshliModel(qaralama, cihaz)
+    for m in (model, qaralama):
+        if m.movqe_novu != 'mutleq':
+            # Yoxlama addımı (k + 1 simvol) dairəvi yaddaşın pəncərəsinə sığmalıdır ki, geri alına bilsin
+            teklif_sayi = max(0, min(teklif_sayi, m.pencere - 1))
+    if n > 1:
+        # Son simvoldan başqa başlanğıc mətni əvvəlcədən yaddaşa yazırıq (bu addım heç vaxt geri alınmır)
+        esas.irelile(netice, n - 1, logit_lazim=False)
+        qaralayici.irelile(netice, n - 1, logit_lazim=False)
+    if secici is not None:
+        secici.kecmishi_qeyd_et(netice[:, :n])
+    # Seed verilmiş sorğuda bütün təsadüfi seçimlər onun generatorundan gəlir
+    g = secici.generatorlar[0] if secici is not None else None
+    son = n + maksimum_yeni_simvol
+    while n < son:
+        # Son simvolu həmişə əsas model seçir — bufer dolanda təklif sayı azalır
+        k = min(teklif_sayi, son - n - 1)
+        # Hər mövqedə təkrar cəzasına düşən simvollar: keçmiş + həmin mövqedən əvvəlki təkliflər
+        gorulub = [secici.gorulub[:1].clone()] if secici is not None else [None]
+
+        # 1. Qaralama k simvol təklif edir (hər biri öz paylanmasından seçilir)
+        q = []
+        for i in range(k):
+            q.append(_paylanma(qaralayici.irelile(netice, n + i)[-1:], secici, gorulub[-1])[0])
+            netice[0, n + i] = torch.multinomial(q[-1], 1, generator=g)[0]
+            if secici is not None:
+                novbeti = gorulub[-1].clone()
+                novbeti[0, netice[0, n + i]] = True
+                gorulub.append(novbeti)
+
+        # 2. Əsas model bütün təklifləri bir ötürmədə yoxlayır: k + 1 mövqenin paylanması
+        p = _paylanma(esas.irelile(netice, n + k)[-(k + 1):], secici,
+                      torch.cat(gorulub) if secici is not None else None)
+        qebul = 0
+        if k:
+            q = torch.stack(q)
+            teklifler = netice[0, n:n + k]
+            movqe = torch.arange(k, device=cihaz)
+            # r < p(x) / q(x); ilk rədd olunandan sonrakılar da rədd edilir
+            qebul_olunub = torch.rand(k, generator=g, device=cihaz) * q[movqe, teklifler] < p[movqe, teklifler]
+            qebul = int(qebul_olunub.long().cumprod(0).sum())
+        if qebul < k:
+            qaliq = (p[qebul] - q[qebul]).clamp_min(0)
+            paylanma = qaliq if qaliq.sum() > 0 else p[qebul]
+        else:
+            paylanma = p[k]
+        netice[0, n + qebul] = torch.multinomial(paylanma, 1, generator=g)[0]
+
+        yeni = qebul + 1
+        if secici is not None:
+            secici.kecmishi_qeyd_et(netice[:, n:n + yeni])
+        # Rədd olunmuş təkliflər hər iki yaddaşdan silinir; son seçilmiş simvol növbəti addımda ötürülür
+        esas.geri_al(n + qebul)
+        qaralayici.geri_al(n + qebul)
+        if statistika is not None:
+            statistika['addim'] = statistika.get('addim', 0) + 1
+            statistika['teklif'] = statistika.get('teklif', 0) + k
+            statistika['qebul'] = statistika.get('qebul', 0) + qebul
+        for j in range(n, n + yeni):
+            yield netice[:, j:j + 1]
+        n += yeni
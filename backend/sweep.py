@@ -0,0 +1,148 @@
+"""
+sweep.py — Model ölçülərinin axtarışı: keyfiyyət vs inference sürəti
+====================================================================
+Şəbəkədəki hər ölçü eyni sabit CPU büdcəsi ilə (eyni thread sayı, eyni saniyə) öyrədilir, sonra
+yoxlama bölməsinin eyni sabit pəncərələrində bit/simvol və generasiya sürəti (KV-yaddaşla, paket 1)
+ölçülür. Cədvəldə Pareto cəbhəsi (başqa heç bir ölçü həm daha dəqiq, həm daha sürətli deyil) '*' ilə işarələnir.
+
+İstifadə:
+  python sweep.py                                        # standart şəbəkə, hər ölçü 60 san
+  python sweep.py --olculer 64x2,128x4x8,256x6 --budce 120 --thread 4
+  python sweep.py --cixis sweep_models --json sweep.json  # çəkiləri (konfiqurasiya ilə) və nəticələri saxla
+
+Ölçü formatı: YERLESDIRMExLAY[xBASH], məs. 128x4 (4 başlıq) və ya 256x6x8.
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+import torch
+from torch.nn import functional as F
+
+import model as model_modulu
+from evaluate import pencereleri_qiymetlendir, suret_olc
+from model import IsmayilModeli, ModelKonfiqurasiyasi, cekileri_saxla
+from prepare_data import INDEKS_ADI, ParcaliMelumat, melumati_hazirla
+
+STANDART_OLCULER = "64x2,96x3,128x4,192x4,256x6"
+
+
+def olculeri_oxu(metn, bash_sayi):
+    """'128x4,256x6x8' -> [(yerlesdirme_olcusu, lay_sayi, bash_sayi), ...]"""
+    olculer = []
+    for hisse in metn.split(","):
+        reqemler = [int(r) for r in hisse.strip().lower().split("x")]
+        if len(reqemler) not in (2, 3):
+            raise ValueError(f"Yanlış ölçü: '{hisse}' (gözlənilən YERLESDIRMExLAY[xBASH])")
+        olculer.append((reqemler[0], reqemler[1], reqemler[2] if len(reqemler) == 3 else bash_sayi))
+    return olculer
+
+
+def budce_ile_oyret(model, melumat, budce, paket_olcusu, toxum, oyrenme_derecesi=1e-3):
+    """Modeli `budce` saniyə öyrədir. Paketlər təlimdəki kimi (toxum, nömrə) ilə seçilir. Qaytarır: addım sayı."""
+    blok_olcusu = model.konfiq.blok_olcusu
+    optimallashdirici = torch.optim.AdamW(model.parameters(), lr=oyrenme_derecesi)
+    hedd = melumat.simvol_sayi('train') - blok_olcusu
+    model.train()
+    addim = 0
+    son = time.perf_counter() + budce
+    while time.perf_counter() < son:
+        bashlangiclar = np.random.default_rng((toxum, addim)).integers(0, hedd, paket_olcusu)
+        pencereler = torch.from_numpy(melumat.paket('train', bashlangiclar, blok_olcusu + 1))
+        x, y = pencereler[:, :-1], pencereler[:, 1:]
+        ehtimallar, _ = model(x)
+        itki = F.cross_entropy(ehtimallar.reshape(-1, ehtimallar.shape[-1]), y.reshape(-1))
+        optimallashdirici.zero_grad(set_to_none=True)
+        itki.backward()
+        optimallashdirici.step()
+        addim += 1
+    return addim
+
+
+def pareto_cebhesi(neticeler):
+    """Başqa heç bir nəticə həm daha az bit/simvol, həm daha çox simvol/san verməyən nəticələrin indeksləri."""
+    cebhe = set()
+    for i, a in enumerate(neticeler):
+        ustun = any(b['bpc'] <= a['bpc'] and b['simvol_san'] >= a['simvol_san'] and
+                    (b['bpc'] < a['bpc'] or b['simvol_san'] > a['simvol_san']) for b in neticeler)
+        if not ustun:
+            cebhe.add(i)
+    return cebhe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model ölçülərini sabit CPU büdcəsində müqayisə etmək")
+    parser.add_argument("--olculer", default=STANDART_OLCULER, help="Vergüllə ayrılmış YERLESDIRMExLAY[xBASH] siyahısı")
+    parser.add_argument("--budce", type=float, default=60.0, help="Hər ölçünün təlim vaxtı (saniyə)")
+    parser.add_argument("--thread", type=int, default=4, help="torch thread sayı (bütün ölçülər üçün eyni)")
+    parser.add_argument("--paket-olcusu", type=int, default=32)
+    parser.add_argument("--blok-olcusu", type=int, default=model_modulu.blok_olcusu)
+    parser.add_argument("--bash-sayi", type=int, default=model_modulu.bash_sayi, help="Ölçüdə başlıq sayı verilməyəndə")
+    parser.add_argument("--movqe", choices=model_modulu.MOVQE_NOVLERI, default="mutleq")
+    parser.add_argument("--melumat", default=os.path.join("data", INDEKS_ADI),
+                        help="prepare_data.py indeksi (yoxdursa input.txt-dən qurulur)")
+    parser.add_argument("--qiymet-pencere", type=int, default=256, help="Sabit yoxlama pəncərələrinin sayı")
+    parser.add_argument("--generasiya", type=int, default=200, help="Sürət ölçülən generasiya uzunluğu (token)")
+    parser.add_argument("--toxum", type=int, default=1337)
+    parser.add_argument("--cixis", default="", help="Hər ölçünün çəkiləri bu qovluğa yazılsın")
+    parser.add_argument("--json", default="", help="Nəticələri JSON faylına yaz")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.thread)
+    if not os.path.exists(args.melumat):
+        if not os.path.exists("input.txt"):
+            print(f"Səhv: nə '{args.melumat}', nə də input.txt tapıldı!")
+            return
+        melumati_hazirla(["input.txt"], os.path.dirname(args.melumat))
+    melumat = ParcaliMelumat(args.melumat)
+    tokenizator = melumat.tokenizator()
+
+    qiymet_pencereleri = torch.from_numpy(melumat.ardicil_pencereler('val', args.qiymet_pencere, args.blok_olcusu + 1))
+    # BPE-də bir token bir neçə simvoldur — itkini və sürəti simvol başına çevirmək üçün
+    simvol_per_token = (len(tokenizator.de_kodlasdir(qiymet_pencereleri[:, 1:].reshape(-1).tolist()))
+                        / qiymet_pencereleri[:, 1:].numel())
+    if args.cixis:
+        os.makedirs(args.cixis, exist_ok=True)
+
+    print(f"Hər ölçü {args.budce:.0f} san, {args.thread} thread ilə öyrədilir "
+          f"(paket {args.paket_olcusu}, blok {args.blok_olcusu}, {args.movqe})")
+    neticeler = []
+    for yerlesdirme, lay, bash in olculeri_oxu(args.olculer, args.bash_sayi):
+        konfiq = ModelKonfiqurasiyasi(luget_olcusu=melumat.luget_olcusu, yerlesdirme_olcusu=yerlesdirme,
+                                      bash_sayi=bash, lay_sayi=lay, blok_olcusu=args.blok_olcusu,
+                                      movqe_novu=args.movqe)
+        torch.manual_seed(args.toxum)
+        model = IsmayilModeli(konfiq)
+        addim = budce_ile_oyret(model, melumat, args.budce, args.paket_olcusu, args.toxum)
+        model.eval()
+        itki = pencereleri_qiymetlendir(model, qiymet_pencereleri)
+        netice = {
+            'ad': f"{yerlesdirme}x{lay}x{bash}",
+            'konfiq': konfiq.lugete(),
+            'parametr_sayi': sum(p.numel() for p in model.parameters()),
+            'addim': addim,
+            'bpc': itki / math.log(2) / simvol_per_token,
+            'simvol_san': suret_olc(model, args.generasiya) * simvol_per_token,
+        }
+        neticeler.append(netice)
+        print(f"  {netice['ad']:>10}: {netice['parametr_sayi'] / 1e6:6.2f}M parametr, {addim:5d} addım, "
+              f"{netice['bpc']:.4f} bit/simvol, {netice['simvol_san']:8.1f} simvol/san")
+        if args.cixis:
+            cekileri_saxla(model, os.path.join(args.cixis, f"ismayil_{netice['ad']}.pth"))
+
+    cebhe = pareto_cebhesi(neticeler)
+    print(f"\n{'ölçü':>10} | {'parametr':>9} | {'addım':>6} | {'bit/simvol':>10} | {'simvol/san':>10} | Pareto")
+    for i, netice in sorted(enumerate(neticeler), key=lambda cut: cut[1]['bpc']):
+        print(f"{netice['ad']:>10} | {netice['parametr_sayi'] / 1e6:8.2f}M | {netice['addim']:6d} | "
+              f"{netice['bpc']:10.4f} | {netice['simvol_san']:10.1f} | {'*' if i in cebhe else ''}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'budce': args.budce, 'thread': args.thread, 'neticeler': neticeler}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+telemetry.py — Təlim addımlarının ölçüləri (JSONL)
+===================================================
+Hər təlim addımı üçün bir JSON sətri yazılır: addım vaxtı, token/san, məlumat gözləmə,
+forward/backward/optimallaşdırıcı bölgüsü, qradiyent normu, öyrənmə dərəcəsi və pik RSS.
+Fayl buferlə yazılır; CUDA-da mərhələlər hadisələrlə (event) ölçülür ki, əlavə sinxronizasiya olmasın.
+
+Faylı oxumaq üçün: pandas.read_json("train_metrics.jsonl", lines=True)
+"""
+
+import json
+import sys
+import time
+
+import torch
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+
+def pik_rss_mb():
+    """Prosesin indiyə qədərki maksimum rezident yaddaşı (MB); ölçmək mümkün deyilsə None."""
+    if resource is None:
+        return None
+    pik = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux-da KB, macOS-da bayt
+    return pik / 1024**2 if sys.platform == "darwin" else pik / 1024
+
+
+class MerheleSaygaci:
+    """
+    Addımın mərhələlərinin müddətini toplayır. nisan(merhele) əvvəlki nişandan bu ana qədərki vaxtı
+    merhele-yə əlavə edir (None — vaxt heç yerə yazılmır, məs. məlumat gözləmə ayrıca ölçülürsə).
+    CUDA-da vaxtlar hadisələrdən yalnız muddetler() çağırılanda (addımın sonunda) oxunur.
+    """
+    def __init__(self, cuda=False):
+        self.cuda = cuda
+        self._nisanlar = []
+
+    def nisan(self, merhele=None):
+        if self.cuda:
+            an = torch.cuda.Event(enable_timing=True)
+            an.record()
+        else:
+            an = time.perf_counter()
+        self._nisanlar.append((merhele, an))
+
+    def muddetler(self):
+        """Qaytarır: {merhele: millisaniyə}. Nişanlar sıfırlanır."""
+        netice = {}
+        for (_, evvel), (merhele, indi) in zip(self._nisanlar, self._nisanlar[1:]):
+            if merhele is None:
+                continue
+            ms = evvel.elapsed_time(indi) if self.cuda else (indi - evvel) * 1000
+            netice[merhele] = netice.get(merhele, 0.0) + ms
+        self._nisanlar.clear()
+        return netice
+
+
+class MetrikYazici:
+    """Qeydləri JSONL faylına əlavə edir; diskə hər `flush_araligi` qeyddən bir yazılır."""
+    def __init__(self, yol, flush_araligi=50):
+        self.yol = yol
+        self.flush_araligi = flush_araligi
+        self._fayl = open(yol, "a", encoding="utf-8")
+        self._yazilmamish = 0
+
+    def yaz(self, qeyd):
+        self._fayl.write(json.dumps(qeyd, separators=(",", ":")) + "\n")
+        self._yazilmamish += 1
+        if self._yazilmamish >= self.flush_araligi:
+            self._fayl.flush()
+            self._yazilmamish = 0
+
+    def bagla(self):
+        self._fayl.close()
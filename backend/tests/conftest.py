@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Testlər backend/ modullarını birbaşa import edir (main.py, model.py və s. paket deyil)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SaxtaPlanlayici:
+    """
+    Modelsiz planlayıcı (chat endpoint testləri üçün). davranis:
+      "cavab"      — dərhal "Salam dünya" və son
+      "yavash"     — ilk parça dərhal, qalanı `gecikme` saniyə sonra
+      "dolu"       — NovbeDoludur
+      "vaxt_bitdi" — planlayıcı vaxt limitinin aşıldığını bildirir
+      "susur"      — heç bir hadisə göndərmir (vaxt limitini server özü tətbiq etməlidir)
+    """
+    def __init__(self, davranis, gecikme=0.5):
+        self.davranis = davranis
+        self.gecikme = gecikme
+        self.sorgular = []
+
+    def gonder(self, istek):
+        from generation import NovbeDoludur
+        if self.davranis == "dolu":
+            raise NovbeDoludur()
+        self.sorgular.append(istek)
+        if self.davranis == "cavab":
+            for parca in ("Salam", " dünya"):
+                istek.geri_cagiris("hisse", parca)
+            istek.geri_cagiris("son", "stop")
+        elif self.davranis == "yavash":
+            istek.geri_cagiris("hisse", "Salam")
+
+            def bitir():
+                if not istek.legv_edilib:
+                    istek.geri_cagiris("hisse", " dünya")
+                    istek.geri_cagiris("son", "stop")
+            taymer = threading.Timer(self.gecikme, bitir)
+            taymer.daemon = True
+            taymer.start()
+        elif self.davranis == "vaxt_bitdi":
+            istek.geri_cagiris("vaxt_bitdi", None)
+
+    def dayandir(self):
+        pass
+
+
+@pytest.fixture
+def chat_server(monkeypatch):
+    """main-i SaxtaPlanlayici ilə hazır vəziyyətə gətirir. Qaytarır: qur(davranis, hazir=True) -> (planlayici, reyestr)."""
+    pytest.importorskip("fastapi")
+    import main
+    from model_registry import ModelNusxesi, ModelReyestri
+    from tokenizer import CharTokenizator
+
+    def qur(davranis, hazir=True, **kwargs):
+        planlayici = SaxtaPlanlayici(davranis, **kwargs)
+        reyestr = ModelReyestri()
+        reyestr.deyishdir(ModelNusxesi("test-v1", CharTokenizator(), None, planlayici))
+        monkeypatch.setattr(main, "model_reyestri", reyestr)
+        hazirliq = asyncio.Event()
+        if hazir:
+            hazirliq.set()
+        monkeypatch.setattr(main, "_hazirliq", hazirliq)
+        monkeypatch.setattr(main, "VAXT_LIMITI", 0.2)
+        return planlayici, reyestr
+    return qur
+
+
+def asgi_sorgu(metod, yol, **kwargs):
+    """Serverə httpx-in ASGI transportu ilə sorğu (cavab tam yığılır)."""
+    httpx = pytest.importorskip("httpx")
+    import main
+
+    async def gonder():
+        transport = httpx.ASGITransport(app=main.ismayil_server)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as musteri:
+            return await musteri.request(metod, yol, **kwargs)
+    return asyncio.run(gonder())
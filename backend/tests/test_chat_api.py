@@ -0,0 +1,113 @@
+import asyncio
+import statistics
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+
+import main
+from conftest import asgi_sorgu
+
+
+def _chat(stream=False):
+    return asgi_sorgu("POST", "/v1/chat/completions",
+                      json={"messages": [{"role": "user", "content": "salam"}], "stream": stream})
+
+
+def test_cavab_ve_model_versiyasi(chat_server):
+    _, reyestr = chat_server("cavab")
+    cavab = _chat()
+    assert cavab.status_code == 200
+    netice = cavab.json()
+    assert netice["choices"][0]["message"]["content"] == "Salam dünya"
+    assert netice["choices"][0]["finish_reason"] == "stop"
+    assert netice["model_version"] == "test-v1"
+    # Sorğu bitəndə nüsxə buraxılır: köhnəldilən kimi bağlanır
+    nusxe = reyestr.aktiv
+    nusxe.kohnelt()
+    assert nusxe.baglanib
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_novbe_dolu_olanda_503_ve_retry_after(chat_server, stream):
+    _, reyestr = chat_server("dolu")
+    cavab = _chat(stream)
+    assert cavab.status_code == 503
+    assert cavab.headers["retry-after"] == "1"
+    # Rədd edilmiş sorğu da nüsxəni buraxır
+    nusxe = reyestr.aktiv
+    nusxe.kohnelt()
+    assert nusxe.baglanib
+
+
+@pytest.mark.parametrize("davranis", ["vaxt_bitdi", "susur"])
+def test_vaxt_limiti_asilanda_504(chat_server, davranis):
+    planlayici, _ = chat_server(davranis)
+    cavab = _chat()
+    assert cavab.status_code == 504
+    # Planlayıcıdakı sorğu ləğv edilir ki, boş yerə hesablanmasın
+    assert planlayici.sorgular[0].legv_edilib
+
+
+def test_model_yuklenmeyibse_503(chat_server):
+    chat_server("cavab", hazir=False)
+    cavab = _chat()
+    assert cavab.status_code == 503
+    assert cavab.headers["retry-after"] == "5"
+
+
+def test_generasiya_zamani_ana_sehife_cavab_verir(monkeypatch):
+    # Real model: generasiya planlayıcının öz axınında gedir, hadisə dövrü "/" üçün boş qalmalıdır
+    torch = pytest.importorskip("torch")
+    from model import IsmayilModeli
+    from model_registry import ModelNusxesi, ModelReyestri
+    from scheduler import ChatPlanlayici
+    from tokenizer import CharTokenizator
+
+    torch.manual_seed(0)
+    tokenizator = CharTokenizator()
+    model = IsmayilModeli(tokenizator.luget_olcusu).eval()
+    planlayici = ChatPlanlayici(model, tokenizator, maks_paket=4)
+    planlayici.bashlat()
+    reyestr = ModelReyestri()
+    reyestr.deyishdir(ModelNusxesi("test-v1", tokenizator, model, planlayici))
+    monkeypatch.setattr(main, "model_reyestri", reyestr)
+    hazirliq = asyncio.Event()
+    hazirliq.set()
+    monkeypatch.setattr(main, "_hazirliq", hazirliq)
+    monkeypatch.setattr(main, "VAXT_LIMITI", 60)
+
+    async def olc():
+        transport = httpx.ASGITransport(app=main.ismayil_server)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as musteri:
+            istek = {"messages": [{"role": "user", "content": "salam"}], "max_tokens": 300, "stop": []}
+            generasiyalar = [asyncio.ensure_future(musteri.post("/v1/chat/completions", json=istek))
+                             for _ in range(4)]
+            await asyncio.sleep(0.1)
+            gecikmeler = []
+            while not all(g.done() for g in generasiyalar):
+                t0 = time.perf_counter()
+                assert (await musteri.get("/")).status_code == 200
+                gecikmeler.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.01)
+            return gecikmeler, [g.result() for g in generasiyalar]
+
+    try:
+        gecikmeler, cavablar = asyncio.run(olc())
+    finally:
+        reyestr.aktiv.kohnelt()
+    assert all(c.status_code == 200 for c in cavablar)
+    assert len(gecikmeler) >= 5
+    assert statistics.median(gecikmeler) < 0.05
+
+
+def test_admin_reload_token_yoxlamasi(chat_server, monkeypatch):
+    chat_server("cavab", hazir=False)
+    assert asgi_sorgu("POST", "/admin/reload").status_code == 403
+    monkeypatch.setattr(main, "ADMIN_TOKENI", "gizli")
+    for yanlis in ("", "yanlis", "gizl", "gizli1", "gizlé"):
+        assert asgi_sorgu("POST", "/admin/reload", headers={"X-Admin-Token": yanlis.encode("latin-1")}).status_code == 403
+    # Düz token icazə yoxlamasından keçir (model hələ yüklənmədiyi üçün 503)
+    assert asgi_sorgu("POST", "/admin/reload", headers={"X-Admin-Token": "gizli"}).status_code == 503
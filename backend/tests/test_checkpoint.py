@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from checkpoint import (NezaretNoqtesiYazici, nezaret_noqtesini_yukle, son_nezaret_noqtesi, veziyyeti_berpa_et,
+                        veziyyeti_gotur)
+from model import IsmayilModeli, ModelKonfiqurasiyasi
+from prepare_data import ParcaliMelumat, melumati_hazirla
+
+BLOK_OLCUSU = 16
+PAKET_OLCUSU = 8
+KORPUS = "Azərbaycan dili türk dilləri ailəsinin oğuz qrupuna daxildir. Bakı, Gəncə, Şəki, Lənkəran.\n"
+
+
+@pytest.fixture
+def melumat(tmp_path):
+    yol = tmp_path / "korpus.txt"
+    yol.write_text(KORPUS * 200, encoding="utf-8")
+    return ParcaliMelumat(melumati_hazirla([str(yol)], str(tmp_path)))
+
+
+def _qur(melumat, toxum):
+    torch.manual_seed(toxum)
+    konfiq = ModelKonfiqurasiyasi(luget_olcusu=melumat.luget_olcusu, yerlesdirme_olcusu=32, lay_sayi=2,
+                                  blok_olcusu=BLOK_OLCUSU, atilan_melumat=0.1)
+    model = IsmayilModeli(konfiq).train()  # Dropout aktivdir — RNG də bərpa olunmalıdır
+    return model, torch.optim.AdamW(model.parameters(), lr=1e-3)
+
+
+def _oyret(melumat, model, optimallashdirici, bashlangic, son):
+    for addim in range(bashlangic, son):
+        bashlangiclar = np.random.default_rng((0, addim)).integers(
+            0, melumat.simvol_sayi('train') - BLOK_OLCUSU, PAKET_OLCUSU)
+        pencereler = torch.from_numpy(melumat.paket('train', bashlangiclar, BLOK_OLCUSU + 1))
+        _, itki = model(pencereler[:, :-1], pencereler[:, 1:])
+        optimallashdirici.zero_grad(set_to_none=True)
+        itki.backward()
+        optimallashdirici.step()
+
+
+def test_nezaret_noqtesinden_davam_bit_bit_eynidir(melumat, tmp_path):
+    addim_sayi = 10
+    model, optimallashdirici = _qur(melumat, 0)
+    _oyret(melumat, model, optimallashdirici, 0, 2 * addim_sayi)
+    ardicil = model.state_dict()
+
+    # N addım, nəzarət nöqtəsi (asinxron yazıcı ilə), sonra yeni prosesdəki kimi başqa toxumla qurulmuş modeldə davam
+    nezaret_qovlugu = str(tmp_path / "checkpoints")
+    model, optimallashdirici = _qur(melumat, 0)
+    _oyret(melumat, model, optimallashdirici, 0, addim_sayi)
+    yazici = NezaretNoqtesiYazici(nezaret_qovlugu, saxla=2)
+    yazici.yaz(veziyyeti_gotur(model, optimallashdirici, addim_sayi, addim_sayi))
+    yazici.bagla()
+
+    model, optimallashdirici = _qur(melumat, 123)
+    addim, melumat_movqeyi = veziyyeti_berpa_et(nezaret_noqtesini_yukle(son_nezaret_noqtesi(nezaret_qovlugu)),
+                                                model, optimallashdirici)
+    assert (addim, melumat_movqeyi) == (addim_sayi, addim_sayi)
+    _oyret(melumat, model, optimallashdirici, melumat_movqeyi, 2 * addim_sayi)
+    davam = model.state_dict()
+
+    assert ardicil.keys() == davam.keys()
+    for ad in ardicil:
+        assert torch.equal(ardicil[ad], davam[ad]), ad
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from completion_cache import CavabKeshi
+from generation import SecimParametrleri
+
+
+def _kesh():
+    kesh = CavabKeshi()
+    kesh.versiyani_teyin_et("v1")
+    return kesh, kesh.acar([1, 2, 3], SecimParametrleri(temperatur=0.0), 10, [])
+
+
+def test_bashladan_legv_edilende_gozleyenler_neticeni_alir():
+    kesh, acar = _kesh()
+    hesablamalar = []
+
+    async def hesabla():
+        hesablamalar.append(1)
+        await asyncio.sleep(0.05)
+        return "cavab", "stop"
+
+    async def isle():
+        bashladan = asyncio.ensure_future(kesh.al_ve_ya_hesabla(acar, hesabla))
+        await asyncio.sleep(0)
+        gozleyen = asyncio.ensure_future(kesh.al_ve_ya_hesabla(acar, hesabla))
+        await asyncio.sleep(0.01)
+        bashladan.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await bashladan
+        return await gozleyen
+
+    assert asyncio.run(isle()) == ("cavab", "stop")
+    assert len(hesablamalar) == 1
+    assert kesh.al(acar) == ("cavab", "stop")
+    assert (kesh.qacirma, kesh.birleshdirilen) == (1, 1)
+    assert not kesh._gedenler
+
+
+def test_hamisi_gedende_generasiya_legv_edilir():
+    kesh, acar = _kesh()
+
+    async def isle():
+        dayandi = asyncio.Event()
+
+        async def hesabla():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                dayandi.set()
+                raise
+        sorgular = [asyncio.ensure_future(kesh.al_ve_ya_hesabla(acar, hesabla)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for sorgu in sorgular:
+            sorgu.cancel()
+        await asyncio.wait_for(dayandi.wait(), 1)
+        await asyncio.sleep(0)
+
+    asyncio.run(isle())
+    assert kesh.al(acar) is None
+    assert not kesh._gedenler
+
+
+def test_xeta_butun_gozleyenlere_catir_ve_keshe_yazilmir():
+    kesh, acar = _kesh()
+
+    async def hesabla():
+        await asyncio.sleep(0.01)
+        raise asyncio.TimeoutError()
+
+    async def isle():
+        return await asyncio.gather(*(kesh.al_ve_ya_hesabla(acar, hesabla) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(netice, asyncio.TimeoutError) for netice in asyncio.run(isle()))
+    assert kesh.al(acar) is None
+    assert not kesh._gedenler
+
+
+def test_axin_ucun_al_sayqaclari_artirir():
+    kesh, acar = _kesh()
+    assert kesh.axin_ucun_al(acar) is None
+    kesh.qoy(acar, ("cavab", "stop"))
+    assert kesh.axin_ucun_al(acar) == ("cavab", "stop")
+    assert kesh.statistika()["hits"] == 1
+    assert kesh.statistika()["misses"] == 1
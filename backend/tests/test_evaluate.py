@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from prepare_data import ParcaliMelumat, melumati_hazirla
+
+
+@pytest.fixture
+def melumat(tmp_path):
+    # 1000 simvolluq korpus: yoxlama bölməsi (son 10%) təxminən 100 tokendir
+    korpus = tmp_path / "korpus.txt"
+    korpus.write_text("salam dünya " * 84, encoding="utf-8")
+    return ParcaliMelumat(melumati_hazirla([str(korpus)], cixis=str(tmp_path / "data")))
+
+
+def test_ardicil_pencereler_sabitdir(melumat):
+    pencereler = melumat.ardicil_pencereler("val", 4, 17)
+    assert pencereler.shape == (4, 17)
+    np.testing.assert_array_equal(pencereler, melumat.ardicil_pencereler("val", 4, 17))
+
+
+@pytest.mark.parametrize("say, uzunluq", [(4, 10_000), (0, 17)])
+def test_pencere_sigmayanda_valueerror(melumat, say, uzunluq):
+    with pytest.raises(ValueError, match="val"):
+        melumat.ardicil_pencereler("val", say, uzunluq)
+
+
+def test_qiymetlendirme_bosh_pencerelerde_valueerror():
+    torch = pytest.importorskip("torch")
+    from evaluate import bit_simvol_hesabla, pencereleri_qiymetlendir
+    from model import IsmayilModeli
+
+    model = IsmayilModeli(20).eval()
+    with pytest.raises(ValueError):
+        pencereleri_qiymetlendir(model, torch.zeros((0, 9), dtype=torch.long))
+    with pytest.raises(ValueError, match="qısadır"):
+        bit_simvol_hesabla(model, torch.zeros(5, dtype=torch.long), 8)
+    itki = pencereleri_qiymetlendir(model, torch.randint(0, 20, (3, 9)))
+    assert np.isfinite(itki)
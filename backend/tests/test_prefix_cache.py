@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("fastapi")
+
+from generation import GenerasiyaIsteyi
+from main import ChatIsteyi
+from model import IsmayilModeli, ModelKonfiqurasiyasi
+from scheduler import ChatPlanlayici
+from tokenizer import CharTokenizator
+
+
+def _novbe(planlayici, tokenizator, mesajlar, toxum):
+    # /v1/chat/completions-dakı kimi: tarixçə ChatIsteyi.tarixce()-dən, dayanmalar dayanmalar()-dan
+    istek = ChatIsteyi(messages=mesajlar, max_tokens=20, seed=toxum)
+    cavab, bitdi = [], threading.Event()
+
+    def geri_cagiris(hadise, deyer):
+        if hadise == "hisse":
+            cavab.append(deyer)
+        elif hadise in ("son", "xeta", "vaxt_bitdi"):
+            bitdi.set()
+
+    planlayici.gonder(GenerasiyaIsteyi(tokenizator.kodlasdir(istek.tarixce()), istek.secim_parametrleri(),
+                                       istek.max_tokens, istek.dayanmalar(), geri_cagiris))
+    assert bitdi.wait(30)
+    return "".join(cavab)
+
+
+def test_novbeti_novbe_evvelki_novbenin_yaddashini_berpa_edir():
+    tokenizator = CharTokenizator()
+    torch.manual_seed(0)
+    model = IsmayilModeli(ModelKonfiqurasiyasi(luget_olcusu=tokenizator.luget_olcusu, yerlesdirme_olcusu=32,
+                                               lay_sayi=2, movqe_novu='firlanma')).eval()
+    planlayici = ChatPlanlayici(model, tokenizator, maks_paket=2, maks_gozleme=0.0, prefiks_keshi_olcusu=8)
+    planlayici.bashlat()
+    try:
+        mesajlar = [{"role": "user", "content": "Salam, necesen?"}]
+        for novbe in range(3):
+            cavab = _novbe(planlayici, tokenizator, mesajlar, novbe)
+            mesajlar += [{"role": "assistant", "content": cavab}, {"role": "user", "content": "Bes sonra?"}]
+        # İlk növbədən başqa hər növbə keşdəki "tarixçə + cavab" prefiksindən davam edir
+        assert planlayici.prefiks_keshi.isabet == 2
+        assert planlayici.prefiks_keshi.qacirma == 1
+    finally:
+        planlayici.dayandir()
+
+
+def test_tarixce_cavabi_yeni_setirden_bashladir():
+    istek = ChatIsteyi(messages=[{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}])
+    assert istek.tarixce() == "a\nb\n"
@@ -0,0 +1,50 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from generation import SecimParametrleri
+from model import IsmayilModeli, ModelKonfiqurasiyasi
+from sampler import PaketSecici
+
+LUGET_OLCUSU = 50
+
+
+def _model(toxum, movqe_novu, yerlesdirme_olcusu=32, lay_sayi=2):
+    torch.manual_seed(toxum)
+    konfiq = ModelKonfiqurasiyasi(luget_olcusu=LUGET_OLCUSU, yerlesdirme_olcusu=yerlesdirme_olcusu, bash_sayi=4,
+                                  lay_sayi=lay_sayi, blok_olcusu=16, atilan_melumat=0.0, movqe_novu=movqe_novu)
+    return IsmayilModeli(konfiq).eval()
+
+
+def _generasiya(model, bashlangic, simvol_sayi, qaralama=None, teklif_sayi=4):
+    secici = PaketSecici([SecimParametrleri(temperatur=0)], LUGET_OLCUSU)
+    with torch.no_grad():
+        return model.yeni_metn_yarat(bashlangic, simvol_sayi, secici=secici, qaralama=qaralama,
+                                     teklif_sayi=teklif_sayi)
+
+
+@pytest.mark.parametrize("teklif_sayi", [2, 4, 20])
+def test_greedy_spekulyativ_pencereden_uzun_bashlangicla_eynidir(teklif_sayi):
+    # Başlanğıc mətni pəncərədən (16) uzundur; qaralama fərqli modeldir — təkliflərin bir hissəsi rədd olunur
+    # Bir neçə başlanğıc: itirilmiş açarlar argmax-ı hər dəfə dəyişmir
+    model = _model(0, "firlanma")
+    qaralama = _model(1, "firlanma", yerlesdirme_olcusu=16, lay_sayi=1)
+    for toxum in range(6):
+        for uzunluq in (20, 40):
+            bashlangic = torch.randint(LUGET_OLCUSU, (1, uzunluq), generator=torch.Generator().manual_seed(toxum))
+            adi = _generasiya(model, bashlangic, 60)
+            spekulyativ = _generasiya(model, bashlangic, 60, qaralama, teklif_sayi)
+            assert torch.equal(spekulyativ, adi), (toxum, uzunluq)
+
+
+@pytest.mark.parametrize("teklif_sayi", [2, 4, 20])
+def test_greedy_spekulyativ_mutleq_movqelerde_eynidir(teklif_sayi):
+    # Generasiya blok_olcusu-nu (16) çox keçir; başlanğıc həm limitdən qısa, həm uzundur
+    model = _model(0, "mutleq")
+    qaralama = _model(1, "mutleq", yerlesdirme_olcusu=16, lay_sayi=1)
+    for toxum in range(6):
+        for uzunluq in (5, 20):
+            bashlangic = torch.randint(LUGET_OLCUSU, (1, uzunluq), generator=torch.Generator().manual_seed(toxum))
+            adi = _generasiya(model, bashlangic, 60)
+            spekulyativ = _generasiya(model, bashlangic, 60, qaralama, teklif_sayi)
+            assert torch.equal(spekulyativ, adi), (toxum, uzunluq)
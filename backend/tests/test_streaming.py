@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+import main
+from conftest import asgi_sorgu
+
+
+async def _asgi_axin(tel, kesildi=None):
+    """
+    Chat sorğusunu ASGI tətbiqinə birbaşa göndərir və hər gövdə parçasının gəldiyi anı qeyd edir
+    (httpx-in ASGI transportu cavabı tam yığır, ona görə ilk tokenin vaxtını ölçmək olmur).
+    kesildi: asyncio.Event — qurulan kimi müştəri bağlantını kəsmiş sayılır.
+    Qaytarır: [(saniyə, mətn parçası)], status kodu
+    """
+    bedene = json.dumps(tel).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/v1/chat/completions", "raw_path": b"/v1/chat/completions",
+        "root_path": "", "query_string": b"", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(bedene)).encode())],
+    }
+    kesildi = kesildi or asyncio.Event()
+    gonderildi = False
+
+    async def receive():
+        nonlocal gonderildi
+        if not gonderildi:
+            gonderildi = True
+            return {"type": "http.request", "body": bedene, "more_body": False}
+        await kesildi.wait()
+        return {"type": "http.disconnect"}
+
+    bashlangic = time.perf_counter()
+    parcalar, status = [], None
+
+    async def send(mesaj):
+        nonlocal status
+        if mesaj["type"] == "http.response.start":
+            status = mesaj["status"]
+        elif mesaj.get("body"):
+            parcalar.append((time.perf_counter() - bashlangic, mesaj["body"].decode()))
+
+    await main.ismayil_server(scope, receive, send)
+    return parcalar, status
+
+
+def _tel(**kwargs):
+    return {"messages": [{"role": "user", "content": "salam"}], "stream": True, **kwargs}
+
+
+def test_axin_sse_parcalari(chat_server):
+    chat_server("cavab")
+    cavab = asgi_sorgu("POST", "/v1/chat/completions", json=_tel())
+    assert cavab.status_code == 200
+    assert cavab.headers["content-type"].startswith("text/event-stream")
+    assert cavab.headers["x-model-version"] == "test-v1"
+    hadiseler = [setir[len("data: "):] for setir in cavab.text.split("\n\n") if setir]
+    assert hadiseler[-1] == "[DONE]"
+    parcalar = [json.loads(h) for h in hadiseler[:-1]]
+    assert parcalar[0]["choices"][0]["delta"] == {"role": "assistant"}
+    assert "".join(p["choices"][0]["delta"].get("content", "") for p in parcalar) == "Salam dünya"
+    assert parcalar[-1]["choices"][0]["finish_reason"] == "stop"
+    assert all(p["model_version"] == "test-v1" for p in parcalar)
+
+
+def test_ilk_token_cavab_bitmeden_gelir(chat_server, monkeypatch):
+    # Planlayıcı ilk parçanı dərhal, qalanını 0.5 san sonra verir: ilk token gözləmədən müştəriyə çatmalıdır
+    chat_server("yavash", gecikme=0.5)
+    monkeypatch.setattr(main, "VAXT_LIMITI", 5)
+    parcalar, status = asyncio.run(_asgi_axin(_tel()))
+    assert status == 200
+    ilk_token = next(an for an, metn in parcalar if '"content"' in metn)
+    assert ilk_token < 0.25
+    assert parcalar[-1][1] == "data: [DONE]\n\n"
+    assert parcalar[-1][0] >= 0.5
+
+
+def test_musteri_gedende_generasiya_legv_edilir(chat_server, monkeypatch):
+    planlayici, reyestr = chat_server("yavash", gecikme=2)
+    monkeypatch.setattr(main, "VAXT_LIMITI", 5)
+
+    async def isle():
+        kesildi = asyncio.Event()
+        tapshiriq = asyncio.ensure_future(_asgi_axin(_tel(), kesildi))
+        # İlk parça gəlib-gəlmədiyini gözləyib bağlantını kəsirik
+        while not planlayici.sorgular:
+            await asyncio.sleep(0.01)
+        kesildi.set()
+        bashlangic = time.perf_counter()
+        parcalar, _ = await tapshiriq
+        return parcalar, time.perf_counter() - bashlangic
+
+    parcalar, muddet = asyncio.run(isle())
+    # Generasiya sona qədər gözlənilmir və planlayıcıdakı sorğu ləğv edilir
+    assert muddet < 1
+    assert planlayici.sorgular[0].legv_edilib
+    assert all("[DONE]" not in metn for _, metn in parcalar)
+    # Axın nüsxəni buraxıb
+    nusxe = reyestr.aktiv
+    nusxe.kohnelt()
+    assert nusxe.baglanib
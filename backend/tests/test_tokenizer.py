@@ -0,0 +1,26 @@
+import os
+import string
+
+from tokenizer import AZERBAYCAN_HERFLERI, BPETokenizator, CharTokenizator
+
+# Təlim korpusunun əlifbası: standart simvollar + Azərbaycan hərfləri + bütün ASCII durğu işarələri
+ELIFBA = "".join(CharTokenizator().simvollar) + AZERBAYCAN_HERFLERI + string.punctuation + "\t"
+if os.path.exists("input.txt"):
+    with open("input.txt", "r", encoding="utf-8") as f:
+        ELIFBA += "".join(sorted(set(f.read())))
+
+NUMUNELER = [
+    "snake_case_name",
+    "__init__ və _gizli_deyisen",
+    "Salam, dünya! Bu gün hava necədir? 2026-10-18",
+    "  iki  boşluq\n\nyeni sətir\t tab  ",
+    "emoji 🚀 və ƏŞÇĞİÖÜ",
+]
+
+
+def test_bpe_butun_elifbani_itkisiz_kodlashdirir():
+    for tokenizator in (BPETokenizator(), BPETokenizator("\n".join(NUMUNELER + [ELIFBA]) * 5, luget_olcusu=320)):
+        for simvol in ELIFBA:
+            assert tokenizator.de_kodlasdir(tokenizator.kodlasdir(simvol)) == simvol
+        for metn in NUMUNELER + [ELIFBA]:
+            assert tokenizator.de_kodlasdir(tokenizator.kodlasdir(metn)) == metn
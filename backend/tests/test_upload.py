@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+
+import main
+
+MB = 1024 * 1024
+SINIR = "ismayiltest"
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # İş qovluqları müvəqqəti qovluqda yaranır, Kaggle-a iş göndərilmir
+    monkeypatch.chdir(tmp_path)
+    gonderilen = []
+    monkeypatch.setattr(main, "is_gondər", lambda *args, **kwargs: gonderilen.append((args, kwargs)))
+    monkeypatch.setattr(main, "MAKS_VIDEO_OLCUSU", 8 * MB)
+    return gonderilen
+
+
+def _parca(olcu):
+    return bytes(range(256)) * (olcu // 256) + bytes(range(olcu % 256))
+
+
+def _gonder(olcu, fayl_adi="video.mp4", content_length=None, prompt="oil painting"):
+    """Multipart gövdəsini 64 KB-lıq parçalarla göndərir. Qaytarır: (cavab, göndərilən fayl baytları)."""
+    gonderilen = [0]
+    blok = _parca(64 * 1024)
+
+    async def govde():
+        yield (f'--{SINIR}\r\nContent-Disposition: form-data; name="video"; filename="{fayl_adi}"\r\n'
+               f'Content-Type: video/mp4\r\n\r\n').encode()
+        qalan = olcu
+        while qalan > 0:
+            parca = blok[:qalan]
+            gonderilen[0] += len(parca)
+            yield parca
+            qalan -= len(parca)
+        yield f'\r\n--{SINIR}\r\nContent-Disposition: form-data; name="prompt"\r\n\r\n{prompt}\r\n--{SINIR}--\r\n'.encode()
+
+    async def sorgu():
+        basliqlar = {"Content-Type": f"multipart/form-data; boundary={SINIR}"}
+        if content_length is not None:
+            basliqlar["Content-Length"] = str(content_length)
+        transport = httpx.ASGITransport(app=main.ismayil_server)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as musteri:
+            return await musteri.post("/video/edit", content=govde(), headers=basliqlar)
+
+    return asyncio.run(sorgu()), gonderilen[0]
+
+
+def _gozlenilen_hash(olcu):
+    hesh, blok = hashlib.sha256(), _parca(64 * 1024)
+    for bashlangic in range(0, olcu, len(blok)):
+        hesh.update(blok[:olcu - bashlangic])
+    return hesh.hexdigest()
+
+
+def _is_qovluqlari():
+    return os.listdir("video_jobs") if os.path.exists("video_jobs") else []
+
+
+def test_yukleme_diske_yazilir_hash_ve_olcu_duzgundur(server):
+    olcu = 3 * MB + 123
+    cavab, _ = _gonder(olcu)
+    assert cavab.status_code == 200
+    netice = cavab.json()
+    assert netice["size_bytes"] == olcu
+    assert netice["sha256"] == _gozlenilen_hash(olcu)
+    yol = os.path.join("video_jobs", netice["job_id"], "video.mp4")
+    assert os.path.getsize(yol) == olcu
+    with open(yol, "rb") as f:
+        assert hashlib.sha256(f.read()).hexdigest() == netice["sha256"]
+    (is_id, video_yolu, prompt), elave = server[0]
+    assert (is_id, prompt, elave["sha256"]) == (netice["job_id"], "oil painting", netice["sha256"])
+
+
+def test_hedd_yukleme_zamani_asilir_ve_qovluq_silinir(server):
+    cavab, gonderilen = _gonder(20 * MB)
+    assert cavab.status_code == 413
+    # Oxuma hədd aşılan kimi dayanır — qalan 12 MB göndərilmir
+    assert gonderilen < 9 * MB
+    assert _is_qovluqlari() == []
+    assert server == []
+
+
+def test_content_length_ile_hedd_oxumadan_yoxlanilir(server):
+    cavab, gonderilen = _gonder(20 * MB, content_length=20 * MB + 512)
+    assert cavab.status_code == 413
+    assert gonderilen == 0
+    assert _is_qovluqlari() == []
+
+
+def test_fayl_adinin_yol_hisseleri_atilir(server):
+    for fayl_adi in ("../../etc/klip.mp4", "..\\..\\klip.mp4", "/tmp/klip.mp4"):
+        cavab, _ = _gonder(1024, fayl_adi=fayl_adi)
+        assert cavab.status_code == 200
+        assert cavab.json()["filename"] == "klip.mp4"
+        is_qovlugu = os.path.join("video_jobs", cavab.json()["job_id"])
+        assert os.listdir(is_qovlugu) == ["video.mp4"]
+    assert not os.path.exists(os.path.join("..", "..", "etc", "klip.mp4"))
+
+
+@pytest.mark.parametrize("fayl_adi, diskdeki_ad", [
+    ("output.mp4", "video.mp4"), ("prompt.txt.mov", "video.mov"), ("KLIP.MKV", "video.mkv"),
+])
+def test_diskdeki_ad_musteriden_asili_deyil(server, fayl_adi, diskdeki_ad):
+    # İş qovluğundakı output.mp4 (Kaggle nəticəsi) və prompt.txt müştərinin faylı ilə əvəz oluna bilməz
+    cavab, _ = _gonder(1024, fayl_adi=fayl_adi)
+    assert cavab.status_code == 200
+    is_id = cavab.json()["job_id"]
+    assert os.listdir(os.path.join("video_jobs", is_id)) == [diskdeki_ad]
+    (_, video_yolu, _), elave = server[-1]
+    assert os.path.basename(video_yolu) == diskdeki_ad
+    assert elave["orijinal_ad"] == fayl_adi
+
+
+def test_bosh_fayl_ve_promptsuz_sorgu_redd_edilir(server):
+    assert _gonder(0)[0].status_code == 400
+    assert _gonder(1024, prompt="")[0].status_code == 422
+    assert _is_qovluqlari() == []
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/clear_refs"), reason="VmHWM yalnız Linux-da")
+def test_pik_yaddash_fayl_olcusunden_asili_deyil(server, monkeypatch):
+    monkeypatch.setattr(main, "MAKS_VIDEO_OLCUSU", 64 * MB)
+    _gonder(1 * MB)  # İsinma: modulların, thread hovuzunun ilk yaddaşı
+
+    def rss(sahe):
+        with open("/proc/self/status") as f:
+            return next(int(setir.split()[1]) * 1024 for setir in f if setir.startswith(sahe + ":"))
+
+    artimlar = []
+    for olcu in (4 * MB, 48 * MB):
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        evvel = rss("VmRSS")
+        cavab, _ = _gonder(olcu)
+        assert cavab.status_code == 200
+        artimlar.append(rss("VmHWM") - evvel)
+    # 12 dəfə böyük fayl yaddaşı faylın ölçüsünə mütənasib artırmır
+    assert artimlar[1] < 4 * MB
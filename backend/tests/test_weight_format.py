@@ -0,0 +1,26 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from weight_format import cekileri_yaz, torch_cekilerini_oxu
+
+
+def test_butun_tiplerin_gedis_gelisi(tmp_path):
+    # bf16 numpy-da yoxdur — yazı və oxu yalnız torch üzərindən gedir
+    ceki = {
+        "f32": torch.randn(3, 5),
+        "bf16": torch.randn(7).to(torch.bfloat16),
+        "f16": torch.randn(2, 2).half(),
+        "i64": torch.arange(4),
+        "i8": torch.tensor([-1, 2], dtype=torch.int8),
+        "bool": torch.tensor([True, False, True]),
+        "bosh": torch.empty(0, 4),
+    }
+    yol = str(tmp_path / "ceki.safetensors")
+    cekileri_yaz(ceki, yol, metadata={"format": "pt"})
+    oxunan, metadata = torch_cekilerini_oxu(yol)
+    assert metadata == {"format": "pt"}
+    assert oxunan.keys() == ceki.keys()
+    for ad, tenzor in ceki.items():
+        assert oxunan[ad].dtype == tenzor.dtype
+        assert torch.equal(oxunan[ad], tenzor)
@@ -1,11 +1,35 @@
+import codecs
 import json
+import re
+import sys
+from collections import Counter
+
+# NumPy opsionaldir — yalnız massiv qaytaran (toplu) metodlar üçün lazımdır
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Böyük mətnlər hissə-hissə kodlaşdırılır ki, aralıq massivlər (hər simvol üçün 4 bayt) yaddaşı doldurmasın
+_HISSE_OLCUSU = 1 << 24
+_UTF32 = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+class _NamelumSimvollar(dict):
+    # str.translate üçün cədvəl: lüğətdə olmayan simvol ya silinir (None), ya da naməlum simvola çevrilir
+    def __init__(self, xerite, evezi):
+        super().__init__(xerite)
+        self.evezi = evezi
+
+    def __missing__(self, kod):
+        return self.evezi
 
 class CharTokenizator:
     """
-    Bu sinif mətnləri ayrı-ayrı simvollar (hərflər, rəqəmlər) səviyyəsində rəqəmlərə (tokenlərə) 
+    Bu sinif mətnləri ayrı-ayrı simvollar (hərflər, rəqəmlər) səviyyəsində rəqəmlərə (tokenlərə)
     çevirmək və əksinə, rəqəmləri mətnə qaytarmaq üçün istifadə olunur.
+    namelum_id: lüğətdə olmayan simvollar bu id ilə əvəz olunur (None — atılır)
     """
-    def __init__(self, metn=""):
+    def __init__(self, metn="", namelum_id=None):
         # Əgər mətn verilibsə, ondan unikal simvollar siyahısını (vocabı) yaradırıq
         if metn:
             self.simvollar = sorted(list(set(metn)))
@@ -13,37 +37,296 @@ class CharTokenizator:
             # Standart olaraq istifadə olunacaq simvollar dəsti
             xususi_simvollar = " abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,!?\n"
             self.simvollar = sorted(list(set(xususi_simvollar)))
-        
+        self.namelum_id = namelum_id
+        self._cedvelleri_qur()
+
+    def _cedvelleri_qur(self):
         # Lüğətin ümumi ölçüsü
         self.luget_olcusu = len(self.simvollar)
-        
+        if self.namelum_id is not None and not 0 <= self.namelum_id < self.luget_olcusu:
+            raise ValueError(f"namelum_id lüğət daxilində olmalıdır (0..{self.luget_olcusu - 1})")
+
         # Simvoldan rəqəmə (String to Integer) çevirmə xəritəsi
         self.simvoldan_reqeme = { simvol:indeks for indeks, simvol in enumerate(self.simvollar) }
-        
+
         # Rəqəmdən simvola (Integer to String) çevirmə xəritəsi
         self.reqemden_simvola = { indeks:simvol for indeks, simvol in enumerate(self.simvollar) }
 
+        # str.translate cədvəli: hər simvol öz id-sinə bərabər kodlu simvola çevrilir
+        evezi = None if self.namelum_id is None else chr(self.namelum_id)
+        self._tercume = _NamelumSimvollar({ord(s): chr(i) for i, s in enumerate(self.simvollar)}, evezi)
+
+        if np is not None:
+            # Kod nöqtəsi -> id cədvəli (-1 — lüğətdə yoxdur); sonuncu element cədvəldən kənar kodlar üçündür
+            kodlar = np.array([ord(s) for s in self.simvollar], dtype=np.int64)
+            cedvel_tipi = np.int16 if self.luget_olcusu <= 32767 else np.int32
+            self._kod_cedveli = np.full(max(int(kodlar.max(initial=0)) + 2, 128), -1, dtype=cedvel_tipi)
+            self._kod_cedveli[kodlar] = np.arange(self.luget_olcusu)
+            self._simvol_kodlari = kodlar.astype(np.uint32)
+
+    def massiv_tipi(self):
+        # Lüğətə sığan ən kiçik tam ədəd tipi (uint8 / int16 / int32)
+        if self.luget_olcusu <= 256:
+            return np.uint8
+        return np.int16 if self.luget_olcusu <= 32768 else np.int32
+
     def kodlasdir(self, s):
-        # Mətni rəqəmlər siyahısına çevirir
-        return [self.simvoldan_reqeme[c] for c in s if c in self.simvoldan_reqeme]
+        # Mətni rəqəmlər siyahısına çevirir (toplu cədvəl ilə; numpy yoxdursa str.translate ilə)
+        if np is not None:
+            return self.kodlasdir_massiv(s).tolist()
+        return list(memoryview(s.translate(self._tercume).encode(_UTF32)).cast('I'))
 
     def de_kodlasdir(self, l):
         # rəqəmlər siyahısını yenidən mətnə çevirir
-        return ''.join([self.reqemden_simvola[i] for i in l])
+        if np is not None and isinstance(l, np.ndarray):
+            return self._simvol_kodlari[l].tobytes().decode(_UTF32)
+        return ''.join(map(self.reqemden_simvola.__getitem__, l))
+
+    def _kod_noqteleri(self, s):
+        # ASCII mətndə hər simvol 1 baytdır — 4 baytlıq UTF-32-dən təxminən 3 dəfə sürətlidir
+        if s.isascii():
+            return self._kod_cedveli[np.frombuffer(s.encode('ascii'), dtype=np.uint8)]
+        kodlar = np.frombuffer(s.encode(_UTF32), dtype=np.uint32)
+        return self._kod_cedveli[np.minimum(kodlar, len(self._kod_cedveli) - 1)]
+
+    def _hisseni_kodlasdir(self, s):
+        idler = self._kod_noqteleri(s)
+        if not len(idler) or idler.min() >= 0:
+            return idler # Naməlum simvol yoxdur — maskalamağa ehtiyac yoxdur
+        if self.namelum_id is None:
+            return idler[idler >= 0]
+        return np.where(idler >= 0, idler, self.namelum_id)
+
+    def kodlasdir_massiv(self, s, dtype=None):
+        """
+        Mətni birbaşa NumPy massivinə çevirir (torch.from_numpy ilə kopyalamadan tenzora çevrilə bilər).
+        dtype verilməyibsə, lüğətə sığan ən kiçik tip seçilir — böyük korpuslarda yaddaş 8 dəfəyədək azalır.
+        """
+        dtype = dtype or self.massiv_tipi()
+        hisseler = [self._hisseni_kodlasdir(s[i:i + _HISSE_OLCUSU]).astype(dtype, copy=False)
+                    for i in range(0, len(s), _HISSE_OLCUSU)]
+        return np.concatenate(hisseler) if hisseler else np.zeros(0, dtype=dtype)
+
+    def kodlasdir_paket(self, metnler, dtype=None):
+        """Bir neçə mətni bir dəfəyə kodlaşdırır. Qaytarır: hər mətn üçün ayrıca massiv."""
+        dtype = dtype or self.massiv_tipi()
+        if not metnler:
+            return []
+        idler = self._kod_noqteleri(''.join(metnler))
+        uzunluqlar = np.fromiter((len(m) for m in metnler), dtype=np.int64, count=len(metnler))
+        if self.namelum_id is None:
+            saxlanilan = idler >= 0
+            # Hər mətndən neçə simvol qaldığını hesablayıb sərhədləri ona görə təyin edirik
+            cem = np.concatenate([[0], np.cumsum(saxlanilan)])
+            sonlar = np.cumsum(uzunluqlar)
+            uzunluqlar = cem[sonlar] - cem[sonlar - uzunluqlar]
+            idler = idler[saxlanilan]
+        else:
+            idler = np.where(idler >= 0, idler, self.namelum_id)
+        return np.split(idler.astype(dtype, copy=False), np.cumsum(uzunluqlar)[:-1])
+
+    def de_kodlasdir_paket(self, id_siyahilari):
+        """Bir neçə id ardıcıllığını bir dəfəyə mətnə çevirir."""
+        if not len(id_siyahilari):
+            return []
+        uzunluqlar = [len(idler) for idler in id_siyahilari]
+        metn = self.de_kodlasdir(np.concatenate([np.asarray(idler, dtype=np.int64) for idler in id_siyahilari]))
+        # Hər id bir simvol olduğu üçün mətni uzunluqlara görə kəsmək kifayətdir
+        neticeler, yer = [], 0
+        for uzunluq in uzunluqlar:
+            neticeler.append(metn[yer:yer + uzunluq])
+            yer += uzunluq
+        return neticeler
+
+    def dekoder(self):
+        # Generasiya zamanı simvolları bir-bir mətnə çevirən funksiya (BPETokenizator ilə eyni interfeys)
+        return self.reqemden_simvola.__getitem__
 
     def yadda_saxla(self, yol):
-        # Tokenizatorun simvollarını JSON faylı kimi yadda saxlayır
+        # Tokenizatorun növünü və simvollarını JSON faylı kimi yadda saxlayır
         with open(yol, 'w', encoding='utf-8') as f:
-            json.dump(self.simvollar, f)
+            json.dump({"nov": "simvol", "simvollar": self.simvollar}, f, ensure_ascii=False)
 
     @classmethod
-    def yukle(cls, yol):
+    def yukle(cls, yol, namelum_id=None):
         # Yadda saxlanılmış JSON faylından tokenizatoru yenidən yükləyir
         with open(yol, 'r', encoding='utf-8') as f:
-            hazir_simvollar = json.load(f)
-        obyekt = cls()
-        obyekt.simvollar = hazir_simvollar
-        obyekt.luget_olcusu = len(hazir_simvollar)
-        obyekt.simvoldan_reqeme = { s:i for i, s in enumerate(hazir_simvollar) }
-        obyekt.reqemden_simvola = { i:s for i, s in enumerate(hazir_simvollar) }
+            melumat = json.load(f)
+        return cls._melumatdan(melumat, namelum_id)
+
+    @classmethod
+    def _melumatdan(cls, melumat, namelum_id=None):
+        obyekt = cls.__new__(cls)
+        # Köhnə fayllar sadəcə simvollar siyahısıdır
+        obyekt.simvollar = melumat if isinstance(melumat, list) else melumat["simvollar"]
+        obyekt.namelum_id = namelum_id
+        obyekt._cedvelleri_qur()
         return obyekt
+
+# Azərbaycan əlifbasının ASCII-də olmayan hərfləri — UTF-8-də hər biri 2 baytdır.
+# BPE öyrədilməzdən əvvəl onların bayt cütləri birləşdirilir ki, korpusda az olsalar belə tək token olsunlar.
+AZERBAYCAN_HERFLERI = "əşçğıöüƏŞÇĞİÖÜ"
+
+# Mətni sözlərə bölən ifadə: birləşmələr söz sərhədlərini keçmir (\w Unicode hərflərini, o cümlədən ə, ş, ğ-ni əhatə edir).
+# Alt xətt (_) \w-yə daxildir, amma nə hərf, nə rəqəmdir — durğu işarələri ilə birlikdə götürülür ki, atılmasın
+_SOZ_IFADESI = re.compile(r" ?[^\W\d_]+| ?\d+| ?(?:[^\s\w]|_)+|\s+(?!\S)|\s+")
+
+class BPETokenizator:
+    """
+    Bayt səviyyəli BPE (byte-pair encoding) tokenizatoru. Lüğət 256 baytdan başlayır və öyrədilmə zamanı
+    ən tez-tez yan-yana gələn cütlər yeni tokenlərə birləşdirilir. İstənilən mətn (Azərbaycan hərfləri,
+    emoji) itkisiz kodlaşdırılır — lüğətdən kənar simvol yoxdur.
+    CharTokenizator ilə eyni interfeysə malikdir.
+    """
+    def __init__(self, metn="", luget_olcusu=512):
+        self.birleshmeler = [] # [(sol_id, sag_id), ...] — sıra həm də prioritetdir
+        if metn:
+            self._oyret(metn, luget_olcusu)
+        else:
+            self._azerbaycan_herflerini_birleshdir()
+        self._cedvelleri_qur()
+
+    def _azerbaycan_herflerini_birleshdir(self):
+        for herf in AZERBAYCAN_HERFLERI:
+            sol, sag = herf.encode('utf-8')
+            if (sol, sag) not in self.birleshmeler:
+                self.birleshmeler.append((sol, sag))
+
+    def _cedvelleri_qur(self):
+        self.luget_olcusu = 256 + len(self.birleshmeler)
+        # Hər tokenin baytları (dekodlaşdırma üçün) və cüt -> yeni id cədvəli (kodlaşdırma üçün).
+        # Yeni id-lər öyrənilmə sırası ilə artdığı üçün kiçik id həm də yüksək prioritet deməkdir.
+        self._baytlar = [bytes([b]) for b in range(256)]
+        self._derece = {}
+        for i, (sol, sag) in enumerate(self.birleshmeler):
+            self._baytlar.append(self._baytlar[sol] + self._baytlar[sag])
+            self._derece[(sol, sag)] = 256 + i
+        self._keshe = {} # söz -> id-lər (korpusda sözlər çox təkrarlanır)
+
+    def _oyret(self, metn, luget_olcusu):
+        """
+        Birləşmələri öyrənir. Cüt sayları bütün mətn üzrə deyil, unikal sözlər üzrə (tezliklə çəkilərək)
+        saxlanılır və hər birləşmədən sonra yalnız həmin cütü ehtiva edən sözlər yenilənir.
+        """
+        self._azerbaycan_herflerini_birleshdir()
+        derece = {cut: 256 + i for i, cut in enumerate(self.birleshmeler)}
+        sozler, tezlikler = [], []
+        for soz, say in Counter(_SOZ_IFADESI.findall(metn)).items():
+            sozler.append(self._birleshdir(list(soz.encode('utf-8')), derece))
+            tezlikler.append(say)
+
+        cut_saylari = Counter()
+        cutun_sozleri = {} # cüt -> onu ehtiva edən sözlərin indeksləri
+        for i, soz in enumerate(sozler):
+            for cut in zip(soz, soz[1:]):
+                cut_saylari[cut] += tezlikler[i]
+                cutun_sozleri.setdefault(cut, set()).add(i)
+
+        while 256 + len(self.birleshmeler) < luget_olcusu and cut_saylari:
+            cut, say = max(cut_saylari.items(), key=lambda t: (t[1], -t[0][0], -t[0][1]))
+            if say < 2:
+                break
+            yeni_id = 256 + len(self.birleshmeler)
+            self.birleshmeler.append(cut)
+            for i in cutun_sozleri.pop(cut, ()):
+                soz = sozler[i]
+                # Köhnə cütləri çıxarıb, birləşdirilmiş sözün cütlərini əlavə edirik
+                for kohne in zip(soz, soz[1:]):
+                    cut_saylari[kohne] -= tezlikler[i]
+                    if cut_saylari[kohne] <= 0:
+                        del cut_saylari[kohne]
+                yeni = []
+                j = 0
+                while j < len(soz):
+                    if j + 1 < len(soz) and (soz[j], soz[j + 1]) == cut:
+                        yeni.append(yeni_id)
+                        j += 2
+                    else:
+                        yeni.append(soz[j])
+                        j += 1
+                sozler[i] = yeni
+                for yeni_cut in zip(yeni, yeni[1:]):
+                    cut_saylari[yeni_cut] += tezlikler[i]
+                    cutun_sozleri.setdefault(yeni_cut, set()).add(i)
+            cut_saylari.pop(cut, None)
+
+    @staticmethod
+    def _birleshdir(idler, derece):
+        # Ən yüksək prioritetli (ən tez öyrənilmiş) cütü təkrar-təkrar birləşdiririk
+        while len(idler) > 1:
+            cut = min(zip(idler, idler[1:]), key=lambda c: derece.get(c, float('inf')))
+            yeni_id = derece.get(cut)
+            if yeni_id is None:
+                break
+            yeni, j = [], 0
+            while j < len(idler):
+                if j + 1 < len(idler) and (idler[j], idler[j + 1]) == cut:
+                    yeni.append(yeni_id)
+                    j += 2
+                else:
+                    yeni.append(idler[j])
+                    j += 1
+            idler = yeni
+        return idler
+
+    def _sozu_kodlasdir(self, soz):
+        idler = self._keshe.get(soz)
+        if idler is None:
+            idler = self._birleshdir(list(soz.encode('utf-8')), self._derece)
+            if len(self._keshe) < 100_000:
+                self._keshe[soz] = idler
+        return idler
+
+    def kodlasdir(self, s):
+        idler = []
+        for soz in _SOZ_IFADESI.findall(s):
+            idler.extend(self._sozu_kodlasdir(soz))
+        return idler
+
+    def de_kodlasdir(self, l):
+        # Yarımçıq UTF-8 ardıcıllıqları (məs. generasiya ortasında kəsilmiş) � ilə əvəz olunur
+        return b''.join(self._baytlar[i] for i in l).decode('utf-8', errors='replace')
+
+    def dekoder(self):
+        # Bir hərf bir neçə tokenə bölünə bilər — tam olmayan baytlar növbəti tokenə qədər saxlanılır
+        artimli = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        return lambda simvol: artimli.decode(self._baytlar[simvol])
+
+    def massiv_tipi(self):
+        return np.int16 if self.luget_olcusu <= 32768 else np.int32
+
+    def kodlasdir_massiv(self, s, dtype=None):
+        return np.array(self.kodlasdir(s), dtype=dtype or self.massiv_tipi())
+
+    def kodlasdir_paket(self, metnler, dtype=None):
+        return [self.kodlasdir_massiv(m, dtype) for m in metnler]
+
+    def de_kodlasdir_paket(self, id_siyahilari):
+        return [self.de_kodlasdir(idler) for idler in id_siyahilari]
+
+    def yadda_saxla(self, yol):
+        with open(yol, 'w', encoding='utf-8') as f:
+            json.dump({"nov": "bpe", "birleshmeler": self.birleshmeler}, f)
+
+    @classmethod
+    def yukle(cls, yol):
+        with open(yol, 'r', encoding='utf-8') as f:
+            return cls._melumatdan(json.load(f))
+
+    @classmethod
+    def _melumatdan(cls, melumat):
+        obyekt = cls.__new__(cls)
+        obyekt.birleshmeler = [tuple(cut) for cut in melumat["birleshmeler"]]
+        obyekt._cedvelleri_qur()
+        return obyekt
+
+TOKENIZATOR_NOVLERI = {"simvol": CharTokenizator, "bpe": BPETokenizator}
+
+def tokenizatoru_yukle(yol):
+    """tokenizer.json-dakı "nov" sahəsinə görə uyğun tokenizatoru yükləyir (köhnə fayllar — simvol)."""
+    with open(yol, 'r', encoding='utf-8') as f:
+        melumat = json.load(f)
+    nov = "simvol" if isinstance(melumat, list) else melumat.get("nov", "simvol")
+    if nov not in TOKENIZATOR_NOVLERI:
+        raise ValueError(f"Naməlum tokenizator növü: {nov}. Mümkün olanlar: {', '.join(TOKENIZATOR_NOVLERI)}")
+    return TOKENIZATOR_NOVLERI[nov]._melumatdan(melumat)
@@ -1,93 +1,364 @@
 import torch
 import torch.nn as nn
-from model import IsmayilModeli, blok_olcusu # Model memarlığını və blok ölçüsünü gətiririk
-from tokenizer import CharTokenizator      # Tokenizator sinfini gətiririk
+import model as model_modulu # Standart model ölçüləri
+from model import IsmayilModeli, ModelKonfiqurasiyasi, cekileri_saxla # Model memarlığını gətiririk
+from evaluate import pencereleri_qiymetlendir # Sabit pəncərələr üzərində qiymətləndirmə
+from telemetry import MerheleSaygaci, MetrikYazici, pik_rss_mb # Addım ölçüləri (JSONL)
+from concurrent.futures import ThreadPoolExecutor
+from checkpoint import (NezaretNoqtesiYazici, nezaret_noqtesini_yukle, rng_veziyyeti, son_nezaret_noqtesi,
+                        veziyyeti_berpa_et, veziyyeti_gotur) # Dövri nəzarət nöqtələri
+from prepare_data import INDEKS_ADI, OncedenYukleyici, ParcaliMelumat, indeks_kohnedir, melumati_hazirla # Token parçaları
+import argparse
+import contextlib
+import copy
+import math
+import numpy as np
 import os
+import time
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+
+# Sürətli rejim komanda sətrindən seçilir (standart — əvvəlki kimi fp32, kompilyasiyasız):
+#   python train.py --deqiqlik bf16 --kompilyasiya --yigim 4
+# Bir neçə prosesdə məlumat-paralel təlim (hər proses öz paketlərini öyrədir, qradiyentlər ortalanır):
+#   torchrun --standalone --nproc_per_node=4 train.py
+parser = argparse.ArgumentParser(description="İsmayıl modelini öyrətmək")
+parser.add_argument('--paket-olcusu', type=int, default=32, help="Bir mikro-paketdəki cümlə sayı")
+parser.add_argument('--maks-iterasiya', type=int, default=1000, help="Optimallaşdırıcı addımlarının sayı")
+parser.add_argument('--deqiqlik', choices=['fp32', 'bf16', 'fp16'], default='fp32',
+                    help="torch.autocast dəqiqliyi (fp16 yalnız CUDA-da, GradScaler ilə)")
+parser.add_argument('--kompilyasiya', action='store_true', help="IsmayilModeli-ni torch.compile ilə kompilyasiya et")
+parser.add_argument('--yigim', type=int, default=1,
+                    help="Qradiyent yığımı: effektiv paket = paket_olcusu * yigim")
+parser.add_argument('--nezaret-araligi', type=int, default=100,
+                    help="Hər neçə addımdan bir nəzarət nöqtəsi yazılsın (0 — yalnız sonda)")
+parser.add_argument('--nezaret-qovlugu', default='checkpoints')
+parser.add_argument('--nezaret-saxla', type=int, default=3, help="Saxlanılan son nəzarət nöqtələrinin sayı")
+parser.add_argument('--davam', '--resume', action='store_true',
+                    help="Son nəzarət nöqtəsindən bit-bit eyni şəkildə davam et")
+parser.add_argument('--qiymet-araligi', type=int, default=500, help="Hər neçə addımdan bir yoxlama itkisi hesablansın")
+parser.add_argument('--qiymet-pencere', type=int, default=512,
+                    help="Yoxlama bölməsindən götürülən sabit pəncərə sayı (qiymətləndirmənin dəyəri buna mütənasibdir)")
+parser.add_argument('--qiymet-paketi', type=int, default=128, help="Qiymətləndirmənin qradiyentsiz paket ölçüsü")
+parser.add_argument('--qiymet-arxada', action='store_true',
+                    help="Qiymətləndirmə çəkilərin surəti üzərində arxa thread-də getsin (təlim dayanmır)")
+parser.add_argument('--metrik-fayli', default='train_metrics.jsonl',
+                    help="Hər addımın ölçülərinin yazıldığı JSONL faylı ('' — söndürülüb)")
+parser.add_argument('--profil', default='', metavar='BASH:SON',
+                    help="[BASH, SON) addımlarını torch.profiler ilə izlə, məs. 100:110")
+parser.add_argument('--profil-fayli', default='train_trace.json', help="Chrome trace faylı (chrome://tracing, Perfetto)")
+parser.add_argument('--qiymet-budcesi', type=float, default=0.0,
+                    help="Qiymətləndirmənin ümumi vaxtdakı maksimum payı, məs. 0.05 (0 — limitsiz)")
+# Modelin ölçüləri; seçilmiş konfiqurasiya çəkilərlə birlikdə saxlanılır, main.py onu oxuyub eyni modeli qurur
+parser.add_argument('--yerlesdirme-olcusu', type=int, default=model_modulu.yerlesdirme_olcusu, help="n_embd")
+parser.add_argument('--bash-sayi', type=int, default=model_modulu.bash_sayi, help="n_head")
+parser.add_argument('--lay-sayi', type=int, default=model_modulu.lay_sayi, help="n_layer")
+parser.add_argument('--blok-olcusu', type=int, default=model_modulu.blok_olcusu, help="Təlim konteksti (block_size)")
+parser.add_argument('--atilan-melumat', type=float, default=model_modulu.atilan_melumat, help="dropout")
+args = parser.parse_args()
 
 # Təlim üçün Hiperparametrlər
-paket_olcusu = 32         # batch_size: Hər addımda neçə cümlə eyni vaxtda öyrəniləcək
-maks_iterasiya = 1000     # max_iters: Toplam neçə dəfə öyrənmə addımı atılacaq
-qiymetlendirme_araligi = 500 # eval_interval: Hər neçə addımdan bir modelin vəziyyəti yoxlanılacaq
+paket_olcusu = args.paket_olcusu # batch_size: Hər addımda neçə cümlə eyni vaxtda öyrəniləcək
+maks_iterasiya = args.maks_iterasiya # max_iters: Toplam neçə dəfə öyrənmə addımı atılacaq
+qradiyent_yigimi = args.yigim # Bir optimallaşdırıcı addımına düşən mikro-paket sayı
+qiymetlendirme_araligi = args.qiymet_araligi # eval_interval: Hər neçə addımdan bir modelin vəziyyəti yoxlanılacaq
 oyrenme_derecesi = 1e-3   # learning_rate: Modelin səhvlərindən nə qədər sürətlə nəticə çıxaracağı
-qiymetlendirme_sayi = 200 # eval_iters: Yoxlama zamanı ortalama hesablamaq üçün istifadə olunan addım sayı
-cihaz = 'cuda' if torch.cuda.is_available() else 'cpu' # Əgər NVIDIA kartı varsa CUDA, yoxdursa CPU istifadə olunur
+# Mövqe növü: 'mutleq' (öyrənilən mövqe cədvəli, kontekst 64 simvol) və ya
+# 'firlanma' (RoPE + sürüşən pəncərəli diqqət — uzun söhbətlər üçün)
+movqe_novu = os.environ.get('ISMAYIL_MOVQE', 'mutleq')
+# Tokenizator: 'simvol' (hər simvol bir token) və ya 'bpe' (bayt səviyyəli alt-söz tokenləri)
+tokenizator_novu = os.environ.get('ISMAYIL_TOKENIZATOR', 'simvol')
+bpe_luget_olcusu = int(os.environ.get('ISMAYIL_BPE_LUGET', '512'))
+# Paketlərin təsadüfiliyi üçün toxum və arxa thread-də əvvəlcədən hazırlanan paket sayı (0 — sinxron)
+toxum = int(os.environ.get('ISMAYIL_TOXUM', '1337'))
+onceden_yukle = int(os.environ.get('ISMAYIL_ONCEDEN_YUKLE', '4'))
+cihaz_novu = 'cuda' if torch.cuda.is_available() else 'cpu' # Əgər NVIDIA kartı varsa CUDA, yoxdursa CPU istifadə olunur
+
+# torchrun RANK/WORLD_SIZE/LOCAL_RANK dəyişənlərini təyin edir; onlar yoxdursa — tək proses
+proses_nomresi = int(os.environ.get('RANK', '0'))
+proses_sayi = int(os.environ.get('WORLD_SIZE', '1'))
+paylanmish = proses_sayi > 1
+esas_proses = proses_nomresi == 0 # Qiymətləndirmə, çap və fayl yazma yalnız burada
+if paylanmish:
+    # CPU-da gloo; hər GPU-ya bir proses düşəndə nccl
+    dist.init_process_group('nccl' if cihaz_novu == 'cuda' else 'gloo')
+if cihaz_novu == 'cuda':
+    yerli_nomre = int(os.environ.get('LOCAL_RANK', '0'))
+    torch.cuda.set_device(yerli_nomre)
+    cihaz = f'cuda:{yerli_nomre}'
+else:
+    cihaz = 'cpu'
+
+# Qarışıq dəqiqlik: CPU-da bf16; CUDA-da fp16 (itki miqyaslanır ki, kiçik qradiyentlər sıfırlanmasın) və ya bf16
+deqiqlik = args.deqiqlik
+if deqiqlik == 'fp16' and cihaz_novu == 'cpu':
+    if esas_proses:
+        print("fp16 CPU-da dəstəklənmir, bf16 istifadə olunur")
+    deqiqlik = 'bf16'
+if deqiqlik == 'fp32':
+    avtomatik_tip = contextlib.nullcontext
+else:
+    avtomatik_tip = lambda: torch.autocast(device_type=cihaz_novu, dtype=torch.bfloat16 if deqiqlik == 'bf16' else torch.float16)
+miqyaslayici = torch.amp.GradScaler(cihaz_novu, enabled=deqiqlik == 'fp16')
 
 # Verilənləri (məlumat bazasını) yükləyirik
+# Korpus prepare_data.py ilə uint16 .bin parçalarına çevrilir və np.memmap ilə oxunur — RAM-a tam
+# yüklənmir. ISMAYIL_MELUMAT verilməyibsə, input.txt-dən data/index.json avtomatik hazırlanır və
+# mənbə dəyişmədikcə təkrar istifadə olunur (təkrar işə salmada tokenləşdirmə yoxdur)
 path = 'input.txt'
-if not os.path.exists(path):
-    print(f"Səhv: {path} faylı tapılmadı!")
-    exit()
-
-with open(path, 'r', encoding='utf-8') as f:
-    metn = f.read()
+melumat_indeksi = os.environ.get('ISMAYIL_MELUMAT')
+if melumat_indeksi is None:
+    melumat_indeksi = os.path.join('data', INDEKS_ADI)
+    if not os.path.exists(path):
+        print(f"Səhv: {path} faylı tapılmadı!")
+        exit()
+    if esas_proses and indeks_kohnedir(melumat_indeksi, [path], tokenizator_novu, bpe_luget_olcusu):
+        melumati_hazirla([path], os.path.dirname(melumat_indeksi), tokenizator_novu=tokenizator_novu,
+                         bpe_luget_olcusu=bpe_luget_olcusu)
+    if paylanmish:
+        dist.barrier() # Digər proseslər məlumat hazır olana qədər gözləyir
+melumat = ParcaliMelumat(melumat_indeksi)
 
-# Tokenizatoru yaradırıq və lüğəti yadda saxlayırıq
-tokenizator = CharTokenizator(metn)
-tokenizator.yadda_saxla('tokenizer.json')
+# Tokenizator index-in yanındadır; main.py eyni tokenizatoru yükləsin deyə onu kökə də yazırıq
+tokenizator = melumat.tokenizator()
+if esas_proses:
+    tokenizator.yadda_saxla('tokenizer.json')
 luget_olcusu = tokenizator.luget_olcusu
+konfiq = ModelKonfiqurasiyasi(luget_olcusu=luget_olcusu, yerlesdirme_olcusu=args.yerlesdirme_olcusu,
+                              bash_sayi=args.bash_sayi, lay_sayi=args.lay_sayi, blok_olcusu=args.blok_olcusu,
+                              atilan_melumat=args.atilan_melumat, movqe_novu=movqe_novu)
+blok_olcusu = konfiq.blok_olcusu
 
-# Məlumatın hamısını rəqəmlərə çevirib gərginlik (tensor) halına salırıq
-məlumat = torch.tensor(tokenizator.kodlasdir(metn), dtype=torch.long)
+# Model üçün təsadüfi paketlər (batches) hazırlayan funksiya
+# Hər paketin öz toxumu var (toxum, nömrə) — paket arxa thread-də hazırlansa da, nəticə eynidir
+# və torch-un qlobal RNG-si (dropout) ilə yarışmır
+def paket_hazirla(bolme, nomre):
+    rng = np.random.default_rng((toxum, nomre))
+    bashlangiclar = rng.integers(0, melumat.simvol_sayi(bolme) - blok_olcusu, paket_olcusu)
+    # Bütün pəncərələr (blok_olcusu+1 token) bir indeks əməliyyatı ilə toplanır; x və y onun görünüşləridir
+    pencereler = torch.from_numpy(melumat.paket(bolme, bashlangiclar, blok_olcusu + 1))
+    if cihaz_novu == 'cuda':
+        pencereler = pencereler.pin_memory() # Kilidlənmiş yaddaşdan GPU-ya köçürmə asinxron olur
+    return pencereler
 
-# Məlumatı Tədris (90%) və Yoxlama (10%) hissələrinə ayırırıq
-n = int(0.9 * len(məlumat))
-tedris_melumati = məlumat[:n]
-yoxlama_melumati = məlumat[n:]
+def cihaza_kocur(pencereler):
+    pencereler = pencereler.to(cihaz, non_blocking=True)
+    return pencereler[:, :-1], pencereler[:, 1:] # y hər zaman x-dən bir addım öndədir
 
-# Model üçün təsadüfi paketlər (batches) hazırlayan funksiya
-def paket_getir(bolme):
-    # Hansı hissədən məlumat götürəcəyimizi seçirik
-    cari_melumat = tedris_melumati if bolme == 'train' else yoxlama_melumati
-    # Təsadüfi başlanğıc nöqtələri seçirik
-    bashlangiclar = torch.randint(len(cari_melumat) - blok_olcusu, (paket_olcusu,))
-    # Giriş (x) və hədəf (y) məlumatlarını hazırlayırıq (y hər zaman x-dən bir addım öndədir)
-    x = torch.stack([cari_melumat[i:i+blok_olcusu] for i in bashlangiclar])
-    y = torch.stack([cari_melumat[i+1:i+blok_olcusu+1] for i in bashlangiclar])
-    x, y = x.to(cihaz), y.to(cihaz)
-    return x, y
-
-# Modelin itkisini (səhvini) təxmin edən funksiya
-@torch.no_grad()
-def itkini_təxmin_et(model):
-    sonuc = {}
+# Qiymətləndirmə hər dəfə yoxlama bölməsinin eyni, əvvəlcədən seçilmiş pəncərələri üzərində aparılır —
+# nəticələr arasındakı fərq təsadüfi paketlərdən deyil, modelin özündən gəlir
+qiymet_pencereleri = torch.from_numpy(melumat.ardicil_pencereler('val', args.qiymet_pencere, blok_olcusu + 1))
+# BPE-də bir token bir neçə simvoldur — itkini simvol başına bitə çevirmək üçün
+simvol_per_token = len(tokenizator.de_kodlasdir(qiymet_pencereleri[:, 1:].reshape(-1).tolist())) / qiymet_pencereleri[:, 1:].numel()
+
+def yoxlama_itkisi(model):
+    """Qaytarır: (itki, perpleksiya, bit/simvol)."""
     model.eval() # Modeli qiymətləndirmə rejiminə keçiririk
-    for bolme in ['train', 'val']:
-        itkiler = torch.zeros(qiymetlendirme_sayi)
-        for k in range(qiymetlendirme_sayi):
-            X, Y = paket_getir(bolme)
-            ehtimallar, itki = model(X, Y)
-            itkiler[k] = itki.item()
-        sonuc[bolme] = itkiler.mean() # Ortalama itkini qeyd edirik
+    itki = pencereleri_qiymetlendir(model, qiymet_pencereleri, args.qiymet_paketi, avtomatik_tip)
     model.train() # Modeli yenidən təlim rejiminə qaytarırıq
-    return sonuc
+    return itki, math.exp(itki), itki / math.log(2) / simvol_per_token
 
-# Modeli başladırıq
-ismayil = IsmayilModeli(luget_olcusu)
+# Modeli başladırıq (başlanğıc çəkilər də toxumdan asılıdır)
+torch.manual_seed(toxum)
+ismayil = IsmayilModeli(konfiq)
 ismayil = ismayil.to(cihaz)
+if paylanmish:
+    # Çəkilər hamıda eynidir (eyni toxum, DDP də yayımlayır), dropout isə hər prosesdə fərqli olsun
+    torch.manual_seed(toxum + proses_nomresi)
+    paralel_model = DistributedDataParallel(ismayil)
+else:
+    paralel_model = ismayil
+# Kompilyasiya olunmuş model eyni parametrləri paylaşır; çəkilər ismayil-dən saxlanılır (_orig_mod prefiksi olmasın)
+ishci_model = torch.compile(paralel_model) if args.kompilyasiya else paralel_model
+# Qiymətləndirmə yalnız əsas prosesdə gedir — DDP-nin kollektiv əməliyyatlarından keçməməlidir
+qiymetlendirme_modeli = ismayil if paylanmish else ishci_model
 
 # Optimallaşdırıcı (AdamW - Adam with Weight Decay)
 # Bu alət modelin çəkilərini səhvlərə uyğun olaraq tənzimləyir
 optimallashdirici = torch.optim.AdamW(ismayil.parameters(), lr=oyrenme_derecesi)
 
-print(f"İsmayıl {cihaz} üzərində öyrənməyə başlayır...")
+# Davam edərkən bu parametrlər nəzarət nöqtəsindəkilərlə eyni olmalıdır, əks halda nəticə eyni olmaz
+telim_parametrleri = {'toxum': toxum, 'paket_olcusu': paket_olcusu, 'yigim': qradiyent_yigimi, 'deqiqlik': deqiqlik,
+                      'movqe_novu': movqe_novu, 'luget_olcusu': luget_olcusu, 'proses_sayi': proses_sayi,
+                      'konfiq': konfiq.lugete()}
+bashlangic_addimi, melumat_movqeyi = 0, 0 # Növbəti addım və növbəti paketin nömrəsi
+if args.davam:
+    nezaret_yolu = son_nezaret_noqtesi(args.nezaret_qovlugu)
+    if nezaret_yolu is None:
+        print(f"Səhv: '{args.nezaret_qovlugu}' qovluğunda nəzarət nöqtəsi tapılmadı!")
+        exit()
+    veziyyet = nezaret_noqtesini_yukle(nezaret_yolu)
+    ferqler = {ad: (deyer, telim_parametrleri.get(ad)) for ad, deyer in veziyyet['parametrler'].items()
+               if telim_parametrleri.get(ad) != deyer}
+    if ferqler:
+        print(f"Səhv: parametrlər nəzarət nöqtəsindən fərqlidir (köhnə, yeni): {ferqler}")
+        exit()
+    bashlangic_addimi, melumat_movqeyi = veziyyeti_berpa_et(veziyyet, ismayil, optimallashdirici, miqyaslayici,
+                                                            proses_nomresi=proses_nomresi)
+    del veziyyet
+    if esas_proses:
+        print(f"'{nezaret_yolu}' nəzarət nöqtəsindən davam edilir (addım {bashlangic_addimi})")
+nezaret_yazicisi = NezaretNoqtesiYazici(args.nezaret_qovlugu, saxla=args.nezaret_saxla) if esas_proses else None
+
+def nezaret_noqtesi_yaz(addim):
+    # Bütün proseslər çağırır: hər prosesin RNG vəziyyəti (dropout) əsas prosesə toplanır
+    proses_rng_veziyyetleri = None
+    if paylanmish:
+        proses_rng_veziyyetleri = [None] * proses_sayi
+        dist.all_gather_object(proses_rng_veziyyetleri, rng_veziyyeti())
+    if esas_proses:
+        # Təlim yalnız CPU surətini çıxarır; diskə yazma arxa thread-dədir
+        nezaret_yazicisi.yaz(veziyyeti_gotur(ismayil, optimallashdirici, addim, melumat_movqeyi,
+                                             miqyaslayici=miqyaslayici, parametrler=telim_parametrleri,
+                                             proses_rng_veziyyetleri=proses_rng_veziyyetleri))
+
+if esas_proses:
+    print(f"İsmayıl {cihaz} üzərində öyrənməyə başlayır... (dəqiqlik {deqiqlik}, "
+          f"effektiv paket {paket_olcusu * qradiyent_yigimi * proses_sayi}"
+          f"{f', {proses_sayi} proses' if paylanmish else ''}{', kompilyasiya' if args.kompilyasiya else ''})")
 
-for addim in range(maks_iterasiya):
+# Növbəti paketlər arxa thread-də əvvəlcədən hazırlanır (ISMAYIL_ONCEDEN_YUKLE=0 — sinxron).
+# Paylanmış rejimdə paket axını proseslər arasında bölünür: proses r nömrəsi n*proses_sayi + r olan paketləri alır
+yukleyici = OncedenYukleyici(lambda nomre: paket_hazirla('train', nomre * proses_sayi + proses_nomresi),
+                             derinlik=onceden_yukle, bashlangic=melumat_movqeyi)
+gozleme_vaxti = addim_vaxti = 0.0 # Son hesabatdan bəri məlumat gözləmə və ümumi addım vaxtı
+hesabat_addimlari = 0
+tedris_itkisi = torch.zeros(2, dtype=torch.float64, device=cihaz) # Son hesabatdan bəri (itki cəmi, mikro-paket sayı)
+addim_tokenleri = paket_olcusu * blok_olcusu * qradiyent_yigimi * proses_sayi
+
+# Qiymətləndirmənin dəyəri ölçülür: təlim dövrü onu gözləməklə keçirdiyi vaxt ümumi vaxtla müqayisə olunur.
+# --qiymet-arxada ilə çəkilər ayrıca modelə köçürülür və qiymətləndirmə arxa thread-də gedir
+telim_bashlama = time.perf_counter()
+qiymet_vaxti = 0.0
+qiymet_icracisi = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ismayil-qiymet") if args.qiymet_arxada else None
+qiymet_modeli_sureti = copy.deepcopy(ismayil).eval() if args.qiymet_arxada and esas_proses else None
+geden_qiymet = None
+
+def _qiymetlendir_ve_yaz(model, setir):
+    itki, perpleksiya, bpc = yoxlama_itkisi(model)
+    print(f"{setir}, Yoxlama itkisi {itki:.4f}, perpleksiya {perpleksiya:.2f}, {bpc:.4f} bit/simvol")
+
+def qiymetlendir(setir, mecburi=False):
+    global qiymet_vaxti, geden_qiymet
+    bashlama = time.perf_counter()
+    if geden_qiymet is not None:
+        geden_qiymet.result() # Əvvəlki arxa qiymətləndirmə hələ bitməyibsə gözləyirik (eyni anda biri gedir)
+        geden_qiymet = None
+    umumi_vaxt = bashlama - telim_bashlama
+    if not mecburi and args.qiymet_budcesi and qiymet_vaxti > args.qiymet_budcesi * umumi_vaxt:
+        print(f"{setir}, qiymətləndirmə buraxıldı (payı {qiymet_vaxti / umumi_vaxt:.1%} > büdcə {args.qiymet_budcesi:.1%})")
+    elif qiymet_icracisi is not None:
+        qiymet_modeli_sureti.load_state_dict(ismayil.state_dict())
+        geden_qiymet = qiymet_icracisi.submit(_qiymetlendir_ve_yaz, qiymet_modeli_sureti, setir)
+    else:
+        _qiymetlendir_ve_yaz(qiymetlendirme_modeli, setir)
+    qiymet_vaxti += time.perf_counter() - bashlama
+
+def hesabat_ver(addim, mecburi=False):
+    global gozleme_vaxti, addim_vaxti, hesabat_addimlari
+    if paylanmish:
+        dist.all_reduce(tedris_itkisi) # Bütün proseslərin təlim itkisi toplanır
+    if esas_proses:
+        setir = f"Addım {addim}"
+        if addim_vaxti:
+            setir += (f": Tədris itkisi {tedris_itkisi[0] / tedris_itkisi[1]:.4f}, "
+                      f"{hesabat_addimlari * addim_tokenleri / addim_vaxti:.0f} token/san, "
+                      f"məlumat gözləmə {gozleme_vaxti / addim_vaxti:.1%}, "
+                      f"qiymətləndirmə payı {qiymet_vaxti / (time.perf_counter() - telim_bashlama):.1%}")
+        qiymetlendir(setir, mecburi)
+    gozleme_vaxti = addim_vaxti = 0.0
+    hesabat_addimlari = 0
+    tedris_itkisi.zero_()
+
+# Addım ölçüləri yalnız əsas prosesdə yazılır; profil pəncərəsi [profil_bashla, profil_son) addımlarıdır
+metrik_yazici = MetrikYazici(args.metrik_fayli) if args.metrik_fayli and esas_proses else None
+saygac = MerheleSaygaci(cuda=cihaz_novu == 'cuda') if metrik_yazici else None
+profil_bashla, profil_son = (int(h) for h in args.profil.split(':')) if args.profil else (-1, -1)
+profilci = None
+
+for addim in range(bashlangic_addimi, maks_iterasiya):
     # Müəyyən aralıqlarla ekrana hesabat veririk
     if addim % qiymetlendirme_araligi == 0:
-        itkiler = itkini_təxmin_et(ismayil)
-        print(f"Addım {addim}: Tədris itkisi {itkiler['train']:.4f}, Yoxlama itkisi {itkiler['val']:.4f}")
-
-    # Öyrənmək üçün bir paket məlumat götürürük
-    xb, yb = paket_getir('train')
+        hesabat_ver(addim)
+    if addim == profil_bashla and esas_proses:
+        fealiyyetler = [torch.profiler.ProfilerActivity.CPU]
+        if cihaz_novu == 'cuda':
+            fealiyyetler.append(torch.profiler.ProfilerActivity.CUDA)
+        profilci = torch.profiler.profile(activities=fealiyyetler)
+        profilci.start()
 
-    # İrəli ötürmə və itki hesablama
-    ehtimallar, itki = ismayil(xb, yb)
+    bashlama = time.perf_counter()
+    addim_gozlemesi = 0.0
+    addim_itkisi = torch.zeros((), dtype=torch.float64, device=cihaz)
     optimallashdirici.zero_grad(set_to_none=True) # Köhnə qradiyentləri silirik
-    itki.backward() # Geri ötürmə (Backpropagation) - Səhvi hesabla
-    optimallashdirici.step() # Çəkiləri yenilə (Update weights)
+    for mikro in range(qradiyent_yigimi):
+        # Öyrənmək üçün bir paket məlumat götürürük
+        gozleme_bashlama = time.perf_counter()
+        xb, yb = cihaza_kocur(next(yukleyici))
+        melumat_movqeyi += 1
+        addim_gozlemesi += time.perf_counter() - gozleme_bashlama
+        if saygac:
+            saygac.nisan()
+
+        # İrəli ötürmə və itki hesablama (yığımda itki mikro-paketlərin ortalaması olsun deyə bölünür)
+        # Yığımın son mikro-paketinə qədər DDP qradiyentləri sinxronlaşdırmır
+        sinxronsuz = paylanmish and mikro < qradiyent_yigimi - 1
+        with paralel_model.no_sync() if sinxronsuz else contextlib.nullcontext():
+            with avtomatik_tip():
+                ehtimallar, itki = ishci_model(xb, yb)
+            if saygac:
+                saygac.nisan('forward_ms')
+            miqyaslayici.scale(itki / qradiyent_yigimi).backward() # Geri ötürmə (Backpropagation) - Səhvi hesabla
+        if saygac:
+            saygac.nisan('backward_ms')
+        addim_itkisi += itki.detach().double()
+    if metrik_yazici:
+        # Qradiyent normu miqyassız qradiyentlər üzərində hesablanır (fp16-da GradScaler-dən sonra)
+        miqyaslayici.unscale_(optimallashdirici)
+        qradiyent_normu = torch.nn.utils.get_total_norm([p.grad for p in ismayil.parameters() if p.grad is not None])
+    miqyaslayici.step(optimallashdirici) # Çəkiləri yenilə (Update weights)
+    miqyaslayici.update()
+    if saygac:
+        saygac.nisan('optimizer_ms')
+    if cihaz_novu == 'cuda':
+        torch.cuda.synchronize() # Addım vaxtı GPU-nun işini də əhatə etsin
+    muddet = time.perf_counter() - bashlama
+    addim_vaxti += muddet
+    gozleme_vaxti += addim_gozlemesi
+    hesabat_addimlari += 1
+    tedris_itkisi[0] += addim_itkisi
+    tedris_itkisi[1] += qradiyent_yigimi
+    if metrik_yazici:
+        metrik_yazici.yaz({
+            "step": addim, "step_ms": muddet * 1000, "tokens_per_sec": addim_tokenleri / muddet,
+            "data_wait_ms": addim_gozlemesi * 1000, **saygac.muddetler(),
+            "loss": addim_itkisi.item() / qradiyent_yigimi, "grad_norm": qradiyent_normu.item(),
+            "lr": optimallashdirici.param_groups[0]['lr'], "peak_rss_mb": pik_rss_mb(),
+        })
+    if profilci is not None and addim + 1 == profil_son:
+        profilci.stop()
+        profilci.export_chrome_trace(args.profil_fayli)
+        profilci = None
+        print(f"Addım {profil_bashla}-{profil_son - 1} profili '{args.profil_fayli}' faylına yazıldı")
+    if args.nezaret_araligi and (addim + 1) % args.nezaret_araligi == 0:
+        nezaret_noqtesi_yaz(addim + 1)
+hesabat_ver(maks_iterasiya, mecburi=True)
+if geden_qiymet is not None:
+    geden_qiymet.result()
+yukleyici.bagla()
+# Son vəziyyət də saxlanılır ki, təlim daha böyük --maks-iterasiya ilə davam etdirilə bilsin
+if not args.nezaret_araligi or maks_iterasiya % args.nezaret_araligi:
+    nezaret_noqtesi_yaz(maks_iterasiya)
+if paylanmish:
+    dist.destroy_process_group()
+if not esas_proses:
+    exit()
+nezaret_yazicisi.bagla()
+if metrik_yazici:
+    metrik_yazici.bagla()
 
-# Təlim bitdikdən sonra modelin "beynini" (çəkilərini) yadda saxlayırıq
-torch.save(ismayil.state_dict(), 'ismayil_model.pth')
+# Təlim bitdikdən sonra modelin "beynini" (çəkilərini) memarlığı ilə birlikdə yadda saxlayırıq
+cekileri_saxla(ismayil, 'ismayil_model.pth')
 print("Təlim tamamlandı! Model 'ismayil_model.pth' faylına yazıldı.")
 
 # Test üçün bir neçə söz yaradaq
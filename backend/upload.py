@@ -0,0 +1,180 @@
+"""
+upload.py — multipart/form-data yükləmələrinin axınla birbaşa diskə yazılması
+============================================================================
+UploadFile + `await video.read()` faylı əvvəlcə müvəqqəti fayla, sonra bütövlükdə yaddaşa yığır,
+ölçü isə yalnız bundan sonra yoxlanılır. Burada sorğunun gövdəsi gəldikcə parçalanır: fayl hissəsi
+birbaşa son yerinə yazılır, sha256 yolda hesablanır və hədd aşılan kimi oxuma dayandırılır.
+Yaddaşda eyni anda yalnız bir şəbəkə parçası olur — bir yükləmənin yaddaşı faylın ölçüsündən asılı deyil.
+
+Diskdəki ad müştəridən asılı deyil (saxlanma_adi + uzantı, məs. "video.mp4"): iş qovluğunda prompt.txt və
+Kaggle-ın output.mp4-u da durur, müştərinin göndərdiyi ad onların üstünə yazılmamalıdır. Müştərinin fayl adı
+yalnız məlumat kimi (YuklenmisFayl.ad) saxlanılır.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+class YuklemeXetasi(Exception):
+    """Yükləmə qəbul edilmədi; status_kodu müştəriyə qaytarılacaq HTTP kodudur."""
+    def __init__(self, status_kodu, mesaj):
+        super().__init__(mesaj)
+        self.status_kodu = status_kodu
+
+
+@dataclass
+class YuklenmisFayl:
+    yol: str
+    ad: str   # Müştərinin göndərdiyi fayl adı (yol hissələri atılıb)
+    olcu: int
+    sha256: str
+
+
+def _fayl_adi(xam):
+    # Müştərinin göndərdiyi yol hissələrini atırıq — fayl yalnız hədəf qovluğa yazıla bilər
+    ad = os.path.basename(xam.decode("utf-8", "replace").replace("\\", "/"))
+    return ad if ad not in ("", ".", "..") else None
+
+
+def _uzanti(fayl_adi, standart_uzanti):
+    # Diskdəki ada yalnız sadə uzantı keçir (".mp4", ".mov" ...)
+    uzanti = os.path.splitext(fayl_adi)[1].lower()
+    return uzanti if re.fullmatch(r"\.[a-z0-9]{1,8}", uzanti) else standart_uzanti
+
+
+class _MultipartOxuyucu:
+    """MultipartParser-in geri çağırışları: fayl hissəsi diskə, qalan sahələr (limitli) yaddaşa."""
+    def __init__(self, boundary, fayl_sahesi, qovluq, maks_olcu, fayl_yoxla, maks_sahe_olcusu, saxlanma_adi,
+                 standart_uzanti):
+        self.fayl_sahesi = fayl_sahesi
+        self.qovluq = qovluq
+        self.maks_olcu = maks_olcu
+        self.fayl_yoxla = fayl_yoxla
+        self.maks_sahe_olcusu = maks_sahe_olcusu
+        self.saxlanma_adi = saxlanma_adi
+        self.standart_uzanti = standart_uzanti
+        self.saheler = {}
+        self.fayl = None
+        self._basliqlar = {}
+        self._basliq_adi = self._basliq_deyeri = b""
+        self._f = None
+        self._sahe_adi = None
+        self._sahe = bytearray()
+        self._sahe_olcusu = 0
+        self.parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._hisse_bashladi,
+            "on_header_field": self._basliq_adi_parcasi,
+            "on_header_value": self._basliq_deyeri_parcasi,
+            "on_header_end": self._basliq_bitdi,
+            "on_headers_finished": self._basliqlar_bitdi,
+            "on_part_data": self._melumat,
+            "on_part_end": self._hisse_bitdi,
+        })
+
+    def _hisse_bashladi(self):
+        self._basliqlar = {}
+
+    def _basliq_adi_parcasi(self, data, start, end):
+        self._basliq_adi += data[start:end]
+
+    def _basliq_deyeri_parcasi(self, data, start, end):
+        self._basliq_deyeri += data[start:end]
+
+    def _basliq_bitdi(self):
+        self._basliqlar[self._basliq_adi.lower()] = self._basliq_deyeri
+        self._basliq_adi = self._basliq_deyeri = b""
+
+    def _basliqlar_bitdi(self):
+        _, secimler = parse_options_header(self._basliqlar.get(b"content-disposition", b""))
+        ad = secimler.get(b"name", b"").decode("utf-8", "replace")
+        if ad == self.fayl_sahesi and b"filename" in secimler:
+            if self.fayl is not None:
+                raise YuklemeXetasi(400, f"'{ad}' sahəsində yalnız bir fayl göndərilə bilər.")
+            fayl_adi = _fayl_adi(secimler[b"filename"]) or self.saxlanma_adi + self.standart_uzanti
+            if self.fayl_yoxla is not None:
+                self.fayl_yoxla(fayl_adi, self._basliqlar.get(b"content-type", b"").decode("latin-1"))
+            self._yol = os.path.join(self.qovluq, self.saxlanma_adi + _uzanti(fayl_adi, self.standart_uzanti))
+            self._ad = fayl_adi
+            self._f = open(self._yol, "wb")
+            self._hesh = hashlib.sha256()
+            self._olcu = 0
+        else:
+            self._sahe_adi = ad
+            self._sahe = bytearray()
+
+    def _melumat(self, data, start, end):
+        if self._f is not None:
+            self._olcu += end - start
+            if self._olcu > self.maks_olcu:
+                raise YuklemeXetasi(413, f"Fayl həddən böyükdür. Maksimum: {self.maks_olcu // 1024 // 1024} MB")
+            # memoryview — parça kopyalanmadan həm hash-ə, həm fayla gedir
+            parca = memoryview(data)[start:end]
+            self._hesh.update(parca)
+            self._f.write(parca)
+        else:
+            self._sahe_olcusu += end - start
+            if self._sahe_olcusu > self.maks_sahe_olcusu:
+                raise YuklemeXetasi(413, "Forma sahələri həddən böyükdür.")
+            self._sahe += data[start:end]
+
+    def _hisse_bitdi(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            self.fayl = YuklenmisFayl(self._yol, self._ad, self._olcu, self._hesh.hexdigest())
+        elif self._sahe_adi is not None:
+            self.saheler[self._sahe_adi] = self._sahe.decode("utf-8", "replace")
+            self._sahe_adi = None
+
+    def legv_et(self):
+        # Yarımçıq qalmış faylı bağlayıb silirik
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+        yol = self.fayl.yol if self.fayl is not None else getattr(self, "_yol", None)
+        if yol is not None and os.path.exists(yol):
+            os.remove(yol)
+
+
+async def multipart_yukle(sorgu, fayl_sahesi, qovluq, maks_olcu, fayl_yoxla=None, maks_sahe_olcusu=64 * 1024,
+                          saxlanma_adi="video", standart_uzanti=".mp4"):
+    """
+    Starlette sorğusunun multipart gövdəsini axınla oxuyur. `fayl_sahesi` adlı fayl hissəsi
+    qovluq/<saxlanma_adi><uzantı> yoluna yazılır (uzantı müştərinin fayl adından, uyğun deyilsə standart_uzanti),
+    qalan sahələr mətn kimi qaytarılır. fayl_yoxla(fayl_adi, content_type) hissənin
+    başlıqları gələn kimi (məzmundan əvvəl) çağırılır və YuklemeXetasi ata bilər.
+    Qaytarır: (sahələr dict, YuklenmisFayl). Hər hansı xətada yarımçıq fayl silinir.
+    """
+    nov, secimler = parse_options_header(sorgu.headers.get("content-type", ""))
+    if nov != b"multipart/form-data" or b"boundary" not in secimler:
+        raise YuklemeXetasi(400, "multipart/form-data gözlənilir.")
+    # Content-Length məlumdursa, həddən böyük sorğunu bir bayt da oxumadan rədd edirik
+    uzunluq = sorgu.headers.get("content-length", "")
+    if uzunluq.isdigit() and int(uzunluq) > maks_olcu + maks_sahe_olcusu:
+        raise YuklemeXetasi(413, f"Fayl həddən böyükdür. Maksimum: {maks_olcu // 1024 // 1024} MB, "
+                                 f"Göndərilən: {int(uzunluq) // 1024 // 1024} MB")
+
+    oxuyucu = _MultipartOxuyucu(secimler[b"boundary"], fayl_sahesi, qovluq, maks_olcu, fayl_yoxla,
+                                maks_sahe_olcusu, saxlanma_adi, standart_uzanti)
+    try:
+        async for parca in sorgu.stream():
+            if parca:
+                # Disk yazısı və hash hadisə dövrünü (chat sorğularını) bloklamasın
+                await asyncio.to_thread(oxuyucu.parser.write, parca)
+        oxuyucu.parser.finalize()
+        if oxuyucu.fayl is None:
+            raise YuklemeXetasi(400, f"'{fayl_sahesi}' faylı göndərilməyib.")
+        if oxuyucu.fayl.olcu == 0:
+            raise YuklemeXetasi(400, "Boş fayl göndərildi.")
+    except BaseException:
+        oxuyucu.legv_et()
+        raise
+    return oxuyucu.saheler, oxuyucu.fayl
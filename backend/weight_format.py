@@ -0,0 +1,134 @@
+"""
+weight_format.py — Yaddaşa xəritələnən (memory-mapped) çəki formatı
+===================================================================
+torch.load hər prosesdə çəkilərin öz surətini yaradır: N uvicorn worker-i N qat yaddaş tutur.
+Bu modul çəkiləri safetensors ilə uyğun düz formatda yazır:
+
+  [8 bayt: başlığın uzunluğu (little-endian u64)] [JSON başlıq] [xam tenzor baytları]
+
+Başlıq boşluqlarla tamamlanır ki, məlumat 64 baytlıq sərhəddən başlasın. Oxuyarkən fayl mmap
+ilə açılır və tenzorlar birbaşa onun üzərində görünüş (view) kimi yaradılır — kopyalama yoxdur,
+bütün worker-lər əməliyyat sisteminin səhifə keşindəki eyni nüsxəni paylaşır.
+
+İstifadə:
+  python weight_format.py                       # ismayil_model.pth -> ismayil_model.safetensors
+  python weight_format.py --pth diger.pth --cixis diger.safetensors
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+DUZLENME = 64 # Məlumat blokunun başlanğıcı bu qədər bayta düzlənir
+
+# safetensors dtype adları
+_TORCH_DTYPE_ADLARI = {} if torch is None else {
+    torch.float32: "F32", torch.float16: "F16", torch.bfloat16: "BF16",
+    torch.int64: "I64", torch.int32: "I32", torch.int8: "I8", torch.uint8: "U8", torch.bool: "BOOL",
+}
+
+
+def cekileri_yaz(ceki, yol, metadata=None):
+    """
+    ceki: {ad: torch.Tensor} — safetensors formatında yol-a yazır.
+    Tenzorlar element ölçüsünə görə azalan sıra ilə düzülür ki, hər biri öz ölçüsünə düzlənmiş ünvanda olsun.
+    """
+    tenzorlar = sorted(ceki.items(), key=lambda t: (-t[1].element_size(), t[0]))
+    bashliq, yer = {}, 0
+    for ad, tenzor in tenzorlar:
+        olcu = tenzor.numel() * tenzor.element_size()
+        bashliq[ad] = {"dtype": _TORCH_DTYPE_ADLARI[tenzor.dtype], "shape": list(tenzor.shape),
+                       "data_offsets": [yer, yer + olcu]}
+        yer += olcu
+    if metadata:
+        bashliq["__metadata__"] = {str(a): str(d) for a, d in metadata.items()}
+    bashliq_baytlari = json.dumps(bashliq, separators=(",", ":")).encode("utf-8")
+    # 8 baytlıq uzunluq + başlıq DUZLENME-yə bölünən olsun deyə başlığı boşluqla tamamlayırıq
+    bashliq_baytlari += b" " * (-(8 + len(bashliq_baytlari)) % DUZLENME)
+
+    muveqqeti = yol + ".tmp"
+    with open(muveqqeti, "wb") as f:
+        f.write(struct.pack("<Q", len(bashliq_baytlari)))
+        f.write(bashliq_baytlari)
+        for _, tenzor in tenzorlar:
+            # uint8 görünüşü bf16 kimi numpy-da olmayan tiplər üçün də işləyir
+            f.write(tenzor.detach().cpu().contiguous().reshape(-1).view(torch.uint8).numpy().tobytes())
+    # Yarımçıq fayl heç vaxt əsl adla görünməsin (işləyən worker-lər onu mmap edə bilər)
+    os.replace(muveqqeti, yol)
+
+
+def _bashligi_oxu(yaddash):
+    (uzunluq,) = struct.unpack("<Q", yaddash[:8])
+    bashliq = json.loads(bytes(yaddash[8:8 + uzunluq]))
+    metadata = bashliq.pop("__metadata__", {})
+    return bashliq, metadata, 8 + uzunluq
+
+
+def _mmap_ac(yol):
+    with open(yol, "rb") as f:
+        # ACCESS_COPY (MAP_PRIVATE): səhifələr paylaşılır, yazılsa belə fayl dəyişmir
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+
+def torch_cekilerini_oxu(yol):
+    """
+    Qaytarır: ({ad: torch.Tensor}, metadata). Tenzorlar mmap üzərində görünüşlərdir (kopyalanmır).
+    mmap obyekti tenzorlar yaşadıqca açıq qalır.
+    """
+    yaddash = _mmap_ac(yol)
+    bashliq, metadata, bashlangic = _bashligi_oxu(yaddash)
+    dtype_xeritesi = {ad: dtype for dtype, ad in _TORCH_DTYPE_ADLARI.items()}
+    ceki = {}
+    for ad, melumat in bashliq.items():
+        dtype = dtype_xeritesi[melumat["dtype"]]
+        bas, son = melumat["data_offsets"]
+        element_sayi = (son - bas) // torch.empty((), dtype=dtype).element_size()
+        tenzor = torch.frombuffer(yaddash, dtype=dtype, count=element_sayi, offset=bashlangic + bas) \
+            if element_sayi else torch.empty(0, dtype=dtype)
+        ceki[ad] = tenzor.view(melumat["shape"])
+    return ceki, metadata
+
+
+def modeli_yukle(yol, luget_olcusu=None):
+    """
+    IsmayilModeli-ni mmap edilmiş çəkilər üzərində qurur: parametrlər fayla baxan görünüşlərdir.
+    Model əvvəlcə 'meta' cihazında yaradılır ki, təsadüfi başlanğıc çəkilər üçün yaddaş ayrılmasın.
+    """
+    from model import IsmayilModeli, ModelKonfiqurasiyasi
+
+    ceki, metadata = torch_cekilerini_oxu(yol)
+    if "konfiq" in metadata:
+        konfiq = ModelKonfiqurasiyasi.lugetden(json.loads(metadata["konfiq"]))
+    else:
+        # Konfiqurasiyasız köhnə fayllar: ölçülər tenzorların formasından çıxarılır
+        konfiq = ModelKonfiqurasiyasi.cekilerden(ceki)
+    if luget_olcusu is not None and luget_olcusu != konfiq.luget_olcusu:
+        raise ValueError(f"Tokenizatorun lüğəti ({luget_olcusu}) modelinkindən ({konfiq.luget_olcusu}) fərqlidir")
+    with torch.device("meta"):
+        model = IsmayilModeli(konfiq)
+    model.load_state_dict(ceki, assign=True)
+    return model.eval()
+
+
+def pth_den_cevir(pth_yolu="ismayil_model.pth", cixis_yolu="ismayil_model.safetensors"):
+    from model import cekileri_yukle
+
+    ceki, konfiq = cekileri_yukle(pth_yolu)
+    cekileri_yaz(ceki, cixis_yolu, metadata={"format": "pt", "movqe_novu": konfiq.movqe_novu,
+                                             "konfiq": json.dumps(konfiq.lugete())})
+    print(f"'{pth_yolu}' -> '{cixis_yolu}' ({os.path.getsize(cixis_yolu) / 1024:.1f} KB, {len(ceki)} tenzor)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PyTorch çəkilərini mmap edilə bilən formata çevirmək")
+    parser.add_argument("--pth", default="ismayil_model.pth")
+    parser.add_argument("--cixis", default="ismayil_model.safetensors")
+    args = parser.parse_args()
+    pth_den_cevir(args.pth, args.cixis)